@@ -0,0 +1,43 @@
+"""
+春日体育館 割り当てエンジン（CP-SAT）
+
+段階ごとに呼び出せるライブラリ API:
+
+    inst = load_instance(config_path, data_dir)
+    am = build_model(inst)
+    result = solve_model(am, inst.max_solve_seconds)
+    sol = extract_solution(inst, am, result)
+    render_outputs(inst, sol, out_run_dir)
+
+1か月分をまとめて実行するなら run_month() を使う（sourcecode/main.py はその薄いCLI）。
+solve_model / render_outputs は allocator.solve.solve / allocator.render.render の別名
+（allocator.solve / allocator.render はサブモジュールの名前なので、関数をその名前では公開できない）。
+"""
+import importlib
+
+# 公開名 → (定義しているモジュール, そのモジュールでの名前)。使われたときに初めて import する
+# （allocator.rerender のように OR-Tools を読み込まずに allocator.* を使えるように）
+_EXPORTS = {
+    "Instance": ("allocator.instance", "Instance"),
+    "load_instance": ("allocator.instance", "load_instance"),
+    "AllocModel": ("allocator.model", "AllocModel"),
+    "ModelOptions": ("allocator.options", "ModelOptions"),
+    "Weights": ("allocator.options", "Weights"),
+    "build_model": ("allocator.model", "build_model"),
+    "SolveResult": ("allocator.solve", "SolveResult"),
+    "solve_model": ("allocator.solve", "solve"),
+    "Solution": ("allocator.solution", "Solution"),
+    "extract_solution": ("allocator.solution", "extract_solution"),
+    "render_outputs": ("allocator.render", "render"),
+    "RunResult": ("allocator.pipeline", "RunResult"),
+    "run_month": ("allocator.pipeline", "run_month"),
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module, attr = _EXPORTS[name]
+        return getattr(importlib.import_module(module), attr)
+    raise AttributeError(f"module 'allocator' has no attribute {name!r}")
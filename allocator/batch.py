@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+# ============================================================
+# 複数の月をまとめて解く（プロセスプール）
+#   各月は data/YYYY-MM/config.yaml と同じフォルダの入力で、別プロセスの run_month が解く。
+#   月どうしは独立なので同時に進め、CP-SAT のスレッド数は CPU 数をプロセス数で割って絞る。
+#   月ごとの出力・run.log はいつもどおり output/YYYY-MM/ に出て、
+#   全体の一覧は output/batch_<最初の月>_<最後の月>.csv に書く。
+# ============================================================
+import csv
+import os
+import re
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any
+
+from allocator.instance import load_config
+from allocator.pipeline import BASE_DIR, resolve_path, run_month
+
+_MONTH_RE = re.compile(r"^(\d{4})-(\d{2})$")
+
+
+@dataclass
+class MonthStatus:
+    ym: str
+    ok: bool
+    status: str | None = None      # OPTIMAL / FEASIBLE（失敗したら None）
+    objective: float | None = None
+    wall_time: float = 0.0          # この月の run_month 全体（読み込み〜出力）
+    cache_hit: bool = False
+    solver_workers: int | None = None  # 1プロセスあたりの CP-SAT スレッド数（None なら絞っていない）
+    error: str | None = None
+
+
+def _parse_month(s: str) -> tuple[int, int]:
+    m = _MONTH_RE.match(s.strip())
+    if not m or not 1 <= int(m.group(2)) <= 12:
+        raise ValueError(f"月は YYYY-MM で指定してください: {s}")
+    return int(m.group(1)), int(m.group(2))
+
+
+def parse_months(spec: str) -> list[str]:
+    """'2026-04..2026-09'（両端を含む）や '2026-04,2026-06' を YYYY-MM のリストにする"""
+    months: list[str] = []
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        first, sep, last = part.partition("..")
+        y, m = _parse_month(first)
+        y2, m2 = _parse_month(last) if sep else (y, m)
+        if (y2, m2) < (y, m):
+            raise ValueError(f"範囲の順番が逆です: {part}")
+        while (y, m) <= (y2, m2):
+            ym = f"{y:04d}-{m:02d}"
+            if ym not in months:
+                months.append(ym)
+            y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    if not months:
+        raise ValueError(f"月が指定されていません: {spec}")
+    return months
+
+
+def _solve_month_task(args) -> MonthStatus:
+    """ワーカープロセスで1か月を解く。画面表示・ログの表示は output/YYYY-MM/batch_stdout.log に書く"""
+    ym, base_dir, out, solver_workers, kwargs = args
+    t0 = time.perf_counter()
+    config_path = base_dir / "data" / ym / "config.yaml"
+    out_run_dir = resolve_path(base_dir, str(out), "output") / ym
+    out_run_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(out_run_dir / "batch_stdout.log", "w", encoding="utf-8") as f, redirect_stdout(f), redirect_stderr(f):
+        try:
+            if not config_path.exists():
+                raise FileNotFoundError(f"{config_path} がありません")
+            config = load_config(config_path)
+            tag = f"{int(config['year']):04d}-{int(config['month']):02d}"
+            if tag != ym:
+                raise ValueError(f"{config_path} の year/month が {tag} になっています")
+            r = run_month(
+                config_path=config_path, out=out, data_tag=ym,
+                solver_workers=solver_workers, base_dir=base_dir, **kwargs,
+            )
+        except Exception as e:
+            traceback.print_exc()
+            return MonthStatus(
+                ym=ym, ok=False, wall_time=round(time.perf_counter() - t0, 2),
+                solver_workers=solver_workers, error=f"{type(e).__name__}: {e}",
+            )
+
+    sol = r.solution
+    return MonthStatus(
+        ym=ym, ok=True, status=sol.status_name, objective=sol.objective,
+        wall_time=round(time.perf_counter() - t0, 2), cache_hit=r.cache_hit, solver_workers=solver_workers,
+    )
+
+
+def run_batch(
+    months: list[str],
+    out: str | Path = "output",
+    max_workers: int | None = None,
+    base_dir: Path = BASE_DIR,
+    **kwargs: Any,
+) -> list[MonthStatus]:
+    """
+    months をプロセスプールで解き、months の順に結果を返す（失敗した月があっても他の月は続ける）。
+    max_workers: 同時に解く月の数（既定: CPU 数。月の数より多くはしない）。
+    kwargs: run_month にそのまま渡す（engine / objective / no_gantt など）。
+    """
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(max_workers or cpus, len(months)))
+    solver_workers = max(1, cpus // workers) if workers > 1 else None  # 1か月ずつなら絞らない
+    if kwargs.get("render_workers") is None and solver_workers is not None:
+        kwargs = {**kwargs, "render_workers": solver_workers}  # 画像を描くプロセス数も同じだけに絞る
+    tasks = [(ym, base_dir, out, solver_workers, kwargs) for ym in months]
+
+    t0 = time.perf_counter()
+    done: dict[str, MonthStatus] = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_solve_month_task, t) for t in tasks]
+        for fut in as_completed(futures):
+            st = fut.result()
+            done[st.ym] = st
+            print(
+                f"[batch] {st.ym} {'ok' if st.ok else 'FAILED'} {st.status or st.error} "
+                f"({st.wall_time:.1f}s, {len(done)}/{len(months)}, elapsed {time.perf_counter() - t0:.1f}s)",
+                flush=True,
+            )
+    return [done[ym] for ym in months]
+
+
+def format_table(statuses: list[MonthStatus]) -> list[str]:
+    cols = ["ym", "ok", "status", "objective", "wall_time", "cache_hit", "error"]
+    table = [["" if getattr(s, c) is None else str(getattr(s, c)) for c in cols] for s in statuses]
+    widths = [max(len(c), *(len(t[i]) for t in table)) for i, c in enumerate(cols)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(cols, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(t, widths)) for t in table]
+    return lines
+
+
+def save_status_csv(statuses: list[MonthStatus], path: Path) -> None:
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=[fd.name for fd in fields(MonthStatus)])
+        w.writeheader()
+        for s in statuses:
+            w.writerow(asdict(s))
+
+
+def default_status_path(out_dir: Path, months: list[str]) -> Path:
+    return out_dir / f"batch_{months[0]}_{months[-1]}.csv"
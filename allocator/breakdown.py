@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+# ============================================================
+# 目的関数の内訳を集計（使った団体だけ版）
+# ============================================================
+from typing import TYPE_CHECKING, Any
+
+from allocator.instance import ZONES, Instance, morning_penalty, prop_teams_of
+from allocator.options import ModelOptions, Weights
+from allocator.solution import Solution
+
+if TYPE_CHECKING:  # 出力だけ作るとき（allocator.rerender）は OR-Tools を読み込まない
+    from allocator.model import AllocModel
+
+
+def ratio_fairness_terms(counts: dict, pref_count: dict, prop_teams: list, mode: str) -> tuple[int, int]:
+    """
+    比率公平性 (3)(5) の値を model.py と同じ定式化で計算する。
+    戻り値: (項の数, ずれの合計)  ※ score = -weight * ずれの合計
+    """
+    if mode == "pairwise":
+        n_terms, diff_sum = 0, 0
+        for i in range(len(prop_teams)):
+            for j in range(i + 1, len(prop_teams)):
+                a = prop_teams[i]
+                b = prop_teams[j]
+                diff_sum += abs(counts[a] * pref_count[b] - counts[b] * pref_count[a])
+                n_terms += 1
+        return n_terms, diff_sum
+
+    if not prop_teams:
+        return 0, 0
+    W = sum(pref_count[t] for t in prop_teams)
+    total = sum(counts[t] for t in prop_teams)
+    devs = [counts[a] * W - total * pref_count[a] for a in prop_teams]
+    if mode == "target":
+        return len(devs), sum(abs(v) for v in devs)
+    return 1, max(devs) - min(devs)  # maxmin
+
+
+def compute_objective_breakdown_used_only(
+    inst: Instance, sol: Solution, weights: Weights, options: ModelOptions | None = None
+) -> dict[str, Any]:
+    fairness = (options or ModelOptions()).fairness
+    days, teams, slots_by_day = inst.days, inst.teams, inst.slots_by_day
+    event_calendar_days = inst.event_calendar_days
+
+    # ----------------------------
+    # (1) 使用団体数最大化
+    # ----------------------------
+    used_team_count = 0
+    for d in days:
+        for team in teams:
+            if sol.y[(team, d)] == 1:
+                used_team_count += 1
+    used_team_score = weights.team * used_team_count
+
+    # ----------------------------
+    # (2) 日内公平性（イベント日除外）
+    #     「その日に使った団体(y=1)だけ」で maxU-minU
+    # ----------------------------
+    daily_spread_sum = 0
+    daily_spread_score = 0
+    daily_used_pairs_days = 0  # 2団体以上使った日
+
+    for d in days:
+        if d in event_calendar_days:
+            continue
+        ts = slots_by_day[d]
+        if not ts:
+            continue
+
+        used_today = [t for t in teams if sol.y[(t, d)] == 1]
+        if len(used_today) < 2:
+            # 0 or 1団体しか使ってない日は「差」が定義しにくいので集計しない
+            continue
+
+        us = [sol.U[(t, d)] for t in used_today]
+        spread = max(us) - min(us)
+
+        daily_used_pairs_days += 1
+        daily_spread_sum += spread
+        daily_spread_score += weights.daily_spread * spread
+
+    # ----------------------------
+    # (2') 日内公平性（イベント日：非イベント希望団体のみ / ソフト）
+    #     「非イベント希望」かつ「その日に使った団体(y=1)だけ」で maxU-minU
+    # ----------------------------
+    event_spread_sum = 0
+    event_spread_score = 0
+    event_days = 0
+
+    for d in days:
+        if d not in event_calendar_days:
+            continue
+        ts = slots_by_day[d]
+        if not ts:
+            continue
+
+        used_non_event = [
+            t for t in inst.non_event_pref_teams(d)
+            if sol.y[(t, d)] == 1
+        ]
+
+        if len(used_non_event) < 2:
+            continue
+
+        us = [sol.U[(t, d)] for t in used_non_event]
+        spread = max(us) - min(us)
+
+        event_days += 1
+        event_spread_sum += spread
+        event_spread_score += weights.daily_spread_ev * spread
+
+    # ----------------------------
+    # (3) 月合計比率公平性（fairness_mode に合わせる）
+    #     pairwise: -PROP_MONTH_W * |totalM[a]*wb - totalM[b]*wa|
+    # ----------------------------
+    totalM_val = {t: sum(sol.U[(t, d)] for d in days) for t in teams}
+    prop_teams = prop_teams_of(inst)
+    pref_count = inst.pref_count
+
+    month_pairs, month_diff_sum = ratio_fairness_terms(totalM_val, pref_count, prop_teams, fairness)
+    month_score = -weights.prop_month * month_diff_sum
+
+    # ----------------------------
+    # (4) 朝負担の偏り
+    #     -MORN_SPREAD_W * (maxB - minB)
+    # ----------------------------
+    morning_burden_val = {}
+    for team in teams:
+        s = 0
+        for d in days:
+            for t in slots_by_day[d]:
+                p = morning_penalty(t)
+                if p > 0 and sol.x[(team, d, t)] == 1:
+                    s += p
+        morning_burden_val[team] = s
+
+    maxB_val = max(morning_burden_val.values()) if teams else 0
+    minB_val = min(morning_burden_val.values()) if teams else 0
+    morning_score = -weights.morn_spread * (maxB_val - minB_val)
+
+    # 朝負担 上位表示（上位3団体）
+    top_morning = sorted(morning_burden_val.items(), key=lambda kv: kv[1], reverse=True)[:3]
+
+    # ----------------------------
+    # (5) 時間帯比率公平性（4時間帯 × fairness_mode）
+    #     pairwise: -PROP_ZONE_W * |zone[a]*wb - zone[b]*wa|
+    #     時間帯の定義はモデルと同じ instance.ZONES を使う（内訳とモデルで食い違わないように）
+    # ----------------------------
+    zone_val = {z: {team: 0 for team in teams} for z in ZONES}
+    for d in days:
+        for t in slots_by_day[d]:
+            for team in teams:
+                if sol.x[(team, d, t)] == 1:
+                    for z, pred in ZONES.items():
+                        if pred(t):
+                            zone_val[z][team] += 1
+
+    zone_pairs = 0
+    zone_diff_sum = {z: 0 for z in ZONES}
+    zone_score = 0
+
+    for z in ZONES:
+        zone_pairs, zone_diff_sum[z] = ratio_fairness_terms(zone_val[z], pref_count, prop_teams, fairness)
+        zone_score += -weights.prop_zone * zone_diff_sum[z]
+
+    # ----------------------------
+    # (6) 空き時間ペナルティ
+    #     -IDLE_W * (未割当スロット数)
+    # ----------------------------
+    idle_slots = 0
+    idle_score = 0
+
+    for d in days:
+        ts = slots_by_day[d]
+        if not ts:
+            continue
+
+        for t in ts:
+            assigned = sum(sol.x[(team, d, t)] for team in teams)
+            if assigned == 0:
+                idle_slots += 1
+                idle_score += -weights.idle
+
+    # ----------------------------
+    # 合計（あなたの現目的関数に合わせて PREF_BONUS は含めない）
+    # ----------------------------
+    total = (
+        used_team_score
+        + daily_spread_score
+        + event_spread_score
+        + month_score
+        + morning_score
+        + zone_score
+        + idle_score
+    )
+
+    return {
+        "used_team_count": used_team_count,
+        "used_team_score": used_team_score,
+        "daily_spread_days": daily_used_pairs_days,
+        "daily_spread_sum": daily_spread_sum,
+        "daily_spread_score": daily_spread_score,
+        "event_spread_days": event_days,
+        "event_spread_sum": event_spread_sum,
+        "event_spread_score": event_spread_score,
+        "fairness_mode": fairness,
+        "month_pairs": month_pairs,
+        "month_diff_sum": month_diff_sum,
+        "month_score": month_score,
+        "maxB": maxB_val,
+        "minB": minB_val,
+        "top_morning": top_morning,
+        "morning_score": morning_score,
+        "zone_pairs": zone_pairs,
+        "zone_diff_sum": zone_diff_sum,
+        "zone_score": zone_score,
+        "idle_slots": idle_slots,
+        "idle_score": idle_score,
+        "total": total,
+    }
+
+
+def breakdown_from_model(inst: Instance, am: AllocModel, solver, sol: Solution) -> dict[str, Any]:
+    """
+    compute_objective_breakdown_used_only と同じ形の内訳を、解いたモデルの目的項（am.terms）の値から作る。
+    各項の式の値を1回ずつ読むだけなので目的項の数に比例し、total は CP-SAT の目的値と一致する。
+    solver: 解を持つもの（CpSolver / 解のコールバック）。sol は「2団体以上使った日」の数を数えるのに使う。
+    """
+    raw: dict[str, int] = {}
+    score: dict[str, int] = {}
+    count: dict[str, int] = {}
+    for name, coef, expr in am.terms:
+        v = int(solver.Value(expr))
+        raw[name] = raw.get(name, 0) + v
+        score[name] = score.get(name, 0) + coef * v
+        count[name] = count.get(name, 0) + 1
+
+    def used_days(days, teams_of) -> int:
+        return sum(1 for d in days if inst.slots_by_day[d] and sum(sol.y[(t, d)] for t in teams_of(d)) >= 2)
+
+    event_calendar_days = inst.event_calendar_days
+    burden = {team: int(solver.Value(v)) for team, v in am.morning_burden.items()}
+    zone_terms = [f"zone_{z}" for z in ZONES]
+    return {
+        "used_team_count": raw.get("team", 0),
+        "used_team_score": score.get("team", 0),
+        "daily_spread_days": used_days([d for d in inst.days if d not in event_calendar_days], lambda d: inst.teams),
+        "daily_spread_sum": raw.get("daily_spread", 0),
+        "daily_spread_score": score.get("daily_spread", 0),
+        "event_spread_days": used_days([d for d in inst.days if d in event_calendar_days], inst.non_event_pref_teams),
+        "event_spread_sum": raw.get("event_spread", 0),
+        "event_spread_score": score.get("event_spread", 0),
+        "fairness_mode": am.options.fairness,
+        "month_pairs": count.get("month", 0),
+        "month_diff_sum": raw.get("month", 0),
+        "month_score": score.get("month", 0),
+        "maxB": max(burden.values(), default=0),
+        "minB": min(burden.values(), default=0),
+        "top_morning": sorted(burden.items(), key=lambda kv: kv[1], reverse=True)[:3],
+        "morning_score": score.get("morning", 0),
+        "zone_pairs": max((count.get(z, 0) for z in zone_terms), default=0),
+        "zone_diff_sum": {z: raw.get(f"zone_{z}", 0) for z in ZONES},
+        "zone_score": sum(score.get(z, 0) for z in zone_terms),
+        "idle_slots": raw.get("idle", 0),
+        "idle_score": score.get("idle", 0),
+        "total": sum(score.values()),
+    }
+
+
+def format_breakdown(bd: dict[str, Any], weights: Weights) -> list[str]:
+    """内訳 dict を表示（＋画像保存用）の行リストにする"""
+    lines = []
+    unit = "pairs" if bd.get("fairness_mode", "pairwise") == "pairwise" else f"{bd['fairness_mode']} terms"
+    lines.append("================ Objective Breakdown (used-only) ================")
+    lines.append(f"(1) Use teams:        score={bd['used_team_score']:,}  (count y=1: {bd['used_team_count']})  weight(TEAM_W)={weights.team}")
+    lines.append(f"(2) Daily spread:     score={bd['daily_spread_score']:,}  (days={bd['daily_spread_days']}, sum max-min={bd['daily_spread_sum']}) weight={weights.daily_spread}  [used teams only]")
+    lines.append(f"(2') Event spread:    score={bd['event_spread_score']:,}  (days={bd['event_spread_days']}, sum max-min={bd['event_spread_sum']}) weight={weights.daily_spread_ev}  [used teams only]")
+    lines.append(f"(3) Month ratio:      score={bd['month_score']:,}  ({unit}={bd['month_pairs']}, sum diff={bd['month_diff_sum']:,}) weight={weights.prop_month}")
+    lines.append(f"(4) Morning fairness  score={bd['morning_score']:,}  (maxB-minB={bd['maxB'] - bd['minB']}, maxB={bd['maxB']}, minB={bd['minB']}) weight(MORN_SPREAD_W)={weights.morn_spread}")
+    if bd["top_morning"]:
+        lines.append("     top morning burden: " + ", ".join([f"{t}={v}" for t, v in bd["top_morning"]]))
+    lines.append(f"(5) Zone ratio:       score={bd['zone_score']:,}  ({unit}={bd['zone_pairs']} per zone) weight={weights.prop_zone}")
+    lines.append(f"(6) Idle slots:       score={bd['idle_score']:,}  (idle slots={bd['idle_slots']}) weight={weights.idle}")
+    for z in ["morning", "daytime", "evening", "night"]:
+        lines.append(f"    - zone {z}: sum diff={bd['zone_diff_sum'][z]:,}")
+    lines.append("-----------------------------------------------------")
+    lines.append(f"TOTAL objective (approx from breakdown) = {bd['total']:,}")
+    lines.append("==================================================================")
+    return lines
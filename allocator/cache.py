@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+# ============================================================
+# 実行結果のキャッシュ（入力が同じなら解き直さない）
+#   キー = 正規化した入力（config / preferences / events）+ 解き方の設定 + コードの版 のハッシュ。
+#   output/.cache/<キー>/ に Solution と breakdown（pickle）と出力ファイルを置き、
+#   ヒットしたら出力ファイルを output/YYYY-MM/ にコピーして返す。
+# ============================================================
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import ortools
+
+from allocator.instance import Instance
+
+logger = logging.getLogger("kasuga_gym")
+
+CACHE_DIRNAME = ".cache"
+
+# 解に影響しない config のキー（変えてもキャッシュを使う）
+_IGNORED_CONFIG_KEYS = {"stream_incumbents", "cache"}
+
+# 同じ入力・設定なら同じ解になる止まり方（StopRules で決めた所まで解けた）。
+# time_limit / no_improve は複数スレッドだと毎回違う解になり得るので、ヒットしたときにそう表示する。
+CONVERGED_STOP_REASONS = ("optimal", "rel_gap", "abs_gap", "target")
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """allocator/*.py の中身と OR-Tools の版から作る（コードを直したら別のキーになる）"""
+    h = hashlib.sha256(ortools.__version__.encode())
+    for p in sorted(Path(__file__).resolve().parent.glob("*.py")):
+        h.update(p.name.encode())
+        h.update(p.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def _normalized_inputs(inst: Instance) -> dict[str, Any]:
+    """並び順や書式の違いを落とした入力（同じ意味のファイルは同じ値になる）"""
+    with open(inst.pref_path, encoding="utf-8") as f:
+        prefs = json.load(f)
+    with open(inst.event_path, encoding="utf-8") as f:
+        events = json.load(f)
+    config = {k: v for k, v in inst.config.items() if k not in _IGNORED_CONFIG_KEYS}
+    config = json.loads(json.dumps(config, ensure_ascii=False, default=str))  # YAML の int キーなどを文字列にそろえる
+    return {
+        "config": config,
+        "preferences": {team: sorted(ds) for team, ds in prefs.items()},
+        "events": sorted(events, key=lambda e: json.dumps(e, sort_keys=True, ensure_ascii=False)),
+    }
+
+
+def run_key(inst: Instance, settings: dict[str, Any]) -> str:
+    """
+    settings: 解き方の設定（engine / ModelOptions / objective / Weights / 停止条件 / seed / 出力の種類）。
+    ヒントは探索の出発点を変えるだけなので含めない。
+    """
+    payload = {
+        "inputs": _normalized_inputs(inst),
+        "settings": settings,
+        "code": code_version(),
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def cache_dir(out_dir: Path, key: str) -> Path:
+    return out_dir / CACHE_DIRNAME / key
+
+
+def load_cached(out_dir: Path, key: str, out_run_dir: Path):
+    """
+    ヒットしたら出力ファイルを out_run_dir にコピーして (Solution, breakdown, stop_reason) を返す。無ければ None。
+    stop_reason は保存したときの止まり方（CONVERGED_STOP_REASONS 以外なら時間などで打ち切った解）。
+    """
+    entry = cache_dir(out_dir, key)
+    result_path = entry / "result.pkl"
+    if not result_path.exists():
+        return None
+    try:
+        with open(result_path, "rb") as f:
+            stored = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+        logger.info("cache: 壊れたエントリを無視します key=%s (%s)", key, e)
+        return None
+
+    for p in sorted((entry / "files").iterdir()):
+        shutil.copy2(p, out_run_dir / p.name)
+    return stored["solution"], stored["breakdown"], stored.get("stop_reason")
+
+
+def store(
+    out_dir: Path, key: str, files: list[Path], run_tag: str, solution, breakdown: dict, stop_reason: str | None = None,
+) -> Path:
+    """
+    files: この実行で書き出した出力ファイル（render の written など）。
+    stop_reason: 求解の止まり方（SolveResult.stop_reason。decomposed エンジンは None）。ヒットしたときに表示する。
+    フォルダを glob すると、前の実行の画像（今回は --no-gantt で作っていない）まで入ってしまうので、
+    渡されたものだけ入れる。
+    別名のフォルダに書いてから置き換える（同時に実行されても中途半端なエントリを読まない）。
+    """
+    entry = cache_dir(out_dir, key)
+    tmp = entry.with_name(f"{key}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    (tmp / "files").mkdir(parents=True)
+    for p in files:
+        shutil.copy2(p, tmp / "files" / p.name)
+    with open(tmp / "result.pkl", "wb") as f:
+        pickle.dump({"solution": solution, "breakdown": breakdown, "stop_reason": stop_reason}, f)
+    with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "run_tag": run_tag,
+            "code": code_version(),
+            "status": solution.status_name,
+            "stop_reason": stop_reason,
+        }, f, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(entry, ignore_errors=True)
+    os.replace(tmp, entry)
+    return entry
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+# ============================================================
+# 日ごとの分割求解（decomposition）
+#
+# ハード制約はすべて1日の中で閉じていて、日をまたぐのは目的関数の
+# (3) 月合計比率・(4) 朝負担・(5) 時間帯比率だけ。そこで
+#   1) 各日の部分問題（その日の制約 + (1)(2)(2')(6)）をプロセスプールで並列に解き、初期解を作る
+#   2) マスター（LNS）: 他の日を現在の解に固定したまま、各日を (3)(4)(5) 込みの
+#      正確な目的関数で解き直す（これも全日並列）
+#   3) 得られた日ごとの改善案を、真の目的関数が良くなる順に1日ずつ採用する
+# を改善がなくなるか時間切れになるまで繰り返す（採用は改善時のみなので単調に良くなる）。
+# ============================================================
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+
+from ortools.sat.python import cp_model
+
+from allocator.breakdown import compute_objective_breakdown_used_only
+from allocator.instance import ZONES, Instance, morning_penalty
+from allocator.model import ModelOptions, Weights, _add_ratio_fairness, _add_term, build_day_model
+from allocator.hints import hint_assignment
+from allocator.solution import Solution, assignment_values, solution_from_assignment
+
+logger = logging.getLogger("kasuga_gym")
+
+
+@dataclass
+class DayOffsets:
+    """対象日以外の日の合計（他の日を固定したときの定数項）"""
+    total: dict[str, int] = field(default_factory=dict)
+    zone: dict[str, dict[str, int]] = field(default_factory=dict)
+    morning: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class DecompositionResult:
+    solution: Solution
+    objective: int
+    rounds: int
+    wall_time: float
+    history: list[dict] = field(default_factory=list)
+
+
+# ------------------------------------------------------------
+# 部分問題（ワーカープロセスで実行）
+# ------------------------------------------------------------
+def _add_monthly_terms(am, inst: Instance, d: date, offsets: DayOffsets) -> None:
+    """他の日を固定した (3)(4)(5) を1日分のモデルに足す（定数 + その日の変数。変数のない団体は 0）"""
+    model, w = am.model, am.weights
+    ts = inst.slots_by_day[d]
+
+    total = {team: offsets.total[team] + am.U.get((team, d), 0) for team in inst.teams}
+    _add_ratio_fairness(am, inst, total, "totalM", w.prop_month, "month")
+
+    for z in ZONES:
+        counts = {team: offsets.zone[z][team] + am.zone_day.get((z, team, d), 0) for team in inst.teams}
+        _add_ratio_fairness(am, inst, counts, z, w.prop_zone, f"zone_{z}")
+
+    burden = {team: offsets.morning[team] + am.morning_day.get((team, d), 0) for team in inst.teams}
+    ub = max(offsets.morning.values(), default=0) + sum(morning_penalty(t) for t in ts)
+    maxB = model.NewIntVar(0, ub, "max_morning_burden")
+    minB = model.NewIntVar(0, ub, "min_morning_burden")
+    model.AddMaxEquality(maxB, [burden[t] for t in inst.teams])
+    model.AddMinEquality(minB, [burden[t] for t in inst.teams])
+    _add_term(am, "morning", -w.morn_spread, maxB - minB)
+
+
+def _solve_day_task(args) -> tuple[date, str, dict[tuple[str, date, int], int]]:
+    inst, d, weights, options, offsets, hint_x, time_limit, seed = args
+    am = build_day_model(inst, d, weights, options)
+    if offsets is not None:
+        _add_monthly_terms(am, inst, d, offsets)
+    am.model.Maximize(cp_model.LinearExpr.Sum(am.obj))
+
+    if hint_x:
+        hint_assignment(am, inst, hint_x)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_workers = 1  # 並列化はプロセスプール側で行う
+    solver.parameters.random_seed = seed
+    status = solver.Solve(am.model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return d, solver.StatusName(status), {}
+    return d, solver.StatusName(status), assignment_values(inst, am, solver)
+
+
+# ------------------------------------------------------------
+# マスター
+# ------------------------------------------------------------
+def _day_x(inst: Instance, sol: Solution, d: date) -> dict[tuple[str, date, int], int]:
+    return {(team, d, t): sol.x[(team, d, t)] for t in inst.slots_by_day[d] for team in inst.teams}
+
+
+def _offsets_without(inst: Instance, sol: Solution, d: date) -> DayOffsets:
+    off = DayOffsets(
+        total={team: sol.totalM[team] - sol.U[(team, d)] for team in inst.teams},
+        zone={z: dict(sol.zone_counts[z]) for z in ZONES},
+        morning={team: 0 for team in inst.teams},
+    )
+    for (team, dd, t), v in sol.x.items():
+        if not v:
+            continue
+        if dd != d:
+            off.morning[team] += morning_penalty(t)
+            continue
+        for z, pred in ZONES.items():
+            if pred(t):
+                off.zone[z][team] -= 1
+    return off
+
+
+def _evaluate(inst: Instance, assigned: dict, weights: Weights, options: ModelOptions) -> tuple[int, Solution]:
+    sol = solution_from_assignment(inst, assigned, status_name="FEASIBLE")
+    objective = compute_objective_breakdown_used_only(inst, sol, weights, options)["total"]
+    sol.objective = objective
+    return objective, sol
+
+
+def solve_decomposed(
+    inst: Instance,
+    weights: Weights | None = None,
+    options: ModelOptions | None = None,
+    time_limit: float | None = None,
+    rounds: int = 20,
+    max_workers: int | None = None,
+    seed: int = 0,
+) -> DecompositionResult:
+    """
+    日ごとの部分問題をプロセスプールで解き、月をまたぐ公平性は LNS で調整する。
+    time_limit（既定: inst.max_solve_seconds）を使い切る前にラウンドを打ち切る。
+    seed: 部分問題の CP-SAT の random_seed（1ワーカーなので時間切れにならなければ毎回同じ解になる）。
+    """
+    weights = weights or Weights()
+    options = options or ModelOptions()
+    time_limit = float(time_limit if time_limit is not None else inst.max_solve_seconds)
+    active_days = [d for d in inst.days if inst.slots_by_day[d]]
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(active_days) or 1))
+
+    # 1ラウンドの予算を日数で割る（ワーカー数ぶんは同時に進む）
+    round_budget = time_limit / max(rounds + 1, 1)
+    day_limit = max(0.5, round_budget * workers / max(len(active_days), 1))
+
+    t0 = time.perf_counter()
+    history = []
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    run_map = executor.map if executor else map
+    try:
+        # ---- 1) 初期解：各日を独立に解く ----
+        tasks = [(inst, d, weights, options, None, None, day_limit, seed) for d in active_days]
+        assigned = {}
+        for d, status_name, x_day in run_map(_solve_day_task, tasks):
+            if not x_day:
+                raise RuntimeError(f"{d.isoformat()} の部分問題で解が見つかりませんでした（{status_name}）")
+            assigned.update(x_day)
+
+        objective, sol = _evaluate(inst, assigned, weights, options)
+        elapsed = time.perf_counter() - t0
+        history.append({"round": 0, "objective": objective, "accepted_days": len(active_days), "elapsed": round(elapsed, 3)})
+        logger.info("decomposition round=0 objective=%s elapsed=%.2fs", f"{objective:,}", elapsed)
+
+        # ---- 2) LNS：他の日を固定して各日を解き直す ----
+        for k in range(1, rounds + 1):
+            if time.perf_counter() - t0 + round_budget > time_limit:
+                break
+
+            tasks = [
+                (inst, d, weights, options, _offsets_without(inst, sol, d), _day_x(inst, sol, d), day_limit, seed)
+                for d in active_days
+            ]
+            candidates = []
+            for d, _, x_day in run_map(_solve_day_task, tasks):
+                if not x_day or x_day == _day_x(inst, sol, d):
+                    continue
+                trial = dict(assigned)
+                trial.update(x_day)
+                cand_obj, _ = _evaluate(inst, trial, weights, options)
+                if cand_obj > objective:
+                    candidates.append((cand_obj, d, x_day))
+
+            # ---- 3) 改善の大きい順に1日ずつ採用（採用後も改善する場合のみ）----
+            accepted = 0
+            for _, d, x_day in sorted(candidates, key=lambda c: c[0], reverse=True):
+                trial = dict(assigned)
+                trial.update(x_day)
+                cand_obj, cand_sol = _evaluate(inst, trial, weights, options)
+                if cand_obj > objective:
+                    assigned, objective, sol = trial, cand_obj, cand_sol
+                    accepted += 1
+
+            elapsed = time.perf_counter() - t0
+            history.append({"round": k, "objective": objective, "accepted_days": accepted, "elapsed": round(elapsed, 3)})
+            logger.info("decomposition round=%d objective=%s accepted_days=%d elapsed=%.2fs",
+                        k, f"{objective:,}", accepted, elapsed)
+            if accepted == 0:
+                break
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return DecompositionResult(
+        solution=sol,
+        objective=objective,
+        rounds=len(history) - 1,
+        wall_time=time.perf_counter() - t0,
+        history=history,
+    )
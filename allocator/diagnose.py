@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+# ============================================================
+# 解が見つからないときの原因調べ（仮定リテラルによる矛盾の核）
+#   build_guarded_model で制約の族（イベント・カバー・日内公平性）ごとに仮定リテラルを付け、
+#   全部を仮定にして解く。INFEASIBLE なら SufficientAssumptionsForInfeasibility で
+#   矛盾する族の組を取り出し、1つずつ外して解き直して極小にする。
+# ============================================================
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from ortools.sat.python import cp_model
+
+from allocator.instance import Instance, tstr
+from allocator.model import ModelOptions, build_guarded_model
+
+logger = logging.getLogger("kasuga_gym")
+
+
+@dataclass
+class InfeasibilityReport:
+    status: str                                      # 制約だけのモデルの status（INFEASIBLE / FEASIBLE / UNKNOWN）
+    core: list[tuple] = field(default_factory=list)  # 矛盾する制約の族（極小。1つでも外せば解ける）
+    minimal: bool = False                            # 極小化が時間内に終わったか
+    checks: int = 0                                  # Solve した回数
+    wall_time: float = 0.0
+
+    @property
+    def infeasible(self) -> bool:
+        return self.status == "INFEASIBLE"
+
+    @property
+    def feasible(self) -> bool:
+        return self.status in ("OPTIMAL", "FEASIBLE")
+
+    @property
+    def outcome(self) -> str:
+        """infeasible（矛盾あり）/ feasible（制約は満たせる）/ unknown（diagnose_seconds 内に判定できなかった）"""
+        return "infeasible" if self.infeasible else "feasible" if self.feasible else "unknown"
+
+
+def describe(inst: Instance, label: tuple) -> str:
+    """制約の族を人が読める1行にする"""
+    kind, *rest = label
+    if kind == "event":
+        team, d = rest
+        blocks = [f"{tstr(s)}-{tstr(e)}" for t, dd, s, e in inst.event_slots if t == team and dd.isoformat() == d]
+        return f"イベント: {team} {d} {', '.join(blocks)}"
+    if kind == "cover":
+        (d,) = rest
+        return f"カバー: {d}（MIN_SLOTS={inst.min_slots} 連続が作れる時刻は必ずどこかの団体が使う）"
+    if kind == "day_rules":
+        (d,) = rest
+        return f"日内公平性: {d}（同じ日の利用時間差 ≤ 30分・先に始める団体ほど短い）"
+    return ":".join(map(str, label))
+
+
+def _check(am, lits: list, time_limit: float) -> tuple[int, cp_model.CpSolver]:
+    """lits を仮定にして解く（仮定にしない族は外したのと同じ）"""
+    am.model.ClearAssumptions()
+    am.model.AddAssumptions(lits)
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max(time_limit, 0.0)
+    # 仮定の核を取り出すには presolve を切った1スレッドで解く
+    solver.parameters.num_workers = 1
+    solver.parameters.cp_model_presolve = False
+    return solver.Solve(am.model), solver
+
+
+def diagnose_infeasibility(inst: Instance, options: ModelOptions | None = None, time_limit: float = 10.0) -> InfeasibilityReport:
+    """
+    制約だけのモデルで矛盾の原因を調べる。
+    FEASIBLE なら「制約は満たせる（時間が足りない・目的が難しい）」ということ。
+    time_limit 内に判定できなければ UNKNOWN のまま返す（どちらとも言えない）。
+    """
+    t0 = time.perf_counter()
+    am = build_guarded_model(inst, options)
+    lit_of = dict(am.assumptions)
+    label_of = {lit.Index(): label for label, lit in lit_of.items()}
+
+    def remaining() -> float:
+        return time_limit - (time.perf_counter() - t0)
+
+    status, solver = _check(am, list(lit_of.values()), remaining())
+    report = InfeasibilityReport(status=solver.StatusName(status), checks=1)
+    if status != cp_model.INFEASIBLE:
+        report.wall_time = round(time.perf_counter() - t0, 3)
+        return report
+
+    # 1つずつ外して、まだ INFEASIBLE なら外したままにする（残ったものは1つでも外すと解ける）
+    core = [label_of[i] for i in solver.SufficientAssumptionsForInfeasibility()]
+    minimal = True
+    i = 0
+    while i < len(core):
+        if remaining() <= 0:
+            minimal = False
+            break
+        trial = core[:i] + core[i + 1:]
+        st, _ = _check(am, [lit_of[k] for k in trial], remaining())
+        report.checks += 1
+        if st == cp_model.INFEASIBLE:
+            core = trial
+            continue
+        if st not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            minimal = False  # 時間切れで判定できなかった族は残しておく
+        i += 1
+
+    report.core = sorted(core)
+    report.minimal = minimal
+    report.wall_time = round(time.perf_counter() - t0, 3)
+    return report
+
+
+def log_report(inst: Instance, report: InfeasibilityReport) -> None:
+    if report.feasible:
+        logger.info("diagnose: 制約だけなら %s（矛盾はありません。時間を延ばすか早期終了の条件を見直してください）", report.status)
+        return
+    if not report.infeasible:
+        logger.info("diagnose: 制約だけでも %.2fs で判定できませんでした（%s。diagnose_seconds を延ばしてください）",
+                    report.wall_time, report.status)
+        return
+    logger.info("diagnose: 矛盾する制約 %d 件%s（%d 回 Solve, %.2fs）:",
+                len(report.core), "" if report.minimal else "（極小化は時間切れ）", report.checks, report.wall_time)
+    for label in report.core:
+        logger.info("  - %s", describe(inst, label))
+
+
+def save_report_json(inst: Instance, report: InfeasibilityReport, path: Path) -> None:
+    data = {
+        "run_tag": inst.run_tag,
+        "status": report.status,
+        "outcome": report.outcome,
+        "minimal": report.minimal,
+        "checks": report.checks,
+        "wall_time": report.wall_time,
+        "core": [{"kind": label[0], "key": list(label[1:]), "text": describe(inst, label)} for label in report.core],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
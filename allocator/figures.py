@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+# ============================================================
+# 画像（PNG / PDF）の出力
+#   matplotlib を使うのはこのモジュールだけ。render() が画像を出すときに初めて import するので、
+#   --no-gantt（画像なし）の実行では matplotlib もフォント設定も読み込まない。
+# ============================================================
+from pathlib import Path
+
+import matplotlib as mpl
+mpl.use("Agg")  # ファイル保存専用（Streamlit のスレッドからも安全に描画できる）
+import matplotlib.pyplot as plt
+from matplotlib import patches
+
+from allocator.instance import Instance, tstr
+from allocator.render import (
+    AUTO_PALETTE,
+    JP_WD,
+    MONTHLY_SUMMARY_COLUMNS,
+    TEAM_COLORS,
+    _calendar_team_color,
+    _team_color,
+    build_day_blocks,
+    dow_jp,
+)
+from allocator.solution import Solution, day_blocks
+
+mpl.rcParams["font.family"] = "Noto Sans CJK JP" #フォントを"Noto Sans CJK JP"に固定
+mpl.rcParams["axes.unicode_minus"] = False  #-（マイナス）の文字化け防止
+
+
+def _save(fig, out_png: Path | None, out_pdf: Path | None, dpi: int = 200) -> None:
+    """PNG / PDF のうちパスが渡されたほうだけ保存して閉じる（片方だけ作り直すとき: allocator.rerender）"""
+    if out_png is not None:
+        fig.savefig(out_png, dpi=dpi, bbox_inches="tight")
+    if out_pdf is not None:
+        fig.savefig(out_pdf, bbox_inches="tight")
+    plt.close(fig)
+
+
+# ============================================================
+# 画像保存：テキスト（Objective Breakdown）
+# ============================================================
+def save_text_image(lines: list[str], out_png: Path | None, out_pdf: Path | None, title: str = ""):
+    # 行数に応じて高さを調整（A4以上）
+    n = len(lines)
+    fig_w = 8.27  # A4 width
+    fig_h = max(11.69, 0.28 * n)  # 行数で伸びる（転記用リストと同じ思想）
+
+    fig, ax = plt.subplots(figsize=(fig_w, fig_h))
+    ax.axis("off")
+
+    y = 0.98
+    dy = 0.98 / max(n, 1)
+
+    for s in lines:
+        if s.startswith("====") or s.startswith("----"):
+            ax.text(0.03, y, s, va="top", ha="left", fontsize=10, color="#222222")
+        elif s.startswith("("):
+            ax.text(0.03, y, s, va="top", ha="left", fontsize=11, color="#222222")
+        elif s.strip() == "":
+            pass
+        else:
+            ax.text(0.03, y, s, va="top", ha="left", fontsize=12, fontweight="bold", color="#222222")
+        y -= dy
+
+    _save(fig, out_png, out_pdf)
+
+
+def save_group_schedule_image(draw_rows: list[dict], out_png: Path | None, out_pdf: Path | None) -> None:
+    # 行数に応じて高さを調整（A4以上）
+    n = len(draw_rows)
+    fig_w = 8.27  # A4 width
+    fig_h = max(11.69, 0.26 * n)  # 行数で伸びる
+
+    fig, ax = plt.subplots(figsize=(fig_w, fig_h))
+    ax.axis("off")
+
+    # 上から等間隔に描画
+    y = 0.98
+    dy = 0.98 / max(n, 1)
+
+    for r in draw_rows:
+        kind = r["kind"]
+        text = r["text"]
+
+        if kind in ("title", "title2"):
+            ax.text(0.03, y, text, va="top", ha="left", fontsize=13, fontweight="bold", color="#222222")
+        elif kind == "sep":
+            ax.text(0.03, y, text, va="top", ha="left", fontsize=11, color="#222222")
+        elif kind == "sep2":
+            ax.text(0.03, y, text, va="top", ha="left", fontsize=10, color="#222222")
+        elif kind == "blank":
+            # 何も書かずに行送り
+            pass
+        elif kind == "header1":
+            team = r.get("team", "")
+            # headerの中で団体名だけ色にするため、2回描画する
+            prefix = "■ "
+            ax.text(0.03, y, prefix, va="top", ha="left", fontsize=12, fontweight="bold", color="#222222")
+
+            # 団体名
+            ax.text(0.06, y, team, va="top", ha="left", fontsize=12, fontweight="bold", color=_team_color(team))
+        elif kind == "header2":
+            ax.text(0.06, y, r["text"], va="top", ha="left", fontsize=11, fontweight="bold", color="#222222")
+        elif kind == "line":
+            ax.text(0.03, y, text, va="top", ha="left", fontsize=11, color="#222222")
+
+        y -= dy
+
+    _save(fig, out_png, out_pdf)
+    for path in (out_png, out_pdf):
+        if path is not None:
+            print(f"[INFO] group schedule saved: {path}")
+
+
+# ============================================================
+# ② ガントチャート
+# ============================================================
+def build_color_map(groups, fixed_colors, palette):
+    colors = dict(fixed_colors)
+    used_colors = set(colors.values())
+
+    palette_iter = iter(c for c in palette if c not in used_colors)
+
+    for g in groups:
+        if g not in colors:
+            try:
+                colors[g] = next(palette_iter)
+            except StopIteration:
+                # パレットが尽きたら matplotlib に任せる
+                colors[g] = None
+    return colors
+
+
+def save_gantt(inst: Instance, sol: Solution, out_png: Path | None, out_pdf: Path | None) -> None:
+    pref_zero_days = inst.pref_zero_days()
+
+    # ---- 解の連続ブロック (日, 団体, 開始分, 終了分) ----
+    gantt_rows = [
+        (d, team, s, e)
+        for d in inst.days if d not in pref_zero_days
+        for team, s, e in day_blocks(inst, sol, d)
+    ]
+
+    # ============================================================
+    # 団体 → 色 の最終マップを作る
+    # ============================================================
+    groups = list(dict.fromkeys(team for _, team, _, _ in gantt_rows))  # 出てきた順
+
+    colors = build_color_map(
+        groups=groups,
+        fixed_colors=TEAM_COLORS,
+        palette=AUTO_PALETTE
+    )
+
+    # ============================================================
+    # ガントチャート描画
+    # ============================================================
+    fig, ax = plt.subplots(figsize=(15, 10))
+    dates = sorted({d for d, _, _, _ in gantt_rows})
+
+    for i, d in enumerate(dates):
+        for _, team, s, e in (r for r in gantt_rows if r[0] == d):
+            ax.barh(
+                i,
+                e - s,
+                left=s,
+                height=0.6,
+                color=colors[team],   # ← None なら自動色
+                edgecolor="#555",
+                linewidth=1.0
+            )
+
+            ax.text(
+                (s + e) / 2,
+                i,
+                team,
+                ha="center",
+                va="center",
+                fontsize=10,
+                weight="bold"
+            )
+
+    # ============================================================
+    # 軸・装飾
+    # ============================================================
+    ax.set_yticks(range(len(dates)))
+    ax.set_yticklabels([f"{d.strftime('%Y/%m/%d')}({JP_WD[d.weekday()]})" for d in dates])
+
+    ax.set_xlim(8 * 60, 21 * 60)
+    ax.set_xticks(range(8 * 60, 22 * 60, 60))
+    ax.set_xticklabels([f"{h}:00" for h in range(8, 22)])
+
+    ax.grid(axis="x", linestyle="--", alpha=0.6)
+    ax.invert_yaxis()
+
+    ax.set_title(f"{inst.run_tag} 体育館利用スケジュール（CP-SAT）")
+
+    # ============================================================
+    # 凡例（固定色＋自動色すべて表示）
+    # ============================================================
+    legend_handles = [
+        plt.Rectangle((0, 0), 1, 1, color=colors[g])
+        for g in groups
+    ]
+
+    ax.legend(
+        legend_handles,
+        groups,
+        title="団体名",
+        bbox_to_anchor=(1.02, 1),
+        loc="upper left"
+    )
+
+    plt.tight_layout()
+
+    # ★保存（outputフォルダへ）
+    _save(plt.gcf(), out_png, out_pdf, dpi=300)
+
+
+# ============================================================
+# 月合計・時間帯合計の表画像
+# ============================================================
+def save_monthly_summary_image(summary_rows: list[dict], out_png: Path) -> None:
+    # ---- monthly_summary を表画像として保存 ----
+    fig, ax = plt.subplots(figsize=(12, 0.6 * (len(summary_rows) + 2)))
+    ax.axis("off")
+
+    tbl = ax.table(
+        cellText=[[r[c] for c in MONTHLY_SUMMARY_COLUMNS] for r in summary_rows],
+        colLabels=MONTHLY_SUMMARY_COLUMNS,
+        loc="center",
+        cellLoc="center"
+    )
+    tbl.auto_set_font_size(False)
+    tbl.set_fontsize(10)
+    tbl.scale(1, 1.4)
+
+    # ==============================
+    # ★ ヘッダ行（1行目）だけ高さを増やす
+    # ==============================
+    ncols = len(MONTHLY_SUMMARY_COLUMNS)
+
+    # いまのヘッダセルの高さを取得
+    base_h = tbl[(0, 0)].get_height()
+
+    # 行間を２倍くらいが見やすい
+    header_h = base_h * 2
+
+    for c in range(ncols):
+        tbl[(0, c)].set_height(header_h)
+        # ついでに中央揃え
+        tbl[(0, c)].set_text_props(va="center", ha="center", weight="bold")
+
+    plt.tight_layout()
+    plt.savefig(out_png, dpi=300, bbox_inches="tight")
+    plt.close()
+
+
+# ------------------------------------------------------------
+# 画像（PNG/PDF）生成：枠を描いてテキストを配置（色付き・潰れにくい）
+# ------------------------------------------------------------
+def save_calendar_image(inst: Instance, sol: Solution, weeks, out_png: Path | None, out_pdf: Path | None, title: str):
+    pref_zero_days = inst.pref_zero_days()
+    YEAR, MONTH = inst.year, inst.month
+
+    # レイアウト設定
+    nrows = len(weeks)            # 週数（だいたい5〜6）
+    ncols = 7
+
+    # 1セルのサイズ感（インチ換算）
+    cell_w = 3.0
+    cell_h = 2.0
+    header_h = 0.55
+    title_h = 0.6
+    pad = 0.2
+
+    fig_w = ncols * cell_w + 2 * pad
+    fig_h = nrows * cell_h + header_h + title_h + 2 * pad
+
+    fig = plt.figure(figsize=(fig_w, fig_h))
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_xlim(0, ncols)
+    ax.set_ylim(0, nrows + (header_h + title_h) / cell_h)  # ざっくり上に余白
+    ax.axis("off")
+
+    # タイトル
+    ax.text(
+        0, nrows + header_h / cell_h + 0.25,
+        f"{title}（{YEAR}年{MONTH}月）",
+        fontsize=40, fontweight="bold", va="bottom", ha="left", color="#222"
+    )
+    ax.text(
+        ncols, nrows + header_h / cell_h + 0.25,
+        "★ はイベント確定枠",
+        fontsize=30, va="bottom", ha="right", color="#666"
+    )
+
+    # 曜日ヘッダ（背景色：土日だけ少し変える）
+    y_header = nrows
+    for c in range(ncols):
+        rect = patches.Rectangle((c, y_header), 1, header_h / cell_h,
+                                 fill=True, linewidth=1.0, edgecolor="#999")
+        if c == 5:      # 土
+            rect.set_facecolor("#E8F1FF")  # 薄い青
+        elif c == 6:    # 日
+            rect.set_facecolor("#FFECEC")  # 薄い赤
+        else:
+            rect.set_facecolor("#F0F0F0")
+        ax.add_patch(rect)
+
+        ax.text(
+            c + 0.5, y_header + (header_h / cell_h) / 2, dow_jp[c],
+            ha="center", va="center", fontsize=20, fontweight="bold", color="#222"
+        )
+
+    # セル描画
+    for r, week in enumerate(weeks):
+        y = (nrows - 1 - r)  # 上から表示
+        for c, d in enumerate(week):
+            # 背景色：土日だけ薄く変更（対象月外はさらに薄く）
+            is_other_month = (d.month != MONTH)
+            if is_other_month:
+                face = "#FAFAFA"
+            else:
+                if c == 5:      # 土
+                    face = "#F3F8FF"  # 薄い青
+                elif c == 6:    # 日
+                    face = "#FFF5F5"  # 薄い赤
+                else:
+                    face = "#FFFFFF"
+
+            rect = patches.Rectangle((c, y), 1, 1, fill=True, linewidth=1.0, edgecolor="#999")
+            rect.set_facecolor(face)
+            ax.add_patch(rect)
+
+            if is_other_month:
+                continue
+
+            # 日付
+            ax.text(c + 0.03, y + 0.97, str(d.day),
+                    ha="left", va="top", fontsize=18, fontweight="bold", color="#333")
+
+            blocks = build_day_blocks(inst, sol, d, pref_zero_days)
+
+            # special
+            if blocks and "special" in blocks[0]:
+                ax.text(c + 0.03, y + 0.83, blocks[0]["special"],
+                        ha="left", va="top", fontsize=18, color="#777")
+                continue
+
+            # 通常ブロック（1行固定・省略なし）
+            line_y = y + 0.83
+            line_step = 0.12
+            max_lines = 6  # ここは「見た目が崩れない」上限（必要なら増やせる）
+
+            lines = []
+            for b in blocks:
+                team = b["team"]
+                mark = "★" if b["is_event"] else ""
+                lines.append((f"{tstr(b['s'])}-{tstr(b['e'])} {mark}{team}", _calendar_team_color(team)))
+
+            # 行数が多すぎる場合は、上限以降は表示しない（文字列は切らない）
+            lines = lines[:max_lines]
+
+            for text, color in lines:
+                ax.text(
+                    c + 0.03, line_y, text,
+                    ha="left", va="top",
+                    fontsize=13,
+                    color=color,
+                    clip_on=True           # ★セル外へはみ出す場合は描画領域でクリップ
+                )
+                line_y -= line_step
+
+    # 保存
+    _save(fig, out_png, out_pdf)
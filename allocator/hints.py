@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+# ============================================================
+# 前回の解を CP-SAT のヒント（AddHint）として使う（ウォームスタート）
+#  - solution_YYYY-MM.json（solve のたびに保存）を優先して読む
+#  - 無ければ schedule_by_team_YYYY-MM.csv（配布用CSV）から復元する
+# ============================================================
+import csv
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+from allocator.instance import Instance, tm
+from allocator.model import AllocModel
+from allocator.solution import Solution
+
+logger = logging.getLogger("kasuga_gym")
+
+_TIME_RANGE_RE = re.compile(r"^\s*(\d{1,2}:\d{2})\s*[–\-]\s*(\d{1,2}:\d{2})\s*$")
+
+
+@dataclass
+class HintReport:
+    source: Path | None = None
+    hint_slots: int = 0       # 読み込んだ割当スロット数
+    mapped_slots: int = 0     # 新しい月の団体・スロットに対応する割当
+    feasible_slots: int = 0   # そのうち希望日/イベント日として今も有効な割当
+    hinted_vars: int = 0      # AddHint した変数の数
+    hint_x: dict[tuple, int] = field(default_factory=dict)
+
+    @property
+    def survived_ratio(self) -> float:
+        return self.feasible_slots / self.hint_slots if self.hint_slots else 0.0
+
+
+def default_hint_path(out_run_dir: Path, run_tag: str) -> Path | None:
+    """--hint auto のときに使うファイル（見つからなければ None）"""
+    for p in [
+        out_run_dir / f"solution_{run_tag}.json",
+        out_run_dir / f"schedule_by_team_{run_tag}.csv",
+    ]:
+        if p.exists():
+            return p
+    return None
+
+
+def _blocks_to_slots(blocks, slot: int) -> set[tuple[str, date, int]]:
+    out = set()
+    for team, d, s, e in blocks:
+        for t in range(s, e, slot):
+            out.add((team, d, t))
+    return out
+
+
+def read_hint_slots(path: Path, slot: int) -> set[tuple[str, date, int]]:
+    """前回の解を (team, day, time) の集合として読む"""
+    if path.suffix.lower() == ".json":
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        blocks = [
+            (b["team"], date.fromisoformat(b["date"]), tm(b["start"]), tm(b["end"]))
+            for b in raw.get("blocks", [])
+        ]
+        return _blocks_to_slots(blocks, slot)
+
+    blocks = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            m = _TIME_RANGE_RE.match(row.get("Time", ""))
+            if not m:
+                continue
+            try:
+                d = date.fromisoformat(row["Date"])
+            except (KeyError, ValueError):
+                continue
+            blocks.append((row["Team"], d, tm(m.group(1)), tm(m.group(2))))
+    return _blocks_to_slots(blocks, slot)
+
+
+def hint_assignment(am: AllocModel, inst: Instance, values: dict[tuple[str, date, int], int]) -> int:
+    """
+    (団体, 日, 時刻) -> 0/1 の割当をモデルの変数に AddHint する（x、または interval 版の区間）。
+    戻り値はヒントを入れた変数の数。
+    """
+    model = am.model
+    n = 0
+    for key, var in am.x.items():
+        model.AddHint(var, values.get(key, 0))
+        n += 1
+
+    for (team, d), u in am.U.items():
+        used = [t for t in inst.slots_by_day[d] if values.get((team, d, t), 0)]
+        model.AddHint(u, len(used))
+        model.AddHint(am.y[(team, d)], 1 if used else 0)
+        n += 2
+        if am.options.block == "interval" and (team, d) in am.start_time:
+            model.AddHint(am.start_time[(team, d)], used[0] if used else 0)
+            n += 1
+    return n
+
+
+def add_solution_hint(am: AllocModel, inst: Instance, path: Path) -> HintReport:
+    """
+    前回の解を新しいモデルの x / U / y に AddHint する。
+    希望日が変わった団体などは、その分だけヒントが「生き残らない」。
+    """
+    assigned = read_hint_slots(path, inst.slot)
+    report = HintReport(source=path, hint_slots=len(assigned))
+
+    event_days_by_team = inst.event_days_by_team
+    for team, d, t in assigned:
+        if team not in inst.teams or t not in inst.slots_by_day.get(d, ()):
+            continue
+        report.mapped_slots += 1
+        if d in inst.pref_days.get(team, set()) or (team, d) in event_days_by_team:
+            report.feasible_slots += 1
+
+    report.hint_x = {
+        (team, d, t): 1 if (team, d, t) in assigned else 0
+        for d in inst.days for team in am.teams_on[d] for t in inst.slots_by_day[d]
+    }
+    report.hinted_vars = hint_assignment(am, inst, report.hint_x)
+
+    logger.info(
+        "hint=%s slots=%d mapped=%d survived=%d (%.1f%%)",
+        path, report.hint_slots, report.mapped_slots, report.feasible_slots, 100 * report.survived_ratio,
+    )
+    return report
+
+
+def hint_agreement(report: HintReport, sol: Solution) -> float:
+    """解の x がヒントと一致した割合（0〜1）"""
+    if not report.hint_x:
+        return 0.0
+    same = sum(1 for k, v in report.hint_x.items() if sol.x.get(k) == v)
+    return same / len(report.hint_x)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+# ============================================================
+# 途中の解（incumbent）を逐次ファイルに書き出す
+#   Solve は max_solve_seconds まで戻ってこないので、改善解が見つかるたびに
+#   output/YYYY-MM/incumbent_YYYY-MM.json を上書きする。
+#   形式は solution_YYYY-MM.json と同じ blocks を持つので、そのままヒントにも使える。
+# ============================================================
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from allocator.instance import Instance, tstr
+from allocator.model import AllocModel
+from allocator.solution import assignment_values
+from allocator.solve import SearchMonitor, StopRules
+
+logger = logging.getLogger("kasuga_gym")
+
+
+def default_incumbent_path(out_run_dir: Path, run_tag: str) -> Path:
+    return out_run_dir / f"incumbent_{run_tag}.json"
+
+
+def _assignment_blocks(inst: Instance, values: dict[tuple, int]) -> list[dict]:
+    """x の値を (団体, 日) ごとの連続ブロックにする（ブロックは1日1つなので最小〜最大で足りる）"""
+    span: dict[tuple, list[int]] = {}
+    for (team, d, t), v in values.items():
+        if not v:
+            continue
+        s_e = span.setdefault((team, d), [t, t])
+        s_e[0], s_e[1] = min(s_e[0], t), max(s_e[1], t)
+    return [
+        {"team": team, "date": d.isoformat(), "start": tstr(s), "end": tstr(e + inst.slot)}
+        for (team, d), (s, e) in sorted(span.items(), key=lambda kv: (kv[0][1], kv[1][0]))
+    ]
+
+
+def _write_atomic(path: Path, data: dict) -> None:
+    """読み手（結果ページ）が書きかけのファイルを見ないように、別名で書いてから置き換える"""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+class IncumbentWriter(SearchMonitor):
+    """
+    改善解が見つかるたびに、目的値・上界・経過時間と割当（blocks）を1つの JSON に上書きする。
+    history には見つかった解の (目的値, 上界, 経過時間) を順に残す（割当は最新のみ）。
+    辞書式に解くときは stage に今の段の名前を入れる（objective はその段の値になる）。
+    """
+
+    def __init__(self, inst: Instance, am: AllocModel, path: Path, rules: StopRules | None = None):
+        super().__init__(rules)
+        self.inst = inst
+        self.am = am
+        self.path = path
+        self.stage: str | None = None
+        self.history: list[dict] = []
+        self._last_blocks: list[dict] = []
+        self._final = False
+        self._t0 = time.perf_counter()
+
+    def on_incumbent(self) -> None:
+        entry = {
+            "stage": self.stage,
+            "objective": self.ObjectiveValue(),
+            "bound": self.BestObjectiveBound(),
+            "wall_time": round(time.perf_counter() - self._t0, 3),
+        }
+        self.history.append(entry)
+        self._last_blocks = _assignment_blocks(self.inst, assignment_values(self.inst, self.am, self))
+        self._write(status="RUNNING", **entry)
+
+    def finish(self, status_name: str) -> None:
+        """Solve が終わったら最終状態を書く（解が1つも無ければファイルは作らない）"""
+        if not self.count:
+            return
+        last = self.history[-1]
+        self._write(status=status_name, final=True, **last)
+        self._final = True
+        logger.info("incumbents: %d solutions -> %s", self.count, self.path)
+
+    def discard(self) -> None:
+        """
+        finish まで行かずに止まったとき（例外・Ctrl+C）に呼ぶ。final: false のファイルが残ると
+        結果ページが「計算中です」のままになるので消す。finish 済みなら何もしない。
+        """
+        if self._final:
+            return
+        self.path.unlink(missing_ok=True)
+        self.path.with_name(self.path.name + ".tmp").unlink(missing_ok=True)
+
+    def _write(self, status: str, final: bool = False, **entry) -> None:
+        _write_atomic(self.path, {
+            "run_tag": self.inst.run_tag,
+            "slot": self.inst.slot,
+            "status": status,
+            "final": final,
+            "solutions": self.count,
+            **entry,
+            "history": self.history,
+            "blocks": self._last_blocks,
+        })
@@ -0,0 +1,502 @@
+from __future__ import annotations
+
+# ============================================================
+# 入力データ（config.yaml / preferences.json / events.json）の読み込みと検証
+# ============================================================
+import calendar #年月日の計算のため
+import json #preferences.json,events.jsonの読み込むため
+import shutil #ファイルのコピーのため
+from dataclasses import dataclass, field, replace
+from datetime import date #年月日の計算のため
+from pathlib import Path #パス操作を安全にするため
+from typing import Any
+
+import yaml #config.yamlを読み込むため
+
+from allocator.metrics import RunMetrics
+
+
+# ============================================================
+# 時刻ユーティリティ
+# ============================================================
+def tm(s): #時間データを分に変換（時間＊６０＋分）
+    h, m = map(int, s.split(":"))
+    return h * 60 + m
+
+def tstr(t): #分データを時間に変換（分/60の商：分/60の余り）
+    return f"{t//60:02d}:{t%60:02d}"
+
+
+# ============================================================
+# スロットの長さ（分）
+# config.yaml の slot で選ぶ。min_slots は従来どおり 30分スロットの数として読む
+# ============================================================
+SLOT_CHOICES = (15, 30, 60)
+BASE_SLOT = 30
+
+
+# ============================================================
+# 時間帯区分
+# ============================================================
+def is_morning(t): return 510 <= t < 660  #朝の定義（８：３０～１１：００）
+def is_daytime(t): return 660 <= t < 900  #昼の定義（１１：００～１５：００）
+def is_evening(t): return 900 <= t < 1080 #夕方の定義（１５：００～１８：００）
+def is_night(t):   return 1080 <= t < 1260#夜の定義（１８：００～２１：００）
+
+ZONES = {
+    "morning": is_morning,
+    "daytime": is_daytime,
+    "evening": is_evening,
+    "night": is_night,
+}
+
+#朝のペナルティ
+def morning_penalty(t):
+    if not is_morning(t): return 0 #朝以外ペナルティなし
+    if t < 570: return 7           #ペナルティ７（８：３０～９：３０）
+    if t < 600: return 4           #ペナルティ４（９：３０～１０：００）
+    return 2                       #ペナルティ２（１０：００～１１：００）
+
+
+# ============================================================
+# 1か月分の問題インスタンス
+# ============================================================
+@dataclass
+class Instance:
+    """
+    検証済みの入力一式（モデル構築・描画はすべてこれを参照する）。
+    pickle 可能な値だけを持つので、別プロセスにも渡せる。
+    """
+    year: int
+    month: int
+    slot: int
+    min_slots: int
+    max_solve_seconds: int
+    days: list[date]
+    teams: list[str]
+    slots_by_day: dict[date, list[int]]
+    pref_days: dict[str, set[date]]
+    event_slots: list[tuple[str, date, int, int]]
+    unusable_days: list[date] = field(default_factory=list)
+    full_event_days: set[date] = field(default_factory=set)
+    pref_count: dict[str, int] = field(default_factory=dict)
+    config: dict[str, Any] = field(default_factory=dict)
+    config_path: Path | None = None
+    pref_path: Path | None = None
+    event_path: Path | None = None
+
+    @property
+    def run_tag(self) -> str:
+        return f"{self.year:04d}-{self.month:02d}"   # 例: "2026-01"
+
+    @property
+    def last_day(self) -> int:
+        return len(self.days)
+
+    @property
+    def event_days_by_team(self) -> set[tuple[str, date]]:
+        return {(team, d) for team, d, _, _ in self.event_slots}   #イベント日と団体名のデータ
+
+    @property
+    def event_calendar_days(self) -> set[date]:
+        return {d for _, d, _, _ in self.event_slots}             #イベント日のデータ
+
+    def event_teams_on(self, d: date) -> set[str]:
+        return {team for team, dd, _, _ in self.event_slots if dd == d}
+
+    def non_event_pref_teams(self, d: date) -> list[str]:
+        """イベント日に、イベント以外でその日を希望している団体"""
+        event_teams_today = self.event_teams_on(d)
+        return [
+            t for t in self.teams
+            if t not in event_teams_today and d in self.pref_days.get(t, set())
+        ]
+
+    def eligible_teams(self, d: date) -> list[str]:
+        """その日に割り当てうる団体（その日を希望している団体＋その日にイベントがある団体）"""
+        event_teams_today = self.event_teams_on(d)
+        return [
+            t for t in self.teams
+            if t in event_teams_today or d in self.pref_days.get(t, set())
+        ]
+
+    def interchangeable_teams(self) -> list[list[str]]:
+        """
+        入れ替えてもモデルが変わらない団体のグループ（2団体以上のものだけ、団体名順）。
+        希望日・イベント・公平性の重み（希望できる日数）がすべて同じ団体は、割当を入れ替えても同じ目的値になる。
+        """
+        classes: dict[tuple, list[str]] = {}
+        for t in self.teams:
+            key = (
+                frozenset(self.pref_days.get(t, set())),
+                frozenset((d, s, e) for team, d, s, e in self.event_slots if team == t),
+                self.pref_count.get(t, 0),
+            )
+            classes.setdefault(key, []).append(t)
+        return [sorted(group) for group in classes.values() if len(group) >= 2]
+
+    def restricted_to(self, days: list[date]) -> "Instance":
+        """指定した日だけを含む部分インスタンス（日ごとの分割求解用）"""
+        keep = set(days)
+        return replace(
+            self,
+            days=list(days),
+            slots_by_day={d: self.slots_by_day[d] for d in days},
+            event_slots=[ev for ev in self.event_slots if ev[1] in keep],
+            full_event_days={d for d in self.full_event_days if d in keep},
+        )
+
+    def pref_zero_days(self) -> set[date]:
+        """希望団体0日（イベント日を除外）"""
+        out = set()
+        for d in self.days:
+            if d in self.event_calendar_days: #イベントがあるならスキップ
+                continue
+            # 「希望している団体」が 1つもない日
+            if not any(d in self.pref_days.get(t, set()) for t in self.teams):
+                out.add(d)
+        return out
+
+
+def prop_teams_of(inst: Instance) -> list[str]:
+    return [t for t in inst.teams if inst.pref_count.get(t, 0) > 0]  # 分母0は除外
+
+
+# ============================================================
+# 読み込み
+# ============================================================
+def load_config(config_path: Path) -> dict[str, Any]:
+    with open(config_path, "r", encoding="utf-8") as f: #config.yaml(設定ファイル)の読み込み
+        return yaml.safe_load(f)
+
+
+def snapshot_paths(out_run_dir: Path) -> tuple[Path, Path, Path]:
+    """save_run_snapshot が保存する (config, preferences, events) のパス"""
+    return (
+        out_run_dir / "config_used.yaml",
+        out_run_dir / "preferences_used.json",
+        out_run_dir / "events_used.json",
+    )
+
+
+def save_run_snapshot(out_run_dir: Path, config_path: Path, pref_path: Path, event_path: Path): #使用した入力データと設定データのコピーを保存する
+    """
+    実行時の入力・設定を output/YYYY-MM/ に保存して証跡を残す。
+    """
+    out_run_dir.mkdir(parents=True, exist_ok=True) #出力先フォルダがなければ作る
+
+    config_used, pref_used, event_used = snapshot_paths(out_run_dir)
+    shutil.copy2(config_path, config_used) #コピーを作る
+    shutil.copy2(pref_path, pref_used)
+    shutil.copy2(event_path, event_used)
+
+    print(f"[INFO] Snapshot saved -> {out_run_dir}")
+
+
+def has_min_consecutive_block(slots, MIN_SLOTS, slot): #利用可能時間が最低スロット数（３）ない日を削除
+    if len(slots) < MIN_SLOTS:
+        return False
+    sset = set(slots)
+    for s in slots:
+        if all((s + k*slot) in sset for k in range(MIN_SLOTS)):
+            return True
+    return False
+
+
+def build_slots(d, availability, MIN_SLOTS, slot, unusable_days_by_minblock):     #利用可能時間を取り出す
+    st, en, rs, re = availability[d.day] #(st:開始時間、en:終了時間、rs:制限開始時間、re:制限開始時間)
+    if st is None:     #体育館を使えない日は空のリスト
+        return []
+
+    # 利用可能時間をスロット化（スロットは slot の倍数の時刻から始まり、終了時間を越えない）
+    first = -(-tm(st) // slot) * slot
+    slots = list(range(first, tm(en) - slot + 1, slot))
+
+    if rs and re:       #使えない時間帯の除外
+        rs_m, re_m = tm(rs), tm(re)
+        slots = [t for t in slots if not (t < re_m and t + slot > rs_m)] #利用禁止時間にかからないスロットだけ残す
+
+    # ★ MIN_SLOTS連続が作れない日は「利用不可」にする
+    if not has_min_consecutive_block(slots, MIN_SLOTS, slot):
+        unusable_days_by_minblock.append(d)   # ← 日付を記録
+        return []
+
+    return slots
+
+
+def validate_inputs(pref_days, events_raw, days, slots_by_day, slot, YEAR, MONTH):
+    """
+    入力チェックを行い、問題があるイベントは「無かったことにして」除外する。
+    また、希望日も対象月外や利用不可日を除外する（警告表示）。
+    """
+    valid_day_set = set(days)
+
+    # ----------------------------
+    # 希望日のバリデーション
+    # ----------------------------
+    cleaned_pref_days = {}
+    pref_removed = []
+
+    for team, ds in pref_days.items():
+        keep = set()
+        for d in ds:
+            # 対象月外
+            if d not in valid_day_set:
+                pref_removed.append((team, d, "対象月外"))
+                continue
+            keep.add(d)
+        cleaned_pref_days[team] = keep
+
+    if pref_removed:
+        print("\n[WARN] 希望日から除外した日付があります（入力ミス/利用不可）:")
+        for team, d, reason in pref_removed:
+            print(f"  - {team}: {d.isoformat()} -> 除外（{reason}）")
+
+    # ----------------------------
+    # イベントのバリデーション
+    # ----------------------------
+    valid_event_slots = []
+    skipped = []
+
+    for i, ev in enumerate(events_raw, start=1):
+        # 必須キー
+        for k in ["team", "date", "start", "duration_hours"]:
+            if k not in ev:
+                skipped.append((i, ev.get("team", "?"), ev.get("date", "?"), ev.get("start", "?"),
+                               ev.get("duration_hours", "?"), f"必須キー {k} がありません"))
+                break
+        else:
+            team = str(ev["team"])
+            try:
+                d = date.fromisoformat(ev["date"])
+            except Exception:
+                skipped.append((i, team, ev.get("date"), ev.get("start"), ev.get("duration_hours"),
+                                "date が ISO形式(YYYY-MM-DD)ではありません"))
+                continue
+
+            # 対象月外
+            if d not in valid_day_set:
+                skipped.append((i, team, d.isoformat(), ev.get("start"), ev.get("duration_hours"),
+                                "対象月外のイベント"))
+                continue
+
+            # その日が利用不可（スロットが空）
+            if not slots_by_day.get(d):
+                skipped.append((i, team, d.isoformat(), ev.get("start"), ev.get("duration_hours"),
+                                "その日は利用可能スロットがありません"))
+                continue
+
+            # 時刻と長さ
+            try:
+                s = tm(ev["start"])
+            except Exception:
+                skipped.append((i, team, d.isoformat(), ev.get("start"), ev.get("duration_hours"),
+                                "start が HH:MM 形式ではありません"))
+                continue
+
+            try:
+                dur_h = float(ev["duration_hours"])
+            except Exception:
+                skipped.append((i, team, d.isoformat(), ev.get("start"), ev.get("duration_hours"),
+                                "duration_hours が数値ではありません"))
+                continue
+
+            if dur_h <= 0:
+                skipped.append((i, team, d.isoformat(), ev.get("start"), ev.get("duration_hours"),
+                                "duration_hours が 0 以下です"))
+                continue
+
+            e = s + int(dur_h * 60)
+
+            # スロット境界に揃ってないと range(s,e,slot) が危険
+            if (s % slot) != 0 or (e % slot) != 0:
+                skipped.append((i, team, d.isoformat(), ev.get("start"), ev.get("duration_hours"),
+                                f"スロット境界に揃っていません（slot={slot}分）"))
+                continue
+
+            # 実際にその日のスロットとして存在するか（営業時間外/制限時間帯にかかると欠ける）
+            day_slots_set = set(slots_by_day[d])
+            missing = [t for t in range(s, e, slot) if t not in day_slots_set]
+            if missing:
+                skipped.append((i, team, d.isoformat(), ev.get("start"), ev.get("duration_hours"),
+                                "営業時間外または制限時間帯にかかっています（利用不可スロットあり）"))
+                continue
+
+            # OK
+            valid_event_slots.append((team, d, s, e))
+
+    if skipped:
+        print("\n[WARN] 実行できないイベントを除外しました（無かったことにして続行）:")
+        for (i, team, d, st, dur, reason) in skipped:
+            print(f"  - #{i} {team} のイベント({d} {st}, {dur}h) -> 除外（{reason}）")
+
+    return cleaned_pref_days, valid_event_slots
+
+
+def load_instance(
+    config_path: Path, data_dir: Path, slot: int | None = None, metrics: RunMetrics | None = None,
+    pref_path: Path | None = None, event_path: Path | None = None,
+) -> Instance:
+    """
+    config.yaml と data_dir 配下の preferences.json / events.json を読み込み、
+    検証済みの Instance を返す。
+    pref_path / event_path: 別の名前のファイルを読むとき（スナップショットの preferences_used.json など）。
+    slot: スロットの分数（未指定なら config.yaml の slot、それも無ければ 30）。粗い解を作るときに上書きする。
+    metrics: 渡されたら load.parse / load.slots / load.validate / load.index の時間を記録する。
+    """
+    split = metrics.splits("load") if metrics is not None else (lambda name: None)
+    config = load_config(config_path)
+
+    YEAR = int(config["year"]) #対象年
+    MONTH = int(config["month"]) #対象月
+
+    slot = int(slot or config.get("slot", BASE_SLOT))  #1スロットの分数（15 / 30 / 60）
+    if slot not in SLOT_CHOICES:
+        raise ValueError(f"slot は {SLOT_CHOICES} のいずれか: {slot}")
+    # 最低利用時間。min_slots は 30分スロットの数（従来の書き方）で、min_minutes があればそちらを使う
+    if "min_minutes" in config:
+        min_minutes = int(config["min_minutes"])
+    else:
+        min_minutes = BASE_SLOT * int(config["min_slots"])
+    MIN_SLOTS = -(-min_minutes // slot) #MIN_SLOTS = 3   # 条件① 利用最低時間は1時間30分（端数は切り上げ）
+    MAX_SOLVE_SECONDS = int(config["max_solve_seconds"]) #MAX_SOLVE_SECONDS = 60   #計算に使う時間
+
+    # ============================================================
+    # 日付
+    # ============================================================
+    _, last_day = calendar.monthrange(YEAR, MONTH) #月の最終日を決定
+    days = [date(YEAR, MONTH, d) for d in range(1, last_day + 1)] #年月日データの作成
+
+    # ============================================================
+    # 希望日
+    # ============================================================
+    pref_path = pref_path or data_dir / "preferences.json"
+
+    if not pref_path.exists():
+        raise FileNotFoundError(f"{pref_path.name} not found: {pref_path}")
+
+    with open(pref_path, encoding="utf-8") as f: #希望日データ読み込み
+        pref_raw = json.load(f)
+
+    pref_days = { #文字列をデータに変換
+        team: set(date.fromisoformat(d) for d in ds)
+        for team, ds in pref_raw.items()
+    }
+
+    # ============================================================
+    # イベント
+    # ============================================================
+    event_path = event_path or data_dir / "events.json"
+
+    if not event_path.exists():
+        raise FileNotFoundError(f"{event_path.name} not found: {event_path}")
+
+    with open(event_path, encoding="utf-8") as f: #イベントデータ読み込み
+        events_raw = json.load(f)
+    split("parse")
+
+    # ============================================================
+    # 使用可能時間
+    # ============================================================
+    availability_raw = config["availability"]
+
+    # YAMLのキーは文字列になりやすいので int に変換する
+    availability = {int(k): v for k, v in availability_raw.items()}
+
+    for day in range(1, last_day + 1):
+        if day not in availability:
+            raise ValueError(f"config.yaml の availability に {day} 日がありません")
+
+    # ★ 利用不可にした日（MIN_SLOTS連続が作れない日）をためる
+    unusable_days_by_minblock = []
+    slots_by_day = {  #各日付ごとに使える時間のデータ作成
+        d: build_slots(d, availability, MIN_SLOTS, slot, unusable_days_by_minblock)
+        for d in days
+    }
+    split("slots")
+
+    # ============================================================
+    # 入力バリデーション（NGイベントは除外して続行）
+    # ============================================================
+    pref_days, event_slots = validate_inputs(
+        pref_days=pref_days,
+        events_raw=events_raw,
+        days=days,
+        slots_by_day=slots_by_day,
+        slot=slot,
+        YEAR=YEAR,
+        MONTH=MONTH
+    )
+    split("validate")
+
+    # teams / イベント日集合は「除外後のEVENT_SLOTS」から作る
+    teams = sorted(set(pref_days.keys()) | set(team for team, _, _, _ in event_slots))
+    print("対象団体:", teams)
+
+    # ============================================================
+    # ★公平性に使う「希望できる日数」
+    # ============================================================
+    pref_count = {}
+    for t in teams:
+        pref_set = pref_days.get(t, set())
+        pref_count[t] = len([d for d in pref_set if d in days])
+
+    print("\n=== 希望日数 ===")
+    for t in teams:
+        print(t, pref_count[t])
+
+    # ============================================================
+    # ★ 利用不可にした日付を出力
+    # ============================================================
+    print("\n=== MIN_SLOTS連続が作れず「利用不可」にした日 ===")
+    if unusable_days_by_minblock:
+        for d in unusable_days_by_minblock:
+            print(d.isoformat())
+    else:
+        print("(該当なし)")
+
+    # ============================================================
+    # ★イベントが「その日の全スロット」を覆う日を検出（null扱いにする）
+    # ============================================================
+    full_event_days = set()
+
+    for d in {d for _, d, _, _ in event_slots}:
+        day_slots = set(slots_by_day.get(d, []))
+        if not day_slots:
+            continue
+
+        covered = set()
+        for team, dd, s, e in event_slots:
+            if dd != d:
+                continue
+            covered.update(range(s, e, slot))
+
+        # day_slots が全部 covered に含まれる → その日はイベント専用（他団体は実質使えない）
+        if day_slots.issubset(covered):
+            full_event_days.add(d)
+
+    if full_event_days:
+        print("\n[INFO] イベントが全枠を覆うため null 扱い（非イベント配分対象外）にする日:")
+        for d in sorted(full_event_days):
+            print(" ", d.isoformat())
+    split("index")
+
+    return Instance(
+        year=YEAR,
+        month=MONTH,
+        slot=slot,
+        min_slots=MIN_SLOTS,
+        max_solve_seconds=MAX_SOLVE_SECONDS,
+        days=days,
+        teams=teams,
+        slots_by_day=slots_by_day,
+        pref_days=pref_days,
+        event_slots=event_slots,
+        unusable_days=unusable_days_by_minblock,
+        full_event_days=full_event_days,
+        pref_count=pref_count,
+        config=config,
+        config_path=config_path,
+        pref_path=pref_path,
+        event_path=event_path,
+    )
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+# ============================================================
+# 実行の計測（段ごとの時間・メモリ・モデルの大きさ）
+#   run_month が output/YYYY-MM/metrics.json に書く。
+#   時間は wall（perf_counter）と CPU（process_time。CP-SAT の全スレッドの合計なので wall より大きくなりうる）。
+#   メモリはその段の終わりまでのプロセスの最大 RSS（resource が無い Windows では None）。
+# ============================================================
+import json
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_FAMILY_RE = re.compile(r"^[A-Za-z]+")
+
+
+def peak_rss_mb() -> float | None:
+    """このプロセスの最大 RSS（MB）。ru_maxrss は Linux では KB、macOS ではバイト"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def model_size(model) -> tuple[int, int]:
+    """CpModel の (変数の数, 制約の数)"""
+    proto = model.Proto()
+    return len(proto.variables), len(proto.constraints)
+
+
+def variable_families(model) -> dict[str, int]:
+    """変数名の先頭の英字（x_… → x, s_… → s, both_… → both, mU… → mU）ごとの変数の数（多い順）"""
+    counts = Counter()
+    for v in model.Proto().variables:
+        m = _FAMILY_RE.match(v.name)
+        counts[m.group(0) if m else "(unnamed)"] += 1
+    return dict(counts.most_common())
+
+
+@dataclass
+class PhaseTiming:
+    name: str
+    wall_s: float
+    cpu_s: float
+    peak_rss_mb: float | None
+
+
+@dataclass
+class RunMetrics:
+    run_tag: str = ""
+    phases: list[PhaseTiming] = field(default_factory=list)
+    model: dict[str, Any] = field(default_factory=dict)  # model_report の結果（monolithic のときだけ）
+
+    @contextmanager
+    def phase(self, name: str):
+        """with metrics.phase("build"): ... の間の時間を記録する（例外で抜けても記録する）"""
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._record(name, w0, c0)
+
+    def splits(self, prefix: str) -> Callable[[str], None]:
+        """
+        区切りごとに記録する関数を返す（字下げを変えずに長い関数の途中を測る用）。
+        split("parse") で前の区切り（最初は splits を呼んだ時点）からの時間を "prefix.parse" として記録する。
+        """
+        last = [time.perf_counter(), time.process_time()]
+
+        def split(name: str) -> None:
+            self._record(f"{prefix}.{name}", *last)
+            last[:] = [time.perf_counter(), time.process_time()]
+
+        return split
+
+    def _record(self, name: str, w0: float, c0: float) -> None:
+        self.phases.append(PhaseTiming(
+            name=name,
+            wall_s=round(time.perf_counter() - w0, 4),
+            cpu_s=round(time.process_time() - c0, 4),
+            peak_rss_mb=peak_rss_mb(),
+        ))
+
+    def summary(self) -> str:
+        """run.log 用の1行（トップレベルの段だけ）"""
+        top = [p for p in self.phases if "." not in p.name]
+        parts = [f"{p.name}={p.wall_s:.2f}s" for p in top]
+        rss = peak_rss_mb()
+        if rss is not None:
+            parts.append(f"peak_rss={rss:.0f}MB")
+        if self.model:
+            parts.append(f"vars={self.model['variables']:,} cons={self.model['constraints']:,}")
+        return " ".join(parts)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "run_tag": self.run_tag,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "peak_rss_mb": peak_rss_mb(),
+            "phases": [asdict(p) for p in self.phases],
+            "model": self.model,
+        }
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def model_report(am) -> dict[str, Any]:
+    """構築済みモデル（AllocModel）の大きさ: 合計・構築の段ごとの増分・変数名の族ごとの数"""
+    variables, constraints = model_size(am.model)
+    return {
+        "variables": variables,
+        "constraints": constraints,
+        "by_step": {name: {"variables": v, "constraints": c} for name, (v, c) in am.sizes.items()},
+        "by_family": variable_families(am.model),
+    }
@@ -0,0 +1,771 @@
+from __future__ import annotations
+
+# ============================================================
+# CP-SAT モデル構築
+# ============================================================
+from dataclasses import dataclass, field
+from typing import Any
+
+from ortools.sat.python import cp_model #OR-Tools CP-SATのモデルを読み込むため
+
+from allocator.instance import ZONES, Instance, morning_penalty, prop_teams_of
+from allocator.options import (  # noqa: F401  従来どおり allocator.model からも import できるように
+    BLOCK_MODES,
+    DAY_FAIRNESS_MODES,
+    FAIRNESS_MODES,
+    SYMMETRY_MODES,
+    ModelOptions,
+    Weights,
+)
+
+TIE_MINUTES = 30  # 同じ日に使う団体同士の利用時間差の上限（分）
+
+
+def tie_slots(inst: Instance) -> int:
+    """TIE_MINUTES をスロット数にしたもの（30分スロットなら 1、60分スロットなら 0）"""
+    return TIE_MINUTES // inst.slot
+
+
+# 辞書式（lexicographic）に解くときの優先順位：空き時間 → 使用団体数 → 公平性 (2)〜(5)
+OBJECTIVE_LEVELS = ("idle", "team", "fairness")
+
+
+# ============================================================
+# 構築済みモデル（変数への参照をまとめて保持）
+# ============================================================
+@dataclass
+class AllocModel:
+    model: cp_model.CpModel
+    weights: Weights
+    options: ModelOptions = field(default_factory=ModelOptions)
+    # x / U / y / start_time は teams_on[day] の団体にだけ作る（それ以外の団体はその日 0 で、変数なし）
+    teams_on: dict[Any, list[str]] = field(default_factory=dict)  # teams_on[day] 割り当てうる団体
+    x: dict[tuple, Any] = field(default_factory=dict)           # x[team, day, time]
+    U: dict[tuple, Any] = field(default_factory=dict)           # U[team, day] 利用スロット数
+    y: dict[tuple, Any] = field(default_factory=dict)           # y[team, day] 利用有無
+    start_time: dict[tuple, Any] = field(default_factory=dict)  # start_time[team, day]
+    zone_day: dict[tuple, Any] = field(default_factory=dict)    # zone_day[zone, team, day] その日の時間帯別スロット数
+    morning_day: dict[tuple, Any] = field(default_factory=dict) # morning_day[team, day] その日の朝負担
+    zone_counts: dict[str, dict[str, Any]] = field(default_factory=dict)
+    totalM: dict[str, Any] = field(default_factory=dict)
+    morning_burden: dict[str, Any] = field(default_factory=dict)
+    obj: list = field(default_factory=list)
+    terms: list[tuple[str, int, Any]] = field(default_factory=list)  # 目的項 (名前, 係数, 式)。obj の各項は 係数 * 式（breakdown_from_model 用）
+    obj_levels: dict[str, list] = field(default_factory=dict)  # 優先順位ごとの目的項（辞書式に解くとき用。OBJECTIVE_LEVELS 参照）
+    symmetry_classes: list[list[str]] = field(default_factory=list)  # 対称性を崩した団体のグループ
+    sizes: dict[str, tuple[int, int]] = field(default_factory=dict)  # 構築の段ごとに増えた (変数, 制約) の数（metrics.json 用）
+    # 診断用モデル（build_guarded_model）だけ: 制約の族 → 仮定リテラル。通常は None で、制約に条件を付けない
+    assumptions: dict[tuple, Any] | None = None
+
+
+def _guard(am: AllocModel, label: tuple) -> list:
+    """
+    label の制約の族（例: ("event", team, "2026-02-14")）を仮定リテラルで条件付きにする。
+    OnlyEnforceIf に渡すリストを返す（通常のモデルでは空なので制約は変わらない）。
+    """
+    if am.assumptions is None:
+        return []
+    lit = am.assumptions.get(label)
+    if lit is None:
+        lit = am.assumptions[label] = am.model.NewBoolVar("assume_" + "_".join(map(str, label)))
+    return [lit]
+
+
+def _sized(am: AllocModel, name: str, add, inst: Instance) -> None:
+    """add(am, inst) を呼び、増えた変数・制約の数を am.sizes[name] に足す"""
+    proto = am.model.Proto()
+    nv, nc = len(proto.variables), len(proto.constraints)
+    add(am, inst)
+    v, c = am.sizes.get(name, (0, 0))
+    am.sizes[name] = (v + len(proto.variables) - nv, c + len(proto.constraints) - nc)
+
+
+def _add_term(am: AllocModel, name: str, coef: int, expr) -> None:
+    """目的項を名前付きで登録する（内訳は解いた後にこの式の値を読むだけで作れる）"""
+    am.terms.append((name, coef, expr))
+    am.obj.append(coef * expr)
+
+
+def build_model(inst: Instance, weights: Weights | None = None, options: ModelOptions | None = None) -> AllocModel:
+    """Instance から CP-SAT モデルを組み立てる（Solve はしない）。"""
+    am = AllocModel(model=cp_model.CpModel(), weights=weights or Weights(), options=options or ModelOptions()) #CP-SATモデルの作成
+
+    _add_blocks(am, inst)
+    _sized(am, "daily_fairness", _add_daily_fairness, inst)
+    _sized(am, "event_day_fairness", _add_event_day_fairness, inst)
+    _sized(am, "monthly_totals", _add_monthly_totals, inst)
+    _sized(am, "symmetry", _add_symmetry_breaking, inst)
+    _sized(am, "objective", _add_objective, inst)
+
+    am.model.Maximize(cp_model.LinearExpr.Sum(am.obj)) #objの和を最大化する
+    return am
+
+
+def build_day_model(inst: Instance, d, weights: Weights | None = None, options: ModelOptions | None = None) -> AllocModel:
+    """
+    1日分だけのモデル（分割求解用）。
+    日をまたぐ項 (3)(4)(5) は含めず、目的関数も設定しない（呼び出し側で足して Maximize する）。
+    """
+    day_inst = inst.restricted_to([d])
+    am = AllocModel(model=cp_model.CpModel(), weights=weights or Weights(), options=options or ModelOptions())
+
+    _add_blocks(am, day_inst)
+    _add_daily_fairness(am, day_inst)
+    _add_event_day_fairness(am, day_inst)
+
+    _add_team_count_term(am, day_inst)
+    _add_daily_spread_term(am, day_inst)
+    _add_event_spread_term(am, day_inst)
+    _add_idle_term(am, day_inst)
+    return am
+
+
+def build_guarded_model(inst: Instance, options: ModelOptions | None = None) -> AllocModel:
+    """
+    制約だけのモデル（目的関数なし・診断用）。次の制約の族をそれぞれ仮定リテラルで条件付きにする:
+      ("event", 団体, 日)   イベントの確定ブロック
+      ("cover", 日)         MIN_SLOTS 連続が作れる時刻は必ず1団体
+      ("day_rules", 日)     日内公平性（利用時間差 ≤ TIE_MINUTES・先に始める団体ほど短い）
+    全部を仮定にして解けなければ、矛盾する族の組を diagnose.py で取り出せる。
+    """
+    am = AllocModel(model=cp_model.CpModel(), weights=Weights(), options=options or ModelOptions(), assumptions={})
+    _add_blocks(am, inst)
+    _add_daily_fairness(am, inst)
+    _add_event_day_fairness(am, inst)
+    return am
+
+
+# ============================================================
+# 利用ブロック（割当・イベント・カバー・U/y・連続性・時間帯別の量）
+# 希望日制約（イベント日は例外）もここで表す
+# 👉 その日を希望している団体（＋イベント団体）にだけ変数を作り、それ以外は 0 として扱う
+# ============================================================
+def _add_blocks(am: AllocModel, inst: Instance) -> None:
+    am.teams_on = {d: inst.eligible_teams(d) for d in inst.days}
+    if am.options.block == "interval":
+        _sized(am, "usage", _add_usage_vars, inst)
+        _sized(am, "interval_blocks", _add_interval_blocks, inst)
+    else:
+        _sized(am, "assignment", _add_assignment_vars, inst)
+        _sized(am, "events", _add_event_constraints, inst)
+        _sized(am, "coverage", _add_coverage_constraints, inst)
+        _sized(am, "usage", _add_usage_vars, inst)
+        _sized(am, "contiguity", _add_contiguity_constraints, inst)
+        _sized(am, "slot_day_amounts", _add_slot_day_amounts, inst)
+
+
+# ============================================================
+# x[team, day, time]
+# ============================================================
+def _add_assignment_vars(am: AllocModel, inst: Instance) -> None:
+    model, x = am.model, am.x
+    for d in inst.days:
+        for t in inst.slots_by_day[d]:
+            for team in am.teams_on[d]:
+                x[(team, d, t)] = model.NewBoolVar(f"x_{team}_{d}_{t}")  #ある日のある時間にある団体が使うかを０：使わない、１：使うで定義
+
+
+# ============================================================
+# イベント確定割当（最優先）
+# ============================================================
+def _add_event_constraints(am: AllocModel, inst: Instance) -> None:
+    model, x = am.model, am.x
+    for team, d, s, e in inst.event_slots:
+        g = _guard(am, ("event", team, d.isoformat()))
+        for t in range(s, e, inst.slot):
+            model.Add(x[(team, d, t)] == 1).OnlyEnforceIf(g)      #イベントデータに入っているデータをモデルに追加
+            for o in am.teams_on[d]:
+                if o != team:                    #イベントをするチームでないならば
+                    model.Add(x[(o, d, t)] == 0).OnlyEnforceIf(g) #イベントの時間はほかのチームは絶対使えない（イベントの優先確保）
+        for t in inst.slots_by_day[d]:           #イベントする団体はその日の利用はそれだけ
+            if t < s or t >= e:
+                model.Add(x[(team,d,t)] == 0).OnlyEnforceIf(g)
+
+
+def _days_of(am: AllocModel, inst: Instance, team: str) -> list:
+    """その団体が使いうる日（teams_on に入っていて、スロットがある日）"""
+    return [d for d in inst.days if inst.slots_by_day[d] and team in am.teams_on[d]]
+
+
+def can_start_minimum(inst: Instance, slots: list[int], i: int) -> bool:
+    """slots[i] から MIN_SLOTS 連続で取れるか"""
+    n = len(slots)
+    t = slots[i]
+    for k in range(1, inst.min_slots):
+        if i + k >= n:
+            return False
+        if slots[i + k] != t + k * inst.slot:
+            return False
+    return True
+
+
+# ============================================================
+# 各スロットは必ず1団体（方法A：enumerateで高速化）
+# ============================================================
+def _add_coverage_constraints(am: AllocModel, inst: Instance) -> None:
+    model, x = am.model, am.x
+    for d in inst.days:
+        slots = inst.slots_by_day[d]
+        n = len(slots)
+        if n == 0:
+            continue
+        g = _guard(am, ("cover", d.isoformat()))
+
+        for i, t in enumerate(slots):
+            # ここで「t から MIN_SLOTS 連続で取れるか」を判定
+            if can_start_minimum(inst, slots, i):
+                # 連続 MIN_SLOTS が作れる開始点は必ず1団体
+                model.Add(cp_model.LinearExpr.Sum([x[(team, d, t)] for team in am.teams_on[d]]) == 1).OnlyEnforceIf(g)
+            else:
+                # 作れない開始点は空でもOK
+                model.Add(cp_model.LinearExpr.Sum([x[(team, d, t)] for team in am.teams_on[d]]) <= 1)
+
+
+# ============================================================
+# 使用量 U と 使用有無 y
+# ============================================================
+def _add_usage_vars(am: AllocModel, inst: Instance) -> None:
+    model, x, U, y = am.model, am.x, am.U, am.y
+    for d in inst.days:
+        T = len(inst.slots_by_day[d])
+        for team in am.teams_on[d]:
+            U[(team, d)] = model.NewIntVar(0, T, f"U_{team}_{d}") #ある日のある時間にある団体が使用するスロット数を算出
+            y[(team, d)] = model.NewBoolVar(f"y_{team}_{d}")  #ある日のある時間にある団体の使用の有無（０：使わない、１：使う）
+            if am.options.block == "slots":
+                model.Add(U[(team, d)] == cp_model.LinearExpr.Sum([x[(team, d, t)] for t in inst.slots_by_day[d]])) #その日の利用時間は割り当てられた30分スロットの合計
+            model.Add(U[(team, d)] >= inst.min_slots).OnlyEnforceIf(y[(team, d)]) #使う時間は最低利用時間を満たす
+            model.Add(U[(team, d)] == 0).OnlyEnforceIf(y[(team, d)].Not()) #使わないなら利用時間は０
+
+
+# ============================================================
+# 1日1回・連続 ＋ 開始時刻 start_time
+# ============================================================
+def _add_contiguity_constraints(am: AllocModel, inst: Instance) -> None:
+    model, x, y = am.model, am.x, am.y
+    for d in inst.days:
+        ts = inst.slots_by_day[d]
+        if not ts:  #もしその日に使わないならスキップ
+            continue
+        for team in am.teams_on[d]:
+            starts = []
+            for i, t in enumerate(ts):
+                s = model.NewBoolVar(f"s_{team}_{d}_{t}") #開始時間を決める
+                prev = x[(team, d, ts[i-1])] if i > 0 else None #直前に使っているか
+                cur = x[(team, d, t)] #現在使っているか
+
+                if prev is None:
+                    model.Add(s == cur)
+                else:
+                    model.Add(s >= cur - prev)
+                    model.Add(s <= cur)
+                    model.Add(s <= 1 - prev)
+
+                starts.append(s)
+
+            model.Add(cp_model.LinearExpr.Sum(starts) <= 1) #複数回使い始めることは禁止
+
+            st = model.NewIntVar(0, 24*60, f"start_{team}_{d}")
+            am.start_time[(team, d)] = st
+
+            model.Add(st == cp_model.LinearExpr.WeightedSum(starts, ts))
+            model.Add(st == 0).OnlyEnforceIf(y[(team, d)].Not())
+
+
+# ============================================================
+# その日の時間帯別スロット数 zone_day と朝負担 morning_day（slots 版：x の和）
+# ============================================================
+def _add_slot_day_amounts(am: AllocModel, inst: Instance) -> None:
+    x = am.x
+    for d in inst.days:
+        ts = inst.slots_by_day[d]
+        # その日の時間帯ごとのスロットと、朝ペナルティのあるスロット（朝以外(0)は含めない）は団体によらないので先に作る
+        zone_ts = {z: [t for t in ts if pred(t)] for z, pred in ZONES.items()}
+        morn_ts = [t for t in ts if morning_penalty(t) > 0]
+        morn_w = [morning_penalty(t) for t in morn_ts]
+        for team in am.teams_on[d]:
+            for z in ZONES:
+                am.zone_day[(z, team, d)] = cp_model.LinearExpr.Sum([x[(team, d, t)] for t in zone_ts[z]])
+            am.morning_day[(team, d)] = cp_model.LinearExpr.WeightedSum([x[(team, d, t)] for t in morn_ts], morn_w)
+
+
+# ============================================================
+# interval 版の利用ブロック
+# ・(団体, 日) ごとに任意区間 [start_time, start_time + U*slot) を1つ（有無は y）
+# ・同じ日の区間・利用禁止時間帯・空きスロットを AddNoOverlap し、長さの合計 = その日の全スロット数 でカバーを表す
+# ・空きにしてよいのは MIN_SLOTS 連続が作れない開始点だけ（slots 版のカバー制約と同じ）
+# ・slots 版と違い、利用禁止時間帯をまたぐブロックは作れない
+# ============================================================
+def _value_segments(fn, slot: int, lo: int, hi: int) -> list[tuple[int, int, int]]:
+    """[lo, hi) を slot 刻みで見て、fn(t) が同じ 0 でない値になる区間 (a, b, 値) のリスト"""
+    segs = []
+    for t in range(lo, hi, slot):
+        v = fn(t)
+        if not v:
+            continue
+        if segs and segs[-1][1] == t and segs[-1][2] == v:
+            segs[-1] = (segs[-1][0], t + slot, v)
+        else:
+            segs.append((t, t + slot, v))
+    return segs
+
+
+def _add_overlap_slots(am: AllocModel, start, end, a: int, b: int, T: int, slot: int, name: str):
+    """区間 [start, end) と [a, b) の重なりのスロット数（end == start なら 0）"""
+    model = am.model
+    lo = model.NewIntVar(0, 24*60 + slot, f"ovLo_{name}")
+    hi = model.NewIntVar(0, 24*60 + slot, f"ovHi_{name}")
+    model.AddMaxEquality(lo, [start, a])
+    model.AddMinEquality(hi, [end, b])
+    minutes = model.NewIntVar(0, T * slot, f"ovMin_{name}")
+    model.AddMaxEquality(minutes, [0, hi - lo])
+    ov = model.NewIntVar(0, T, f"ov_{name}")
+    model.Add(ov * slot == minutes)
+    return ov
+
+
+def _add_interval_blocks(am: AllocModel, inst: Instance) -> None:
+    model, U, y, slot = am.model, am.U, am.y, inst.slot
+    event_block = {(team, d): (s, e) for team, d, s, e in inst.event_slots}
+
+    for d in inst.days:
+        ts = inst.slots_by_day[d]
+        if not ts:
+            continue
+        T = len(ts)
+        day_start, day_end = ts[0], ts[-1] + slot
+        tset = set(ts)
+        intervals = []
+        zone_segs = {
+            z: _value_segments(lambda t, pred=pred: 1 if pred(t) else 0, slot, day_start, day_end)
+            for z, pred in ZONES.items()
+        }
+        morn_segs = _value_segments(morning_penalty, slot, day_start, day_end)
+
+        for team in am.teams_on[d]:
+            st = model.NewIntVarFromDomain(cp_model.Domain.FromValues([0] + ts), f"start_{team}_{d}")
+            en = model.NewIntVar(0, day_end, f"end_{team}_{d}")
+            am.start_time[(team, d)] = st
+            model.Add(en == st + slot * U[(team, d)])
+            model.Add(st >= day_start).OnlyEnforceIf(y[(team, d)])
+            model.Add(st == 0).OnlyEnforceIf(y[(team, d)].Not())
+            intervals.append(model.NewOptionalIntervalVar(st, slot * U[(team, d)], en, y[(team, d)], f"block_{team}_{d}"))
+
+            if (team, d) in event_block:  # イベント確定割当（最優先）：その日の利用はイベントのブロックだけ
+                s, e = event_block[(team, d)]
+                g = _guard(am, ("event", team, d.isoformat()))
+                model.Add(y[(team, d)] == 1).OnlyEnforceIf(g)
+                model.Add(st == s).OnlyEnforceIf(g)
+                model.Add(U[(team, d)] == (e - s) // slot).OnlyEnforceIf(g)
+
+            for z in ZONES:
+                am.zone_day[(z, team, d)] = cp_model.LinearExpr.Sum([
+                    _add_overlap_slots(am, st, en, a, b, T, slot, f"{z}{i}_{team}_{d}") for i, (a, b, _) in enumerate(zone_segs[z])
+                ])
+            am.morning_day[(team, d)] = cp_model.LinearExpr.WeightedSum(
+                [_add_overlap_slots(am, st, en, a, b, T, slot, f"morn{i}_{team}_{d}") for i, (a, b, _) in enumerate(morn_segs)],
+                [p for _, _, p in morn_segs],
+            )
+
+        # 利用禁止時間帯（その日の最初と最後のスロットの間で抜けている時刻）
+        for a, b, _ in _value_segments(lambda t: 0 if t in tset else 1, slot, day_start, day_end):
+            intervals.append(model.NewFixedSizeIntervalVar(a, b - a, f"closed_{d}_{a}"))
+
+        # 空きにしてよいスロット（MIN_SLOTS 連続が作れない開始点）
+        idle = []
+        for i, t in enumerate(ts):
+            if can_start_minimum(inst, ts, i):
+                continue
+            f = model.NewBoolVar(f"idle_{d}_{t}")
+            idle.append(f)
+            intervals.append(model.NewOptionalFixedSizeIntervalVar(t, slot, f, f"idleSlot_{d}_{t}"))
+
+        model.AddNoOverlap(intervals)
+        model.Add(cp_model.LinearExpr.Sum([U[(team, d)] for team in am.teams_on[d]] + idle) == T).OnlyEnforceIf(
+            _guard(am, ("cover", d.isoformat()))
+        )
+
+
+# ============================================================
+# ★日内公平性（開始順制限つき）
+# ・同じ日に使う団体同士の差 ≤ 30分
+# ・早く始まる団体ほど利用時間は短い
+# ・イベント日は除外
+# ============================================================
+def _add_pairwise_day_rules(am: AllocModel, d, group: list[str], tie: int, tag: str) -> None:
+    model, U, y, start_time = am.model, am.U, am.y, am.start_time
+    g = _guard(am, ("day_rules", d.isoformat()))
+    for i in range(len(group)): #同じ日に使う2団体について行う
+        for j in range(i + 1, len(group)):
+            a = group[i]
+            b = group[j]
+
+            both = model.NewBoolVar(f"both_{tag}{a}_{b}_{d}") #その日に2団体とも使うことを表す（1：どちらも利用、０：それ以外）
+            model.AddBoolAnd([y[(a, d)], y[(b, d)]]).OnlyEnforceIf(both)
+            model.AddBoolOr(
+                [y[(a, d)].Not(), y[(b, d)].Not()]
+            ).OnlyEnforceIf(both.Not())
+
+            # 利用時間差 ≤ 30分（上下両方から）
+            model.Add(U[(a, d)] - U[(b, d)] <= tie).OnlyEnforceIf([both, *g])
+            model.Add(U[(b, d)] - U[(a, d)] <= tie).OnlyEnforceIf([both, *g])
+
+            # 開始順制約
+            a_before_b = model.NewBoolVar(f"ab_{tag}{a}_{b}_{d}") #先に使う団体(0:B、1:A）
+            model.Add(start_time[(a, d)] <= start_time[(b, d)]).OnlyEnforceIf([both, a_before_b])
+            model.Add(start_time[(b, d)] <= start_time[(a, d)]).OnlyEnforceIf([both, a_before_b.Not()])
+            #先に使う方が時間が短い
+            model.Add(U[(a, d)] <= U[(b, d)]).OnlyEnforceIf([both, a_before_b, *g])
+            model.Add(U[(b, d)] <= U[(a, d)]).OnlyEnforceIf([both, a_before_b.Not(), *g])
+
+
+def _add_ordered_day_rules(am: AllocModel, d, group: list[str], T: int, tie: int, tag: str) -> None:
+    """
+    _add_pairwise_day_rules と同じ規則を団体数に比例する大きさで表す。
+    ・使う団体の U は [lo, lo+tie] に収まる（= どの2団体の差も tie 以下）
+    ・k = 1..tie ごとに区切り時刻 cut_k を置き、U >= lo+k の団体は cut_k 以降、
+      それ以外は cut_k より前に始める（= 先に始める団体ほど短い）
+    """
+    model, U, y, start_time = am.model, am.U, am.y, am.start_time
+    g = _guard(am, ("day_rules", d.isoformat()))
+    lo = model.NewIntVar(0, T, f"dayLo_{tag}{d}")
+    for a in group:
+        model.Add(U[(a, d)] >= lo).OnlyEnforceIf([y[(a, d)], *g])
+        model.Add(U[(a, d)] <= lo + tie).OnlyEnforceIf([y[(a, d)], *g])
+
+    for k in range(1, tie + 1):
+        cut = model.NewIntVar(0, 24*60 + 1, f"dayCut{k}_{tag}{d}")
+        for a in group:
+            ge = model.NewBoolVar(f"ge{k}_{tag}{a}_{d}")  # U[a] >= lo+k か
+            model.Add(U[(a, d)] >= lo + k).OnlyEnforceIf(ge)
+            model.Add(U[(a, d)] <= lo + k - 1).OnlyEnforceIf(ge.Not())
+            model.Add(start_time[(a, d)] >= cut).OnlyEnforceIf([y[(a, d)], ge, *g])
+            model.Add(start_time[(a, d)] <= cut - 1).OnlyEnforceIf([y[(a, d)], ge.Not(), *g])
+
+
+def _add_day_rules(am: AllocModel, inst: Instance, d, group: list[str], tag: str) -> None:
+    if am.options.day_fairness == "pairwise":
+        _add_pairwise_day_rules(am, d, group, tie_slots(inst), tag)
+    else:
+        _add_ordered_day_rules(am, d, group, len(inst.slots_by_day[d]), tie_slots(inst), tag)
+
+
+def _add_daily_fairness(am: AllocModel, inst: Instance) -> None:
+    event_calendar_days = inst.event_calendar_days
+    for d in inst.days:
+        if d in event_calendar_days: #イベント日はスキップ
+            continue
+
+        ts = inst.slots_by_day[d] #使用できない日はスキップ
+        if not ts:
+            continue
+
+        # 2団体未満なら公平性制約は不要
+        if len(am.teams_on[d]) < 2:
+            continue
+
+        _add_day_rules(am, inst, d, am.teams_on[d], tag="")
+
+
+# ============================================================
+# イベント日の時の日内公平性
+# ・イベント実施団体は除外
+# ・その日を希望している「非イベント団体」のみで日内公平性を適用
+# ============================================================
+def _add_event_day_fairness(am: AllocModel, inst: Instance) -> None:
+    event_calendar_days = inst.event_calendar_days
+    for d in inst.days:
+        if d not in event_calendar_days:  # イベント日でなければスキップ
+            continue
+        if d in inst.full_event_days:
+            continue
+
+        ts = inst.slots_by_day[d]
+        if not ts:
+            continue
+
+        # イベント以外で、その日を希望している団体
+        non_event_pref_teams = inst.non_event_pref_teams(d)
+
+        # 2団体未満なら公平性制約は不要
+        if len(non_event_pref_teams) < 2:
+            continue
+
+        # 日内公平性（通常日と同じ制約）
+        _add_day_rules(am, inst, d, non_event_pref_teams, tag="ev_")
+
+
+# ============================================================
+# 時間帯別 月合計 / 月合計 totalM（イベント日も含める）
+# ============================================================
+def _add_monthly_totals(am: AllocModel, inst: Instance) -> None:
+    model, U = am.model, am.U
+
+    zone_counts = {z: {} for z in ZONES} #時間帯ごとに入れる辞書
+    am.zone_counts = zone_counts
+
+    for team in inst.teams:
+        team_days = _days_of(am, inst, team)
+        for z in zone_counts:
+            zone_counts[z][team] = model.NewIntVar(0, 2000, f"{z}_{team}") #時間帯ごとにその団体が使ったスロット数を記録
+            model.Add(zone_counts[z][team] == cp_model.LinearExpr.Sum([am.zone_day[(z, team, d)] for d in team_days])) #時間帯ごとの利用量の合計を算出
+
+    for team in inst.teams:
+        am.totalM[team] = model.NewIntVar(0, 2000, f"totalM_{team}")
+        model.Add(am.totalM[team] == cp_model.LinearExpr.Sum([U[(team, d)] for d in _days_of(am, inst, team)])) #月に使ったスロット数の合計を算出
+
+
+# ============================================================
+# 対称性の除去
+# ・希望日・イベント・重みが同じ団体は入れ替えても同じ解になるので、
+#   団体名順に月合計が減っていく並びだけを探す（どの解も入れ替えればこの並びにできる）
+# ============================================================
+def _add_symmetry_breaking(am: AllocModel, inst: Instance) -> None:
+    if am.options.symmetry == "none":
+        return
+    am.symmetry_classes = inst.interchangeable_teams()
+    for group in am.symmetry_classes:
+        for a, b in zip(group, group[1:]):
+            am.model.Add(am.totalM[a] >= am.totalM[b])
+
+
+# ============================================================
+# 目的関数
+# ============================================================
+def _add_objective(am: AllocModel, inst: Instance) -> None:
+    for level, term in [
+        ("team", _add_team_count_term),
+        ("fairness", _add_daily_spread_term),
+        ("fairness", _add_event_spread_term),
+        ("fairness", _add_month_ratio_term),
+        ("fairness", _add_morning_spread_term),
+        ("fairness", _add_zone_ratio_term),
+        ("idle", _add_idle_term),
+    ]:
+        n = len(am.obj)
+        term(am, inst)
+        am.obj_levels.setdefault(level, []).extend(am.obj[n:])
+
+
+# (1) 使用団体数最大化
+def _add_team_count_term(am: AllocModel, inst: Instance) -> None:
+    for d in inst.days:
+        _add_term(am, "team", am.weights.team, cp_model.LinearExpr.Sum([am.y[(team, d)] for team in am.teams_on[d]])) #使用団体1団体につき10000の重み付け
+
+
+def _add_used_spread(am: AllocModel, d, group: list[str], T: int, tag: str):
+    """その日に使った団体(y=1)だけで max-min を表す spread 変数を作る"""
+    model, U, y = am.model, am.U, am.y
+    sfx = f"_{tag}" if tag else ""
+
+    # その日に使った団体数 used_cnt
+    used_cnt = model.NewIntVar(0, len(group), f"usedCnt{sfx}_{d}")
+    model.Add(used_cnt == cp_model.LinearExpr.Sum([y[(t, d)] for t in group]))
+
+    active = model.NewBoolVar(f"active_{tag or 'daily'}_{d}")  # 2団体以上なら評価
+    model.Add(used_cnt >= 2).OnlyEnforceIf(active)
+    model.Add(used_cnt <= 1).OnlyEnforceIf(active.Not())
+
+    # max/min を「使ってない団体は除外」して作る
+    mid = "_nonEvent" if tag else ""
+    maxU = model.NewIntVar(0, T, f"maxU{mid}_used_{d}") #最長利用時間の団体のスロット数
+    minU = model.NewIntVar(0, T, f"minU{mid}_used_{d}") #最小利用時間の団体のスロット数
+
+    max_terms = []
+    min_terms = []
+
+    for t in group:
+        # max側：使ってないなら 0、使ったら U
+        mU = model.NewIntVar(0, T, f"mU{sfx}_{t}_{d}")
+        model.Add(mU == U[(t, d)]).OnlyEnforceIf(y[(t, d)])
+        model.Add(mU == 0).OnlyEnforceIf(y[(t, d)].Not())
+        max_terms.append(mU)
+
+        # min側：使ったら U、使ってないなら T（大きい値）にして min から除外
+        nU = model.NewIntVar(0, T, f"nU{sfx}_{t}_{d}")
+        model.Add(nU == U[(t, d)]).OnlyEnforceIf(y[(t, d)])
+        model.Add(nU == T).OnlyEnforceIf(y[(t, d)].Not())
+        min_terms.append(nU)
+
+    model.AddMaxEquality(maxU, max_terms)
+    model.AddMinEquality(minU, min_terms)
+
+    spread = model.NewIntVar(0, T, f"spread{sfx}_used_{d}")
+    model.Add(spread == maxU - minU)
+
+    # 2団体未満の日は spread=0 にして無評価
+    model.Add(spread == 0).OnlyEnforceIf(active.Not())
+    return spread
+
+
+# (2) 日内公平性（イベント日除外）※使った団体(y=1)だけで max-min
+# 利用時間差が30分以内はハード制約として入れているため、ここでは利用時間に空きがあるなら利用時間を増やすという制約をソフトに＋条件としている
+def _add_daily_spread_term(am: AllocModel, inst: Instance) -> None:
+    event_calendar_days = inst.event_calendar_days
+    for d in inst.days:
+        if d in event_calendar_days:
+            continue
+
+        T = len(inst.slots_by_day[d])
+        if T == 0:
+            continue
+
+        if len(am.teams_on[d]) < 2:  # 2団体未満なら spread は常に 0
+            continue
+
+        spread = _add_used_spread(am, d, am.teams_on[d], T, tag="")
+        _add_term(am, "daily_spread", am.weights.daily_spread, spread)
+
+
+# (2') 日内公平性（イベント日：非イベント希望団体のみ）※使った団体(y=1)だけで max-min
+def _add_event_spread_term(am: AllocModel, inst: Instance) -> None:
+    event_calendar_days = inst.event_calendar_days
+    for d in inst.days:
+        if d not in event_calendar_days:
+            continue
+        if d in inst.full_event_days:
+            continue
+        T = len(inst.slots_by_day[d])
+        if T == 0:
+            continue
+
+        non_event_pref_teams = inst.non_event_pref_teams(d)
+        if len(non_event_pref_teams) < 2:
+            continue
+
+        spread_ev = _add_used_spread(am, d, non_event_pref_teams, T, tag="ev")
+        _add_term(am, "event_spread", am.weights.daily_spread_ev, spread_ev)
+
+
+# ============================================================
+# (3) ★月合計公平性（希望日数比率で公平化：全団体）
+#     目標: totalM[a] : totalM[b] ≈ pref_count[a] : pref_count[b]
+#     → |totalM[a]*pref[b] - totalM[b]*pref[a]| を小さくする
+# ============================================================
+def _add_pairwise_ratio_diffs(am: AllocModel, inst: Instance, counts: dict, name: str, weight: int, term: str) -> None:
+    model = am.model
+    prop_teams = prop_teams_of(inst)
+    for i in range(len(prop_teams)):
+        for j in range(i + 1, len(prop_teams)):
+            a = prop_teams[i] #aチーム
+            b = prop_teams[j] #bチーム
+            wa = inst.pref_count[a] #aの希望日数
+            wb = inst.pref_count[b] #bの希望日数
+
+            # expr = counts[a]*wb - counts[b]*wa
+            expr = counts[a] * wb - counts[b] * wa
+
+            # |expr| を表す diff
+            diff = model.NewIntVar(0, 2000 * max(wa, wb), f"diff_{name}_{a}_{b}")
+            model.Add(expr <= diff)
+            model.Add(-expr <= diff)
+
+            _add_term(am, term, -weight, diff)
+
+
+def _add_target_share_devs(am: AllocModel, inst: Instance, counts: dict, name: str, weight: int, term: str) -> None:
+    """各団体の目標シェア（希望日数比）からのずれ |counts[a]*W - 合計*wa| を1団体1変数で表す"""
+    model = am.model
+    prop_teams = prop_teams_of(inst)
+    if not prop_teams:
+        return
+    W = sum(inst.pref_count[t] for t in prop_teams)
+    total = cp_model.LinearExpr.Sum([counts[t] for t in prop_teams])
+    ub = ratio_dev_ub(inst)
+
+    for a in prop_teams:
+        expr = counts[a] * W - total * inst.pref_count[a]
+        dev = model.NewIntVar(0, ub, f"dev_{name}_{a}")
+        model.Add(expr <= dev)
+        model.Add(-expr <= dev)
+        _add_term(am, term, -weight, dev)
+
+
+def _add_maxmin_share_dev(am: AllocModel, inst: Instance, counts: dict, name: str, weight: int, term: str) -> None:
+    """目標シェアからのずれ（符号つき）の max - min だけを罰する"""
+    model = am.model
+    prop_teams = prop_teams_of(inst)
+    if not prop_teams:
+        return
+    W = sum(inst.pref_count[t] for t in prop_teams)
+    total = cp_model.LinearExpr.Sum([counts[t] for t in prop_teams])
+    ub = ratio_dev_ub(inst)
+
+    devs = [counts[a] * W - total * inst.pref_count[a] for a in prop_teams]
+    maxR = model.NewIntVar(-ub, ub, f"max_dev_{name}")
+    minR = model.NewIntVar(-ub, ub, f"min_dev_{name}")
+    model.AddMaxEquality(maxR, devs)
+    model.AddMinEquality(minR, devs)
+    _add_term(am, term, -weight, maxR - minR)
+
+
+def ratio_dev_ub(inst: Instance) -> int:
+    """|counts[a]*W - 合計*wa| の上界（1か月の総スロット数 × 希望日数の合計）"""
+    month_slots = sum(len(inst.slots_by_day[d]) for d in inst.days)
+    return max(1, month_slots * sum(inst.pref_count[t] for t in prop_teams_of(inst)))
+
+
+def _add_ratio_fairness(am: AllocModel, inst: Instance, counts: dict, name: str, weight: int, term: str) -> None:
+    mode = am.options.fairness
+    if mode == "pairwise":
+        _add_pairwise_ratio_diffs(am, inst, counts, name, weight, term)
+    elif mode == "target":
+        _add_target_share_devs(am, inst, counts, name, weight, term)
+    else:
+        _add_maxmin_share_dev(am, inst, counts, name, weight, term)
+
+
+def _add_month_ratio_term(am: AllocModel, inst: Instance) -> None:
+    _add_ratio_fairness(am, inst, am.totalM, "totalM", am.weights.prop_month, "month")
+
+
+# ============================================================
+# (4)：朝負担の「団体間の偏り」を抑える（max-min を小さくする）
+# ============================================================
+def morning_burden_ub(inst: Instance) -> int:
+    """朝負担スコアの上界：全部の日の全部のスロットの morning_penalty の和"""
+    return sum(morning_penalty(t) for d in inst.days for t in inst.slots_by_day[d])
+
+
+def _add_morning_spread_term(am: AllocModel, inst: Instance) -> None:
+    model = am.model
+
+    # 上界：1団体が全部の日の朝スロットを全部使ったときの負担
+    # （スロット幅が 15 分なら朝スロットは 30 分のときの倍になるので、固定値ではなく実際のスロットから数える）
+    MORN_BURDEN_UB = morning_burden_ub(inst)
+
+    # 各団体の「朝負担スコア」 morning_burden[team] を作る
+    for team in inst.teams:
+        am.morning_burden[team] = model.NewIntVar(0, MORN_BURDEN_UB, f"morning_burden_{team}")
+
+        # 朝スロットだけ拾った「負担=penalty×割当」（日ごとの morning_day）を全部足す
+        model.Add(am.morning_burden[team] == cp_model.LinearExpr.Sum([am.morning_day[(team, d)] for d in _days_of(am, inst, team)]))
+
+    maxB = model.NewIntVar(0, MORN_BURDEN_UB, "max_morning_burden") #朝負担が一番大きい団体
+    minB = model.NewIntVar(0, MORN_BURDEN_UB, "min_morning_burden") #朝負担が一番小さい団体
+
+    model.AddMaxEquality(maxB, [am.morning_burden[t] for t in inst.teams])
+    model.AddMinEquality(minB, [am.morning_burden[t] for t in inst.teams])
+
+    _add_term(am, "morning", -am.weights.morn_spread, maxB - minB)
+
+
+# ============================================================
+# (5) ★時間帯別公平性（希望日数比率で公平化：全団体）
+# ============================================================
+def _add_zone_ratio_term(am: AllocModel, inst: Instance) -> None:
+    for z in am.zone_counts:
+        _add_ratio_fairness(am, inst, am.zone_counts[z], z, am.weights.prop_zone, f"zone_{z}")
+
+
+# ============================================================
+# (6) 空き時間ペナルティ（利用可能時間内の未割当スロットを減らす）
+# ============================================================
+def _add_idle_term(am: AllocModel, inst: Instance) -> None:
+    for d in inst.days:
+        ts = inst.slots_by_day[d]
+        if not ts:
+            continue
+
+        # 各スロットは高々1団体なので、未割当スロット数 = その日のスロット数 - U の合計（線形式）
+        assigned = cp_model.LinearExpr.Sum([am.U[(team, d)] for team in am.teams_on[d]])
+        _add_term(am, "idle", -am.weights.idle, len(ts) - assigned)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+# ============================================================
+# 目的関数の重みと定式化の選択肢
+#   OR-Tools を読み込まない（解を読み直して出力だけ作るとき: allocator.rerender）。
+#   allocator.model からも従来どおり import できる。
+# ============================================================
+from dataclasses import dataclass
+
+
+# ============================================================
+# 目的関数の重み
+# ============================================================
+@dataclass(frozen=True)
+class Weights:
+    team: int = 10000 #使用団体最大化の重み
+    daily_spread: int = 100      #1日の利用時間差のための重み
+    daily_spread_ev: int = 100  # 日公平性（イベント日）の重み
+    prop_month: int = 13  # 月合計公平性の重み
+    morn_spread: int = 10  #  朝公平性の重み
+    prop_zone: int = 10  #時間帯別公平性の重み
+    idle: int = 100000  # 空き時間(未割当)ペナルティの重み
+
+    @classmethod
+    def from_config(cls, config: dict) -> Weights:
+        """config.yaml の weights:（例: {prop_month: 20, morn_spread: 5}）で既定値を上書きする"""
+        given = config.get("weights") or {}
+        unknown = set(given) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"unknown weights: {sorted(unknown)}")
+        return cls(**{k: int(v) for k, v in given.items()})
+
+
+# ============================================================
+# 定式化の選択肢（config.yaml / CLI から指定）
+# ============================================================
+FAIRNESS_MODES = ("pairwise", "target", "maxmin")
+DAY_FAIRNESS_MODES = ("ordered", "pairwise")
+BLOCK_MODES = ("slots", "interval")
+SYMMETRY_MODES = ("totals", "none")
+
+
+@dataclass(frozen=True)
+class ModelOptions:
+    # 比率公平性 (3)(5) の定式化
+    #   pairwise: 全団体ペアの |a*wb - b*wa|（従来・O(団体数²)）
+    #   target  : 各団体の「希望日数比の目標」からのずれ |a*W - 合計*wa|（O(団体数)）
+    #   maxmin  : 目標からのずれの max - min だけ（変数2つ）
+    fairness: str = "pairwise"
+    # 日内公平性（利用時間差 ≤ TIE_MINUTES・先に始める団体ほど短い）の定式化
+    #   ordered : 1日ごとの下限 lo（上限 lo+TIE）と「この時刻以降は lo+k 以上」の区切り時刻（O(団体数)）
+    #   pairwise: 全団体ペアに both / a_before_b を作る（従来・O(団体数²)）
+    day_fairness: str = "ordered"
+    # 各団体の1日の利用ブロックの表し方
+    #   slots   : x[団体, 日, 時刻] の 0/1 と開始フラグで連続性を表す（従来・O(スロット数×団体数)）
+    #   interval: (団体, 日) ごとに任意区間（有無 y・長さ U・開始 start_time）を1つ置き、AddNoOverlap で排他（O(団体数)）
+    block: str = "slots"
+    # 入れ替え可能な団体（Instance.interchangeable_teams）の対称性の崩し方
+    #   totals: 同じグループの団体は団体名順に月合計 totalM が減っていく（同じ値は可）
+    #   none  : 何もしない
+    symmetry: str = "totals"
+
+    def __post_init__(self):
+        if self.fairness not in FAIRNESS_MODES:
+            raise ValueError(f"fairness_mode は {FAIRNESS_MODES} のいずれか: {self.fairness}")
+        if self.day_fairness not in DAY_FAIRNESS_MODES:
+            raise ValueError(f"day_fairness_mode は {DAY_FAIRNESS_MODES} のいずれか: {self.day_fairness}")
+        if self.block not in BLOCK_MODES:
+            raise ValueError(f"block_mode は {BLOCK_MODES} のいずれか: {self.block}")
+        if self.symmetry not in SYMMETRY_MODES:
+            raise ValueError(f"symmetry_mode は {SYMMETRY_MODES} のいずれか: {self.symmetry}")
+
+    @classmethod
+    def from_config(cls, config: dict, **overrides) -> "ModelOptions":
+        """config.yaml の値を読み、None でない overrides（CLI 引数）で上書きする"""
+        values = {
+            "fairness": str(config.get("fairness_mode", "pairwise")),
+            "day_fairness": str(config.get("day_fairness_mode", "ordered")),
+            "block": str(config.get("block_mode", "slots")),
+            "symmetry": str(config.get("symmetry_mode", "totals")),
+        }
+        values.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**values)
@@ -0,0 +1,431 @@
+from __future__ import annotations
+
+# ============================================================
+# 1か月分の実行（読み込み → モデル構築 → Solve → 解の取り出し → 出力）
+# CLI（sourcecode/main.py）と管理者ページの両方から呼ばれる
+# ============================================================
+import logging
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from allocator import cache as run_cache
+from allocator.breakdown import breakdown_from_model
+from allocator.decompose import DecompositionResult, solve_decomposed
+from allocator.diagnose import diagnose_infeasibility, describe, log_report, save_report_json
+from allocator.hints import HintReport, add_solution_hint, default_hint_path, hint_agreement
+from allocator.incumbents import IncumbentWriter, default_incumbent_path
+from allocator.instance import Instance, load_config, load_instance, save_run_snapshot
+from allocator.metrics import RunMetrics, model_report
+from allocator.model import AllocModel, ModelOptions, Weights, build_model
+from allocator.progress import SearchLog, default_progress_path
+from allocator.refine import coarse_mismatches, prepare_refinement, solve_coarse
+from allocator.render import render
+from allocator.solution import Solution, extract_solution, save_solution_json
+from allocator.solve import SolveResult, StopRules, solve, solve_lexicographic, stage_seconds_from_config
+
+logger = logging.getLogger("kasuga_gym")
+
+BASE_DIR = Path(__file__).resolve().parents[1]   # Kasuga-gym-systemをリポジトリの基本フォルダとする
+
+
+@dataclass
+class RunResult:
+    instance: Instance
+    model: AllocModel | None
+    result: SolveResult | None
+    solution: Solution
+    breakdown: dict[str, Any]
+    out_run_dir: Path
+    hint: HintReport | None = None
+    decomposition: DecompositionResult | None = None
+    cache_key: str | None = None
+    cache_hit: bool = False
+    metrics: RunMetrics | None = None
+    progress: SearchLog | None = None
+
+
+def resolve_path(base_dir: Path, path_str: str | None, default_rel: str) -> Path: #引数があれば使いなければ元のものを使う
+    """相対パスは repo直下(base_dir)基準で解決"""
+    if not path_str:
+        return (base_dir / default_rel).resolve()
+    p = Path(path_str)
+    return p.resolve() if p.is_absolute() else (base_dir / p).resolve()
+
+
+def resolve_data_dir(base_dir: Path, run_tag: str, data_dir: str | None = None, data_tag: str | None = None) -> Path:
+    if data_dir:
+        # data-dir が指定されたらそれを優先
+        out = resolve_path(base_dir, data_dir, default_rel="data")
+    elif data_tag:
+        # data-tag が指定されたら data/<tag>/ を使う
+        out = (base_dir / "data" / data_tag).resolve()
+    else:
+        # ★何も指定がなければ config year/month に自動追従
+        out = (base_dir / "data" / run_tag).resolve()
+
+    # 親切チェック（推奨）
+    if not out.exists():
+        raise FileNotFoundError(f"DATA_DIR not found: {out}")
+    return out
+
+
+def _attach_run_log(log_path: Path) -> list[logging.Handler]:
+    """ログ設定（stdout + ファイル）run.log を作る"""
+    log_path.parent.mkdir(parents=True, exist_ok=True) #フォルダがなければ作る
+
+    #logを初期化
+    logger.setLevel(logging.INFO)
+    logger.handlers.clear()
+
+    #ログの表示形式設定
+    fmt = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
+
+    #ターミナルに出力（CP-SAT の探索ログは長いのでファイルだけ）
+    sh = logging.StreamHandler()
+    sh.setFormatter(fmt)
+    sh.addFilter(lambda record: not record.name.startswith("kasuga_gym.cpsat"))
+
+    #ファイルに保存
+    fh = logging.FileHandler(log_path, encoding="utf-8")
+    fh.setFormatter(fmt)
+
+    handlers = [sh, fh]
+    for h in handlers:
+        logger.addHandler(h)
+    return handlers
+
+
+def _detach_run_log(handlers: list[logging.Handler]) -> None:
+    for h in handlers:
+        logger.removeHandler(h)
+        h.close()
+
+
+def run_month(
+    config_path: str | Path | None = None,
+    out: str | Path | None = "output",
+    data_dir: str | None = None,
+    data_tag: str | None = None,
+    no_gantt: bool = False,
+    log: str | None = None,
+    weights: Weights | None = None,
+    hint: str | None = None,
+    engine: str | None = None,
+    fairness: str | None = None,
+    day_fairness: str | None = None,
+    block: str | None = None,
+    symmetry: str | None = None,
+    objective: str | None = None,
+    coarse_slot: int | None = None,
+    solver_workers: int | None = None,
+    render_workers: int | None = None,
+    stream: bool | None = None,
+    cache: bool | None = None,
+    base_dir: Path = BASE_DIR,
+) -> RunResult:
+    """
+    1か月分を最初から最後まで実行する。
+    すでに OR-Tools / pandas / matplotlib を読み込んだプロセスから何度でも呼べる。
+
+    hint: "auto" なら output/YYYY-MM/ の前回の解、パスならそのファイルをヒントにする。
+    engine: "monolithic"（1つの CP-SAT モデル）/ "decomposed"（日ごとに分割して並列求解）。
+            未指定なら config.yaml の engine、それも無ければ monolithic。
+    fairness: 比率公平性の定式化（pairwise / target / maxmin）。未指定なら config.yaml の fairness_mode。
+    day_fairness: 日内公平性の定式化（ordered / pairwise）。未指定なら config.yaml の day_fairness_mode。
+    block: 利用ブロックの表し方（slots / interval）。未指定なら config.yaml の block_mode。
+    symmetry: 入れ替え可能な団体の対称性の崩し方（totals / none）。未指定なら config.yaml の symmetry_mode。
+    objective: "weighted"（重み付き和を1回で解く）/ "lexicographic"（空き時間 → 使用団体数 → 公平性 の順に段ごとに解く）。
+               未指定なら config.yaml の objective_mode、それも無ければ weighted。monolithic エンジンのみ。
+    coarse_slot: 先にこの分数（例: 60）のスロットで解き、その解をヒントと窓にして細かいスロットで解き直す。
+                 未指定なら config.yaml の coarse_slot、それも無ければ使わない。monolithic エンジンのみ。
+    solver_workers: CP-SAT の探索スレッド数（decomposed ではプロセス数）。0 なら OR-Tools の既定。
+                    未指定なら config.yaml の solver_workers。複数の月を同時に解くとき（allocator.batch）に絞る。
+    render_workers: 画像（PNG/PDF）を同時に描くプロセス数。0 なら CPU 数、1 ならこのプロセスで順に描く。
+                    未指定なら config.yaml の render_workers。
+    stream: True なら改善解が見つかるたびに output/YYYY-MM/incumbent_YYYY-MM.json を上書きする。
+            未指定なら config.yaml の stream_incumbents。monolithic エンジンのみ。
+            前の実行の incumbent ファイルは毎回最初に消し、途中で失敗したときも消す。
+    cache: True なら入力・設定・コードが前回と同じとき解き直さず output/.cache/ の結果を返す。
+           未指定なら config.yaml の cache、それも無ければ True。
+
+    段ごとの時間・最大メモリ・モデルの大きさは output/YYYY-MM/metrics.json に書く（失敗したときもそこまでの分を書く）。
+    """
+    config_path = resolve_path(base_dir, str(config_path) if config_path else None, "config.yaml") #設定ファイルの絶対パス
+    out_dir = resolve_path(base_dir, str(out) if out else None, "output") #出力フォルダの絶対パス
+
+    config = load_config(config_path)
+    run_tag = f"{int(config['year']):04d}-{int(config['month']):02d}"   # 例: "2026-01"
+
+    #出力先フォルダの作成
+    out_run_dir = out_dir / run_tag
+    out_run_dir.mkdir(parents=True, exist_ok=True) #すでにあってもエラーにならない
+
+    resolved_data_dir = resolve_data_dir(base_dir, run_tag, data_dir=data_dir, data_tag=data_tag)
+
+    log_path = Path(log).resolve() if log else (out_run_dir / "run.log") #引数があればそこに保存、なければoutputに保存
+    handlers = _attach_run_log(log_path)
+    metrics = RunMetrics(run_tag=run_tag)
+    # 前の実行の途中の解は消す（落ちた・止めた実行の final: false が残ると、結果ページが「計算中です」のままになる）
+    incumbent_path = default_incumbent_path(out_run_dir, run_tag)
+    incumbent_path.unlink(missing_ok=True)
+    writer = None
+    try:
+        #使った実行条件のログを保存
+        logger.info("CONFIG_PATH=%s", config_path)
+        logger.info("OUT_RUN_DIR=%s", out_run_dir)
+        logger.info("NO_GANTT=%s", no_gantt)
+
+        with metrics.phase("load"):
+            inst = load_instance(config_path, resolved_data_dir, metrics=metrics)
+
+        # スナップショット保存（証跡）
+        with metrics.phase("snapshot"):
+            save_run_snapshot(
+                out_run_dir=out_run_dir,
+                config_path=config_path,
+                pref_path=inst.pref_path,
+                event_path=inst.event_path,
+            )
+
+        weights = weights or Weights.from_config(inst.config)
+        engine = engine or inst.config.get("engine", "monolithic")
+        objective = objective or inst.config.get("objective_mode", "weighted")
+        stream = bool(inst.config.get("stream_incumbents", False)) if stream is None else stream
+        cache = bool(inst.config.get("cache", True)) if cache is None else cache
+        stop = StopRules.from_config(inst.config)
+        seed = int(inst.config.get("random_seed", 0))
+        coarse_slot = int(coarse_slot or inst.config.get("coarse_slot") or 0)
+        solver_workers = int(inst.config.get("solver_workers", 0) if solver_workers is None else solver_workers)
+        render_workers = int(inst.config.get("render_workers", 0) if render_workers is None else render_workers)
+        if coarse_slot and coarse_slot <= inst.slot:
+            coarse_slot = 0  # 粗くならないなら使わない
+        options = ModelOptions.from_config(inst.config, fairness=fairness, day_fairness=day_fairness, block=block, symmetry=symmetry)
+        logger.info("ENGINE=%s", engine)
+        logger.info("WEIGHTS=%s", weights)
+        logger.info("FAIRNESS_MODE=%s", options.fairness)
+        logger.info("DAY_FAIRNESS_MODE=%s", options.day_fairness)
+        logger.info("BLOCK_MODE=%s", options.block)
+        logger.info("SYMMETRY_MODE=%s", options.symmetry)
+        logger.info("OBJECTIVE_MODE=%s", objective)
+        logger.info("STREAM_INCUMBENTS=%s", stream)
+        logger.info("STOP_RULES=%s", stop)
+        logger.info("RANDOM_SEED=%s", seed)
+        logger.info("SLOT=%d COARSE_SLOT=%s", inst.slot, coarse_slot or None)
+        logger.info("SOLVER_WORKERS=%s", solver_workers or "default")
+        logger.info("RENDER_WORKERS=%s", render_workers or "default")
+
+        cache_key = run_cache.run_key(inst, {
+            "engine": engine,
+            "options": asdict(options),
+            "objective": objective,
+            "weights": asdict(weights),
+            "stop": asdict(stop),
+            "seed": seed,
+            "coarse_slot": coarse_slot,
+            "solver_workers": solver_workers,
+            "no_gantt": no_gantt,
+        })
+        with metrics.phase("cache_lookup"):
+            cached = run_cache.load_cached(out_dir, cache_key, out_run_dir) if cache else None
+        if cached is not None:
+            sol, bd, cached_stop = cached
+            logger.info(
+                "cache: hit key=%s status=%s stop=%s（解き直さず前回の結果を使います）",
+                cache_key, sol.status_name, cached_stop or "-",
+            )
+            if cached_stop not in run_cache.CONVERGED_STOP_REASONS:
+                logger.info(
+                    "cache: 前回の解は %s で打ち切ったもので、解き直すと良くなることがあります（解き直すときは --no-cache）",
+                    cached_stop or "decomposed",
+                )
+            print("status:", sol.status_name, f"(cached, stop={cached_stop or '-'})")
+            return RunResult(
+                instance=inst, model=None, result=None, solution=sol, breakdown=bd,
+                out_run_dir=out_run_dir, cache_key=cache_key, cache_hit=True, metrics=metrics,
+            )
+
+        (out_run_dir / f"infeasibility_{run_tag}.json").unlink(missing_ok=True)  # 前回の診断結果は消しておく
+        default_progress_path(out_run_dir, run_tag).unlink(missing_ok=True)  # decomposed では作らないので前回の分を残さない
+        am, result, hint_report, decomposition, progress = None, None, None, None, None
+        if engine == "decomposed":
+            if hint:
+                logger.info("hint: decomposed エンジンではヒントを使いません")
+            if objective != "weighted":
+                logger.info("objective: decomposed エンジンは重み付き和で解きます")
+            if stream:
+                logger.info("stream: decomposed エンジンでは途中の解を書き出しません")
+            if coarse_slot:
+                logger.info("coarse: decomposed エンジンでは粗い解を使いません")
+            try:
+                with metrics.phase("solve"):
+                    decomposition = solve_decomposed(
+                        inst, weights, options,
+                        time_limit=inst.max_solve_seconds,
+                        rounds=int(inst.config.get("decomp_rounds", 20)),
+                        max_workers=solver_workers or None,
+                        seed=seed,
+                    )
+            except RuntimeError as e:
+                _explain_no_solution(inst, options, str(e), out_run_dir)
+            sol = decomposition.solution
+            logger.info("status=%s rounds=%d objective=%s", sol.status_name, decomposition.rounds, f"{decomposition.objective:,}")
+        elif engine == "monolithic":
+            with metrics.phase("build"):
+                am = build_model(inst, weights, options)
+            metrics.model = model_report(am)
+            logger.info(
+                "symmetry: %d classes of interchangeable teams %s",
+                len(am.symmetry_classes), [len(g) for g in am.symmetry_classes],
+            )
+            writer = IncumbentWriter(inst, am, incumbent_path, stop) if stream else None
+            am, sol, result, hint_report, progress = _solve_monolithic(
+                inst, am, hint, objective, stop, seed, solver_workers, coarse_slot, writer, out_run_dir, run_tag, base_dir,
+                metrics,
+            )
+        else:
+            raise ValueError(f"unknown engine: {engine}")
+
+        with metrics.phase("breakdown"):
+            model_bd = breakdown_from_model(inst, am, result.solver, sol) if am is not None else None
+        # この実行で書き出したファイル（キャッシュにはこれだけ入れる。途中の解 incumbent_* は入れない）
+        written = [out_run_dir / f"solution_{run_tag}.json"]
+        with metrics.phase("save_solution"):
+            save_solution_json(inst, sol, written[0], weights=weights, options=options, breakdown=model_bd)
+        if progress is not None:
+            written.append(default_progress_path(out_run_dir, run_tag))
+        with metrics.phase("render"):
+            bd = render(
+                inst, sol, out_run_dir, weights=weights, options=options, no_gantt=no_gantt,
+                breakdown=model_bd, metrics=metrics, workers=render_workers or None, written=written,
+            )
+        if cache:
+            with metrics.phase("cache_store"):
+                run_cache.store(
+                    out_dir, cache_key, written, run_tag, sol, bd, stop_reason=result.stop_reason if result else None,
+                )
+            logger.info("cache: stored key=%s", cache_key)
+    finally:
+        if writer is not None:
+            writer.discard()  # 求解の途中で止まったときだけ消す（最後まで解けたら final: true で残す）
+        metrics.save(out_run_dir / "metrics.json")
+        logger.info("metrics: %s", metrics.summary())
+        _detach_run_log(handlers)
+
+    return RunResult(
+        instance=inst,
+        model=am,
+        result=result,
+        solution=sol,
+        breakdown=bd,
+        out_run_dir=out_run_dir,
+        hint=hint_report,
+        decomposition=decomposition,
+        cache_key=cache_key,
+        metrics=metrics,
+        progress=progress,
+    )
+
+
+def _solve_monolithic(
+    inst: Instance,
+    am: AllocModel,
+    hint,
+    objective: str,
+    stop: StopRules,
+    seed: int,
+    solver_workers: int,
+    coarse_slot: int,
+    writer: IncumbentWriter | None,
+    out_run_dir: Path,
+    run_tag: str,
+    base_dir: Path,
+    metrics: RunMetrics,
+):
+    """
+    1つの CP-SAT モデルで解く（必要なら前回の解か粗いスロットの解をヒントにし、途中の解を書き出す）。
+    粗い解の窓で解が無かったときはモデルを作り直すので、使ったモデルも返す。
+    探索の推移（粗い解・辞書式の各段を含む）は解が無くても progress_YYYY-MM.json に書く。
+    """
+    progress = SearchLog()
+    hint_report = None
+    if hint:
+        hint_path = (
+            default_hint_path(out_run_dir, run_tag) if hint == "auto"
+            else resolve_path(base_dir, hint, "")
+        )
+        if hint_path is None or not hint_path.exists():
+            logger.info("hint: 前回の解が見つからないためヒントなしで実行します")
+        else:
+            hint_report = add_solution_hint(am, inst, hint_path)
+
+    coarse = None
+    mismatches = coarse_mismatches(inst, coarse_slot) if coarse_slot else []
+    if coarse_slot and hint_report is not None:
+        logger.info("coarse: 前回の解をヒントにするので粗い解は作りません")
+    elif mismatches:
+        logger.info(
+            "coarse: slot=%d の区切りに乗らない入力があるので粗い解は作りません（別の問題の解をヒントにしない）: %s",
+            coarse_slot, " / ".join(mismatches),
+        )
+    elif coarse_slot:
+        coarse_seconds = float(inst.config.get("coarse_seconds", inst.max_solve_seconds / 4))
+        with metrics.phase("coarse"):
+            coarse = solve_coarse(inst, am.weights, am.options, coarse_slot, coarse_seconds, seed, solver_workers, progress)
+        if coarse.has_solution:
+            prepare_refinement(am, inst, coarse, windows=True)
+    hinted = hint_report is not None or (coarse is not None and coarse.has_solution)
+
+    def run(am: AllocModel, seconds: float) -> SolveResult:
+        if objective == "lexicographic":
+            stage_seconds = stage_seconds_from_config(inst.config, seconds)
+            return solve_lexicographic(
+                am, stage_seconds, repair_hint=hinted, callback=writer, stop=stop, seed=seed,
+                num_workers=solver_workers, progress=progress,
+            )
+        if objective == "weighted":
+            return solve(
+                am, seconds, repair_hint=hinted, callback=writer, stop=stop, seed=seed,
+                num_workers=solver_workers, progress=progress,
+            )
+        raise ValueError(f"unknown objective mode: {objective}")
+
+    spent = coarse.wall_time if coarse is not None else 0.0
+    with metrics.phase("solve"):
+        result = run(am, max(inst.max_solve_seconds - spent, 1.0))
+    spent += result.wall_time
+    if coarse is not None and coarse.has_solution and not result.has_solution:
+        logger.info("refine: 窓の中に解が見つからないので、窓を外してヒントだけで解き直します")
+        with metrics.phase("rebuild"):
+            am = build_model(inst, am.weights, am.options)
+            prepare_refinement(am, inst, coarse, windows=False)
+        if writer is not None:
+            writer.am = am
+        with metrics.phase("resolve"):
+            result = run(am, max(inst.max_solve_seconds - spent, coarse.wall_time, 1.0))
+    if writer is not None:
+        writer.finish(result.status_name)
+    progress.save(default_progress_path(out_run_dir, run_tag), run_tag)
+    progress.log_summary()
+    if not result.has_solution:
+        _explain_no_solution(inst, am.options, result.status_name, out_run_dir)
+    with metrics.phase("extract"):
+        sol = extract_solution(inst, am, result)
+    if hint_report is not None:
+        logger.info("hint agreement=%.1f%% (x がヒントと一致した割合)", 100 * hint_agreement(hint_report, sol))
+    return am, sol, result, hint_report, progress
+
+
+def _explain_no_solution(inst: Instance, options: ModelOptions, status_name: str, out_run_dir: Path):
+    """解が無かったとき、矛盾する制約を調べて run.log と infeasibility_YYYY-MM.json に残してから例外にする"""
+    report = diagnose_infeasibility(inst, options, time_limit=float(inst.config.get("diagnose_seconds", 10)))
+    log_report(inst, report)
+    save_report_json(inst, report, out_run_dir / f"infeasibility_{inst.run_tag}.json")
+    if report.infeasible:
+        causes = " / ".join(describe(inst, label) for label in report.core)
+        raise RuntimeError(f"解が見つかりませんでした（{status_name}）。矛盾する制約: {causes}")
+    if report.feasible:
+        raise RuntimeError(f"解が見つかりませんでした（{status_name}）。制約は満たせるので、max_solve_seconds を延ばしてください")
+    raise RuntimeError(
+        f"解が見つかりませんでした（{status_name}）。制約を満たせるかどうか判定できませんでした（diagnose_seconds を延ばしてください）"
+    )
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+# ============================================================
+# CP-SAT の探索ログ（log_search_progress）と探索の推移
+#   探索ログは1行ずつ run.log に書き（画面には出さない）、
+#   改善解（#1, #2, …）と上界の更新（#Bound）の行を読んで
+#   「時刻・目的値・上界・ギャップ・見つけたワーカー」の時系列にする。
+#   時系列は output/YYYY-MM/progress_YYYY-MM.json に保存し、管理者ページでグラフにする。
+#   このシステムの目的関数はどれも最大化なので、上界は next:[lo,hi] の hi。
+# ============================================================
+import json
+import logging
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from ortools.sat.python import cp_model
+
+logger = logging.getLogger("kasuga_gym")
+cpsat_logger = logging.getLogger("kasuga_gym.cpsat")  # run.log だけに出す（pipeline._attach_run_log 参照）
+
+# 例) "#12     2.31s best:-22565 next:[-22564,524667] no_lp"
+#     "#Bound   1.25s best:-inf  next:[-5077154,524667] default_lp (initial_propagation)"
+_PROGRESS_RE = re.compile(
+    r"^#(?P<kind>\d+|Bound)\s+(?P<time>[\d.]+)s\s+best:(?P<best>\S+)"
+    r"(?:\s+next:\[(?P<lo>[^,\]]*),?(?P<hi>[^\]]*)\])?\s*(?P<worker>\S*)"
+)
+
+
+def default_progress_path(out_run_dir: Path, run_tag: str) -> Path:
+    return out_run_dir / f"progress_{run_tag}.json"
+
+
+def _number(s: str | None) -> float | None:
+    if not s or s.lstrip("+-") == "inf":
+        return None
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def relative_gap(objective: float | None, bound: float | None) -> float | None:
+    """(上界 - 目的値) / |上界|（StopRules.rel_gap と同じ定義）"""
+    if objective is None or bound is None or bound == 0:
+        return None
+    return max(0.0, bound - objective) / abs(bound)
+
+
+@dataclass
+class ProgressPoint:
+    time: float                 # 最初の Solve の開始からの秒（辞書式・粗い解のときは段をまたいだ通算）
+    kind: str                   # "solution"（改善解）/ "bound"（上界の更新）
+    objective: float | None     # その時点の最良の目的値（解が無ければ None）
+    bound: float | None
+    gap: float | None
+    worker: str                 # 見つけた CP-SAT のワーカー（no_lp / default_lp / graph_var_lns など）
+    stage: str | None = None    # 辞書式の段（idle / team / fairness）や "coarse"
+
+
+def parse_progress_line(line: str) -> dict[str, Any] | None:
+    """探索ログの1行が改善解か上界の更新なら {kind, time, objective, bound, worker} を返す"""
+    m = _PROGRESS_RE.match(line.strip())
+    if not m:
+        return None
+    return {
+        "kind": "bound" if m["kind"] == "Bound" else "solution",
+        "time": float(m["time"]),
+        "objective": _number(m["best"]),
+        "bound": _number(m["hi"]),
+        "worker": m["worker"] or "",
+    }
+
+
+class SearchLog:
+    """
+    CpSolver の log_callback に渡して探索ログを受け取る。
+    1つの SearchLog を複数の Solve（粗い解 → 本番、辞書式の各段）で使い回すと、時刻は通算になる。
+    """
+
+    def __init__(self):
+        self.points: list[ProgressPoint] = []
+        self.stage: str | None = None
+        self.lines = 0  # 受け取ったログの行数
+        self._offset = 0.0
+
+    def attach(self, solver: cp_model.CpSolver) -> None:
+        """Solve の前に呼ぶ（探索ログを有効にし、画面には出さずにこちらで受け取る）。段の名前は stage に入れておく"""
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = self._on_log
+
+    def finish(self, solver: cp_model.CpSolver) -> None:
+        """Solve の後に呼ぶ（次の Solve の時刻をこの Solve の後ろに続ける）"""
+        self._offset += solver.WallTime()
+
+    def _on_log(self, text: str) -> None:
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            self.lines += 1
+            cpsat_logger.info("cpsat | %s", line)
+            p = parse_progress_line(line)
+            if p is None:
+                continue
+            self.points.append(ProgressPoint(
+                time=round(self._offset + p["time"], 3),
+                kind=p["kind"],
+                objective=p["objective"],
+                bound=p["bound"],
+                gap=relative_gap(p["objective"], p["bound"]),
+                worker=p["worker"],
+                stage=self.stage,
+            ))
+
+    def summary(self) -> dict[str, Any]:
+        solutions = [p for p in self.points if p.kind == "solution"]
+        last = self.points[-1] if self.points else None
+        return {
+            "solutions": len(solutions),
+            "first_solution_time": solutions[0].time if solutions else None,
+            "last_improvement_time": solutions[-1].time if solutions else None,
+            "objective": last.objective if last else None,
+            "bound": last.bound if last else None,
+            "gap": last.gap if last else None,
+            "improvements_by_worker": dict(Counter(p.worker for p in solutions).most_common()),
+        }
+
+    def log_summary(self) -> None:
+        s = self.summary()
+        gap = "-" if s["gap"] is None else f"{100 * s['gap']:.2f}%"
+        first, last = ("-" if t is None else f"{t:.2f}s" for t in (s["first_solution_time"], s["last_improvement_time"]))
+        logger.info(
+            "progress: solutions=%d first=%s last=%s gap=%s workers=%s",
+            s["solutions"], first, last, gap, s["improvements_by_worker"],
+        )
+
+    def save(self, path: Path, run_tag: str) -> None:
+        path.write_text(json.dumps({
+            "run_tag": run_tag,
+            "summary": self.summary(),
+            "points": [asdict(p) for p in self.points],
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
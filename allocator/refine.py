@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+# ============================================================
+# 粗いスロットから細かいスロットへ（coarse-to-fine）
+#   1) 同じ入力を coarse_slot 分（既定 60分）のスロットで解く（変数が slot / coarse_slot に減る）
+#   2) 粗い解を細かいスロットに写して AddHint し、各 (団体, 日) の利用を
+#      「粗いブロックの前後 coarse_slot 分まで」の窓に絞って解く
+#   3) 窓のせいで解が無ければ、窓を外してヒントだけで解き直す
+#   イベントや最低利用時間が coarse_slot の区切りに乗らないと粗いスロットでは別の問題になる
+#   （イベントが消える・最低利用時間が切り上がる）ので、そのときは粗い解を作らない（coarse_mismatches）。
+# ============================================================
+import contextlib
+import io
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date
+
+from allocator.hints import hint_assignment
+from allocator.instance import Instance, load_instance, tstr
+from allocator.model import TIE_MINUTES, AllocModel, ModelOptions, Weights, build_model
+from allocator.progress import SearchLog
+from allocator.solution import assignment_values
+from allocator.solve import solve
+
+logger = logging.getLogger("kasuga_gym")
+
+
+@dataclass
+class CoarseResult:
+    slot: int
+    status_name: str
+    wall_time: float
+    values: dict[tuple[str, date, int], int] = field(default_factory=dict)  # 細かいスロットに写した割当
+
+    @property
+    def has_solution(self) -> bool:
+        return bool(self.values)
+
+
+def coarse_mismatches(inst: Instance, coarse_slot: int) -> list[str]:
+    """coarse_slot 分のスロットでは同じ入力にならない理由（空なら粗い解を作ってよい）"""
+    reasons = [
+        f"イベント {team} {d.isoformat()} {tstr(s)}-{tstr(e)}"
+        for team, d, s, e in inst.event_slots if s % coarse_slot or e % coarse_slot
+    ]
+    min_minutes = inst.min_slots * inst.slot
+    if min_minutes % coarse_slot:
+        reasons.append(f"最低利用時間 {min_minutes}分")
+    return reasons
+
+
+def coarse_instance(inst: Instance, coarse_slot: int) -> Instance:
+    """
+    同じ config / 入力ファイルを coarse_slot 分のスロットで読み直す（読み込み時の表示は出さない）。
+    読み直しで除外されたイベントがあれば run.log に出す（coarse_mismatches で先に弾くので、ふつうは無い）。
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        cinst = load_instance(inst.config_path, inst.pref_path.parent, slot=coarse_slot)
+    for team, d, s, e in sorted(set(inst.event_slots) - set(cinst.event_slots)):
+        logger.info("coarse: slot=%d ではイベントを表せないので除外しました: %s %s %s-%s",
+                    coarse_slot, team, d.isoformat(), tstr(s), tstr(e))
+    if TIE_MINUTES % coarse_slot:
+        logger.info("coarse: slot=%d では日内の利用時間差 ≤ %d分 が差 0 になります", coarse_slot, TIE_MINUTES)
+    return cinst
+
+
+def to_fine(inst: Instance, coarse_slot: int, coarse_x: dict[tuple[str, date, int], int]) -> dict[tuple[str, date, int], int]:
+    """粗いスロット t の割当を、細かいスロット t .. t+coarse_slot の割当にする"""
+    out = {}
+    for (team, d, t), v in coarse_x.items():
+        if not v:
+            continue
+        for ft in range(t, t + coarse_slot, inst.slot):
+            out[(team, d, ft)] = 1
+    return out
+
+
+def solve_coarse(
+    inst: Instance,
+    weights: Weights,
+    options: ModelOptions,
+    coarse_slot: int,
+    seconds: float,
+    seed: int = 0,
+    num_workers: int = 0,
+    progress: SearchLog | None = None,
+) -> CoarseResult:
+    """progress を渡すと、粗い解の探索も stage="coarse" として時系列に入る"""
+    t0 = time.perf_counter()
+    cinst = coarse_instance(inst, coarse_slot)
+    cam = build_model(cinst, weights, options)
+    if progress is not None:
+        progress.stage = "coarse"
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = solve(cam, seconds, seed=seed, num_workers=num_workers, progress=progress)
+    if progress is not None:
+        progress.stage = None
+    values = to_fine(inst, coarse_slot, assignment_values(cinst, cam, result.solver)) if result.has_solution else {}
+    coarse = CoarseResult(slot=coarse_slot, status_name=result.status_name, wall_time=time.perf_counter() - t0, values=values)
+    logger.info(
+        "coarse: slot=%d status=%s variables=%d time=%.2fs",
+        coarse_slot, coarse.status_name, len(cam.model.Proto().variables), coarse.wall_time,
+    )
+    return coarse
+
+
+def add_windows(am: AllocModel, inst: Instance, values: dict[tuple[str, date, int], int], margin: int) -> int:
+    """
+    粗い解で使う (団体, 日) の開始・終了を、粗いブロックの前後 margin 分以内に絞る（イベントの日はそのまま）。
+    粗い解で使わない (団体, 日) は絞らない（粗いスロットでは作れない端の時間帯を細かいスロットで埋めるため）。
+    戻り値は絞った (団体, 日) の数。
+    """
+    model = am.model
+    events = inst.event_days_by_team
+    n = 0
+    for (team, d), y in am.y.items():
+        if (team, d) in events or (team, d) not in am.start_time:
+            continue
+        used = [t for t in inst.slots_by_day[d] if values.get((team, d, t), 0)]
+        if not used:
+            continue
+        start = am.start_time[(team, d)]
+        model.Add(start >= used[0] - margin).OnlyEnforceIf(y)
+        model.Add(start + inst.slot * am.U[(team, d)] <= used[-1] + inst.slot + margin).OnlyEnforceIf(y)
+        n += 1
+    return n
+
+
+def prepare_refinement(am: AllocModel, inst: Instance, coarse: CoarseResult, windows: bool) -> None:
+    """粗い解をヒントにし、windows=True なら窓で絞る"""
+    hinted = hint_assignment(am, inst, coarse.values)
+    narrowed = add_windows(am, inst, coarse.values, margin=coarse.slot) if windows else 0
+    logger.info("refine: slot=%d hinted_vars=%d windows=%d", inst.slot, hinted, narrowed)
@@ -0,0 +1,599 @@
+from __future__ import annotations
+
+# ============================================================
+# 出力（CSV / HTML / 画像）
+#   CSV / HTML は標準ライブラリだけで書く。画像（PNG / PDF）は allocator.figures が描き、
+#   画像を出すときだけ import する（--no-gantt では matplotlib を読み込まない）。
+#   画像は1枚ずつプロセスプールで同時に描く（render_figures）。
+# ============================================================
+import calendar
+import contextlib
+import csv
+import html as _html
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, date
+from pathlib import Path
+from typing import Collection
+
+from allocator.breakdown import compute_objective_breakdown_used_only, format_breakdown
+from allocator.instance import Instance, tstr
+from allocator.metrics import PhaseTiming, RunMetrics, peak_rss_mb
+from allocator.options import ModelOptions, Weights
+from allocator.solution import Solution, day_blocks, day_timeline
+
+# ============================================================
+# 団体ごとの固定色（既存）
+# ============================================================
+TEAM_COLORS = {
+    "医学フットサル同好会": "#4E79A7",
+    "インドネシア学友会": "#76B7B2",
+    "ULISバレーボール部": "#E15759",
+    "SPIKERS'inc": "#B07AA1",
+    "KickChat T-ACT": "#F28E2B",
+    "中国留学生学友会": "#59A14F",
+    "ULISバドミントン部": "#9C755F",
+}
+
+# ============================================================
+# 自動割当用パレット（★既存色と被りにくい）
+# 　・明度・彩度が違う
+# 　・識別しやすい
+# ============================================================
+AUTO_PALETTE = [
+    "#EDC948",  # 黄
+    "#8CD17D",  # 明るい緑
+    "#FF9DA7",  # ピンク
+    "#BAB0AC",  # グレー
+    "#D37295",  # 紫ピンク
+    "#86BCB6",  # 青緑
+    "#F1CE63",  # 明るい黄
+    "#BAB0AC",
+]
+
+# ============================================================
+# 曜日データ
+# ============================================================
+JP_WD = ["月", "火", "水", "木", "金", "土", "日"]
+
+def fmt_date_wday(d_like) -> str:
+    """
+    '2026-01-17' / Timestamp / date などを受けて
+    '2026-01-17(土)' の形で返す
+    """
+    if isinstance(d_like, datetime):
+        d = d_like.date()
+    elif isinstance(d_like, date):
+        d = d_like
+    else:
+        d = date.fromisoformat(str(d_like)[:10])
+    return f"{d.isoformat()}({JP_WD[d.weekday()]})"
+
+
+def _team_color(team: str) -> str:
+    return TEAM_COLORS.get(team, "#222222")
+
+def _ansi_hex(hex_color: str) -> str:
+    """#RRGGBB → ANSI 24bit escape"""
+    try:
+        h = hex_color.lstrip("#")
+        r = int(h[0:2], 16)
+        g = int(h[2:4], 16)
+        b = int(h[4:6], 16)
+        return f"\033[38;2;{r};{g};{b}m"
+    except Exception:
+        return ""
+
+ANSI_RESET = "\033[0m"
+
+
+def _write_csv(path: Path, columns: list[str], rows: list[dict]) -> None:
+    """Excel で開けるように BOM 付き UTF-8、改行は OS の既定（以前の pandas.to_csv と同じ形）"""
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=columns, lineterminator=os.linesep)
+        w.writeheader()
+        w.writerows(rows)
+
+
+def render_breakdown(
+    inst: Instance,
+    sol: Solution,
+    weights: Weights,
+    options: ModelOptions | None = None,
+    bd: dict | None = None,
+) -> dict:
+    """内訳を画面に出す。bd が無ければ解から内訳を計算し直す（モデルが無いとき: 分割求解など）。画像は render が描く"""
+    if bd is None:
+        bd = compute_objective_breakdown_used_only(inst, sol, weights, options)
+    lines = format_breakdown(bd, weights)
+
+    # コンソールに出す
+    print("\n" + "\n".join(lines) + "\n")
+    return bd
+
+
+# ============================================================
+# schedule.csv（Date / Blocks）
+# ============================================================
+def write_schedule_csv(inst: Instance, sol: Solution, out_run_dir: Path) -> None:
+    pref_zero_days = inst.pref_zero_days()
+    rows = []
+
+    for d in inst.days:
+        ts = inst.slots_by_day[d]
+
+        # 希望団体0日の出力
+        if d in pref_zero_days:
+            rows.append({"Date": d.isoformat(), "Blocks": "希望団体0"})
+            continue
+
+        # 利用不可日の出力
+        if not ts:
+            rows.append({"Date": d.isoformat(), "Blocks": "(利用不可)"})
+            continue
+
+        # 連続区間（未割当の区間も含む）
+        blocks = day_timeline(inst, sol, d)
+        rows.append({
+            "Date": d.isoformat(),
+            "Blocks": "\n".join(f"{team or '(未割当)'} {tstr(s)}-{tstr(e)}" for team, s, e in blocks)
+        })
+
+    _write_csv(out_run_dir / f"schedule_{inst.run_tag}.csv", ["Date", "Blocks"], rows)
+
+
+# ============================================================
+# ① 団体別スケジュール（配布用：連続ブロック）
+# schedule_by_team.csv
+# ============================================================
+def schedule_by_team_rows(inst: Instance, sol: Solution) -> list[dict]:
+    pref_zero_days = inst.pref_zero_days()
+    team_rows = []
+
+    for d in inst.days:
+        if d in pref_zero_days:
+            continue
+
+        for team, s, e in day_blocks(inst, sol, d):
+            team_rows.append({
+                "Team": team,
+                "Date": d.isoformat(),
+                "Time": f"{tstr(s)}–{tstr(e)}",
+                "Hours": round((e - s) / 60, 2)
+            })
+    return team_rows
+
+
+def write_schedule_by_team_csv(inst: Instance, sol: Solution, out_run_dir: Path) -> list[dict]:
+    team_rows = schedule_by_team_rows(inst, sol)
+    _write_csv(out_run_dir / f"schedule_by_team_{inst.run_tag}.csv", ["Team", "Date", "Time", "Hours"], team_rows)
+    return team_rows
+
+
+# ============================================================
+# 提出用紙 転記用リスト（表示 + 画像保存）
+# ============================================================
+def build_transcription_rows(schedule_by_team: list[dict]) -> list[dict]:
+    """
+    コンソール表示（団体名だけ色：ANSI）を行い、画像用の行情報を返す。
+    例: {"kind":"header"/"line"/"sep"/"blank", "text":..., "team":...}
+    """
+    # 表示用（団体 → 日付 → 時刻 の順）
+    by_team: dict[str, list[dict]] = {}
+    for row in sorted(schedule_by_team, key=lambda r: (r["Team"], r["Date"], r["Time"])):
+        by_team.setdefault(row["Team"], []).append(row)
+
+    print("\n" + "=" * 60)
+    print("【提出用紙 転記用リスト】")
+    print("※このまま紙に書き写せます")
+    print("=" * 60)
+
+    draw_rows = []
+    draw_rows.append({"kind": "title", "text": "【提出用紙 転記用リスト】"})
+    draw_rows.append({"kind": "title2", "text": "※このまま紙に書き写せます"})
+    draw_rows.append({"kind": "sep", "text": "=" * 48})
+
+    for team, g in by_team.items():
+
+        header1 = f"■ {team}"
+        header2 = f"（全{len(g)}枠）"
+        # console（団体名だけ色）
+        c = _ansi_hex(_team_color(team))
+        print("\n■ " + c + team + ANSI_RESET)
+        print(f"（全{len(g)}枠）")
+        print("-" * 40)
+
+        draw_rows.append({"kind": "blank", "text": ""})
+        draw_rows.append({"kind": "header1", "team": team, "text": header1})
+        draw_rows.append({"kind": "header2", "team": team, "text": header2})
+        draw_rows.append({"kind": "sep2", "text": "-" * 48})
+
+        for row in g:
+            date_str = fmt_date_wday(row["Date"])
+            time_str = str(row["Time"])
+            dur = row.get("Hours", None)
+
+            if dur is None:
+                dur_str = ""
+            else:
+                try:
+                    dur_int = int(dur) if float(dur).is_integer() else float(dur)
+                    dur_str = f"  ({dur_int}h)"
+                except Exception:
+                    dur_str = f"  ({dur}h)"
+
+            s = f"・{date_str}  {time_str}{dur_str}"
+            print(s)
+            draw_rows.append({"kind": "line", "text": s})
+
+    return draw_rows
+
+
+# ============================================================
+# 月合計・時間帯合計（hours）
+# monthly_summary.csv
+# ============================================================
+MONTHLY_SUMMARY_COLUMNS = [
+    "団体名",
+    "希望日数",
+    "合計時間(h)",
+    "朝利用合計時間(h)\n(8:30-11:00)",
+    "昼利用合計時間(h)\n(11:00-15:00)",
+    "夕利用合計時間(h)\n(15:00-18:00)",
+    "夜利用合計時間(h)\n(18:00-21:00)",
+]
+
+
+def monthly_summary_rows(inst: Instance, sol: Solution) -> list[dict]:
+    """団体ごとの合計時間（合計の多い順。同じなら団体名順）"""
+    slot = inst.slot
+    zones = ["morning", "daytime", "evening", "night"]
+    summary = [
+        dict(zip(MONTHLY_SUMMARY_COLUMNS, [
+            t,
+            inst.pref_count[t],
+            sol.totalM[t] * slot / 60,
+            *(sol.zone_counts[z][t] * slot / 60 for z in zones),
+        ]))
+        for t in inst.teams
+    ]
+    return sorted(summary, key=lambda r: r["合計時間(h)"], reverse=True)
+
+
+def write_monthly_summary(inst: Instance, sol: Solution, out_run_dir: Path) -> list[dict]:
+    """monthly_summary_rows を CSV に書き、その行を返す"""
+    summary_sorted = monthly_summary_rows(inst, sol)
+    out_path = out_run_dir / f"monthly_summary_{inst.run_tag}.csv"
+    _write_csv(out_path, MONTHLY_SUMMARY_COLUMNS, summary_sorted)
+
+    print("\n=== Monthly totals (hours) ===")
+    print(f"\nSaved: {out_path}")
+    return summary_sorted
+
+
+# ============================================================
+# 5. カレンダー出力（HTML + 画像PNG/PDF）チーム色つき・表示改善版
+#  - HTML: チームごとに色付け
+#  - 画像: matplotlib.table を使わず「枠+テキスト」を自前描画（潰れにくい）
+# ============================================================
+def _calendar_team_color(team: str) -> str:
+    return TEAM_COLORS.get(team, "#333333")
+
+dow_jp = ["月", "火", "水", "木", "金", "土", "日"]
+
+
+# ------------------------------------------------------------
+# 日ごとの割当を「連続ブロック」で取得（チーム色付け用の構造体）
+#     戻り値: list[dict] 例:
+#        [{"team": "ULIS...", "s": 510, "e": 600, "is_event": True}, ...]
+#     特殊状態:
+#        [{"special": "希望団体なし"}] / [{"special": "(利用不可)"}]
+# ------------------------------------------------------------
+def build_day_blocks(inst: Instance, sol: Solution, d, pref_zero_days):
+    ts = inst.slots_by_day.get(d, [])
+
+    if d in pref_zero_days:
+        return [{"special": "希望団体なし"}]
+
+    if not ts:
+        return [{"special": "(利用不可)"}]
+
+    event_days_by_team = inst.event_days_by_team
+    out = []
+    for team, s, e in day_blocks(inst, sol, d):
+        out.append({
+            "team": team,
+            "s": s,
+            "e": e,
+            "is_event": ((team, d) in event_days_by_team),
+        })
+
+    return out if out else [{"special": "(利用不可)"}]
+
+
+def calendar_weeks(inst: Instance):
+    cal = calendar.Calendar(firstweekday=0)  # 0=月曜開始
+    return cal.monthdatescalendar(inst.year, inst.month)
+
+
+# ------------------------------------------------------------
+# HTML生成（色付き）
+# ------------------------------------------------------------
+def calendar_to_html(inst: Instance, sol: Solution, weeks, title="体育館利用スケジュール"):
+    pref_zero_days = inst.pref_zero_days()
+
+    # セルHTMLを組み立てる（改行は <br> ではなく div にして崩れにくくする）
+    def cell_html(d):
+        if d.month != inst.month:
+            return ""
+        blocks = build_day_blocks(inst, sol, d, pref_zero_days)
+
+        parts = [f'<div class="daynum">{d.day}</div>']
+
+        # special
+        if blocks and "special" in blocks[0]:
+            msg = _html.escape(blocks[0]["special"])
+            parts.append(f'<div class="special">{msg}</div>')
+            return "\n".join(parts)
+
+        # normal blocks
+        for b in blocks:
+            team = b["team"]
+            color = _calendar_team_color(team)
+            mark = "★" if b["is_event"] else ""
+            line = f'{tstr(b["s"])}-{tstr(b["e"])} {mark}{team}'
+            parts.append(f'<div class="line" style="color:{color};">{_html.escape(line)}</div>')
+
+        return "\n".join(parts)
+
+    # table body
+    body_rows = []
+    for w in weeks:
+        tds = []
+        for d in w:
+            tds.append(f"<td>{cell_html(d)}</td>")
+        body_rows.append("<tr>" + "".join(tds) + "</tr>")
+
+    thead = "<tr>" + "".join([f"<th>{h}</th>" for h in dow_jp]) + "</tr>"
+
+    html_doc = f"""<!doctype html>
+<html lang="ja">
+<head>
+  <meta charset="utf-8">
+  <title>{_html.escape(title)}</title>
+  <style>
+    body {{
+      font-family: "Meiryo", "Hiragino Kaku Gothic ProN", "Noto Sans CJK JP", sans-serif;
+      padding: 20px;
+      color: #222;
+    }}
+    h1 {{ font-size: 22px; margin: 0 0 12px 0; }}
+    .note {{ font-size:12px; color:#666; margin-top:10px; }}
+
+    table.calendar {{
+      border-collapse: collapse;
+      width: 100%;
+      table-layout: fixed;
+    }}
+    table.calendar th, table.calendar td {{
+      border: 1px solid #999;
+      vertical-align: top;
+      padding: 6px;
+      font-size: 12px;
+      line-height: 1.35;
+      overflow: hidden;
+    }}
+    table.calendar th {{
+      background: #f0f0f0;
+      text-align: center;
+      font-weight: bold;
+      padding: 10px 0;
+    }}
+    table.calendar td {{
+      height: 140px;
+      background: #fff;
+    }}
+    .daynum {{
+      font-weight: 700;
+      margin-bottom: 4px;
+      color: #333;
+    }}
+    .line {{
+      white-space: nowrap;
+      overflow: hidden;
+      text-overflow: ellipsis;
+    }}
+    .special {{
+      color: #777;
+      font-weight: 600;
+    }}
+  </style>
+</head>
+<body>
+  <h1>{_html.escape(title)}（{inst.year}年{inst.month}月）</h1>
+  <table class="calendar">
+    <thead>{thead}</thead>
+    <tbody>
+      {"".join(body_rows)}
+    </tbody>
+  </table>
+  <div class="note">★ はイベント確定枠</div>
+</body>
+</html>
+"""
+    return html_doc
+
+
+def write_calendar_html(inst: Instance, sol: Solution, out_run_dir: Path) -> None:
+    html_str = calendar_to_html(inst, sol, calendar_weeks(inst), title="体育館利用スケジュール")
+    out_html = out_run_dir / f"calendar_{inst.run_tag}.html"
+    with open(out_html, "w", encoding="utf-8") as f:
+        f.write(html_str)
+
+    print(f"[保存完了] {out_html}")
+    print("→ ブラウザで開くとカレンダーが表示されます。")
+
+
+# 書き出せる成果物の種類（render の formats / rerender の --only）
+ARTIFACT_FORMATS = ("csv", "html", "png", "pdf")
+
+
+# ============================================================
+# 画像をプロセスプールで描く
+#   画像は1枚ごとに別のワーカーで描く（CSV / HTML は数ミリ秒なので親プロセスで書く）。
+#   出力後の時間は全画像の合計ではなく、いちばん遅い画像（たいていガント）で決まる。
+# ============================================================
+@dataclass
+class FigureJob:
+    name: str                  # metrics に記録する名前（render.gantt など）
+    func: str                  # allocator.figures の関数名
+    args: tuple
+    saved: tuple = ()          # 描き終わったら [保存完了] と表示するパス
+
+
+def _figure_task(job: FigureJob) -> tuple[str, PhaseTiming]:
+    """ワーカーで1枚描き、画面表示と（ワーカーの中で測った）時間を返す"""
+    w0, c0 = time.perf_counter(), time.process_time()
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        from allocator import figures
+
+        getattr(figures, job.func)(*job.args)
+        for path in job.saved:
+            print(f"[保存完了] {path}")
+    timing = PhaseTiming(
+        name=job.name,
+        wall_s=round(time.perf_counter() - w0, 4),
+        cpu_s=round(time.process_time() - c0, 4),
+        peak_rss_mb=peak_rss_mb(),
+    )
+    return buf.getvalue(), timing
+
+
+def render_figures(jobs: list[FigureJob], workers: int | None = None, metrics: RunMetrics | None = None) -> None:
+    """
+    jobs を同時に描く。workers: 同時に描く枚数（既定: CPU 数。1 ならこのプロセスで順に描く）。
+    画面表示は jobs の順にまとめて出す。時間は成果物ごとに metrics に入れる。
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    run_map = executor.map if executor else map
+    try:
+        for text, timing in run_map(_figure_task, jobs):
+            print(text, end="")
+            if metrics is not None:
+                metrics.phases.append(timing)
+    finally:
+        if executor:
+            executor.shutdown()
+
+
+# ============================================================
+# まとめて出力
+# ============================================================
+def render(
+    inst: Instance,
+    sol: Solution,
+    out_run_dir: Path,
+    weights: Weights | None = None,
+    no_gantt: bool = False,
+    options: ModelOptions | None = None,
+    breakdown: dict | None = None,
+    metrics: RunMetrics | None = None,
+    workers: int | None = None,
+    formats: Collection[str] | None = None,
+    written: list[Path] | None = None,
+) -> dict:
+    """
+    解から全成果物（CSV / HTML / 画像）を out_run_dir に書き出す。
+    no_gantt=True のときは画像(PNG/PDF)のみスキップ（CSV / HTML は保存）。
+    breakdown: モデルから読んだ内訳（breakdown_from_model）。無ければ解から計算し直す。
+    metrics: 渡されたら成果物ごとの時間を render.<名前> として記録する（画像はワーカーの中で測った時間）。
+    workers: 画像を同時に描くプロセス数（render_figures 参照）。
+    formats: 書き出す種類（ARTIFACT_FORMATS の部分集合。未指定なら全部）。
+    written: 渡されたら、この呼び出しで書き出したファイルのパスを足していく（キャッシュに入れるファイル）。
+    戻り値は目的関数の内訳 dict。
+    """
+    formats = set(ARTIFACT_FORMATS if formats is None else formats)
+    unknown = formats - set(ARTIFACT_FORMATS)
+    if unknown:
+        raise ValueError(f"formats は {ARTIFACT_FORMATS} から: {sorted(unknown)}")
+    if no_gantt:
+        formats -= {"png", "pdf"}
+
+    out_run_dir.mkdir(parents=True, exist_ok=True)
+    run_tag = inst.run_tag
+    weights = weights or Weights()
+    phase = (metrics or RunMetrics()).phase
+    written = [] if written is None else written
+
+    with phase("render.breakdown"):
+        bd = render_breakdown(inst, sol, weights, options, breakdown)
+
+    with phase("render.schedule_csv"):
+        if "csv" in formats:
+            write_schedule_csv(inst, sol, out_run_dir)
+            schedule_by_team = write_schedule_by_team_csv(inst, sol, out_run_dir)
+            written += [out_run_dir / f"schedule_{run_tag}.csv", out_run_dir / f"schedule_by_team_{run_tag}.csv"]
+        else:
+            schedule_by_team = schedule_by_team_rows(inst, sol)
+        draw_rows = build_transcription_rows(schedule_by_team)
+
+    with phase("render.monthly_summary"):
+        if "csv" in formats:
+            summary_rows = write_monthly_summary(inst, sol, out_run_dir)
+            written.append(out_run_dir / f"monthly_summary_{run_tag}.csv")
+        else:
+            summary_rows = monthly_summary_rows(inst, sol)
+
+    if "html" in formats:
+        print("\n" + "=" * 60)
+        print("【カレンダー出力（HTML + 画像：チーム色つき）】")
+        print("=" * 60)
+
+        with phase("render.calendar_html"):
+            write_calendar_html(inst, sol, out_run_dir)
+            written.append(out_run_dir / f"calendar_{run_tag}.html")
+
+    if no_gantt:
+        print("[INFO] --no-gantt specified: group schedule image export skipped.")
+        print("[INFO] --no-gantt 指定のため、カレンダー画像(PNG/PDF)の出力をスキップしました。")
+    if not formats & {"png", "pdf"}:
+        return bd
+
+    def paths(stem: str) -> tuple[Path | None, Path | None]:
+        """formats に入っている画像の種類だけパスを返す（入っていないほうは None = 保存しない）"""
+        png = out_run_dir / f"{stem}_{run_tag}.png" if "png" in formats else None
+        pdf = out_run_dir / f"{stem}_{run_tag}.pdf" if "pdf" in formats else None
+        return png, pdf
+
+    breakdown_png, breakdown_pdf = paths("objective_breakdown_used_only")
+    calendar_png, calendar_pdf = paths("calendar")
+    summary_png, _ = paths("monthly_summary")
+    # 時間のかかる順に並べる（ワーカーが画像の数より少ないとき、遅い画像を先に始める）
+    jobs = [
+        FigureJob("render.gantt", "save_gantt", (inst, sol, *paths("gantt"))),
+        FigureJob("render.group_schedule", "save_group_schedule_image", (draw_rows, *paths("group_schedule"))),
+        FigureJob(
+            "render.calendar_image", "save_calendar_image",
+            (inst, sol, calendar_weeks(inst), calendar_png, calendar_pdf, "体育館利用スケジュール"),
+            saved=tuple(p for p in (calendar_png, calendar_pdf) if p),
+        ),
+        FigureJob(
+            "render.breakdown_image", "save_text_image",
+            (format_breakdown(bd, weights), breakdown_png, breakdown_pdf, "Objective Breakdown (used-only)"),
+            saved=tuple(p for p in (breakdown_png, breakdown_pdf) if p),
+        ),
+    ]
+    if summary_png is not None:  # 月次集計の表は PNG だけ
+        jobs.insert(3, FigureJob("render.monthly_summary_image", "save_monthly_summary_image", (summary_rows, summary_png)))
+    # matplotlib は親で読み込んでからワーカーを作る（fork ならワーカーは読み込み済みの状態から始まる）
+    import allocator.figures  # noqa: F401
+
+    with phase("render.images"):
+        render_figures(jobs, workers, metrics)
+    written += [a for job in jobs for a in job.args if isinstance(a, Path)]
+    return bd
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+# ============================================================
+# 保存した解から出力だけ作り直す（python sourcecode/main.py render output/YYYY-MM）
+#   output/YYYY-MM/ の solution_YYYY-MM.json と、実行時のスナップショット
+#   （config_used.yaml / preferences_used.json / events_used.json）だけを読む。
+#   OR-Tools は読み込まず、解き直さない（色・レイアウトを直したときや、画像を消してしまったとき用）。
+# ============================================================
+from pathlib import Path
+from typing import Collection
+
+from allocator.instance import load_instance, snapshot_paths
+from allocator.metrics import RunMetrics
+from allocator.options import ModelOptions, Weights
+from allocator.render import render
+from allocator.solution import load_solution_json
+
+
+def rerender(
+    run_dir: Path,
+    formats: Collection[str] | None = None,
+    out_dir: Path | None = None,
+    solution_path: Path | None = None,
+    workers: int | None = None,
+    metrics: RunMetrics | None = None,
+) -> dict:
+    """
+    run_dir（output/YYYY-MM/）の解とスナップショットから成果物を out_dir（既定: run_dir）に書き出す。
+    formats: csv / html / png / pdf の部分集合（未指定なら全部）。
+    solution_path: 既定は run_dir/solution_YYYY-MM.json。
+    重み・定式化・内訳は解と一緒に保存したものを使う（古い解で無ければ config_used.yaml から作る）。
+    戻り値は目的関数の内訳 dict。
+    """
+    config_path, pref_path, event_path = snapshot_paths(run_dir)
+    for p in (config_path, pref_path, event_path):
+        if not p.exists():
+            raise FileNotFoundError(f"スナップショットがありません: {p}")
+    inst = load_instance(config_path, run_dir, pref_path=pref_path, event_path=event_path, metrics=metrics)
+
+    solution_path = solution_path or run_dir / f"solution_{inst.run_tag}.json"
+    if not solution_path.exists():
+        raise FileNotFoundError(f"解のファイルがありません: {solution_path}")
+    sol, saved = load_solution_json(inst, solution_path)
+    weights = Weights(**saved["weights"]) if saved.get("weights") else Weights.from_config(inst.config)
+    options = ModelOptions(**saved["options"]) if saved.get("options") else ModelOptions.from_config(inst.config)
+
+    return render(
+        inst, sol, out_dir or run_dir, weights=weights, options=options, breakdown=saved.get("breakdown"),
+        metrics=metrics, workers=workers, formats=formats,
+    )
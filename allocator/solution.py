@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+# ============================================================
+# 解の取り出し（ソルバーから値を読むのはここだけ）
+# ============================================================
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from allocator.instance import ZONES, Instance, tm, tstr
+from allocator.options import ModelOptions, Weights
+
+if TYPE_CHECKING:  # 出力だけ作るとき（allocator.rerender）は OR-Tools を読み込まない
+    from ortools.sat.python import cp_model
+
+    from allocator.model import AllocModel
+    from allocator.solve import SolveResult
+
+
+@dataclass
+class Solution:
+    """
+    ソルバーの値を素の Python 値に写したもの（pickle 可能）。
+    描画・CSV 出力はすべてこれを参照し、solver には触らない。
+    """
+    status_name: str
+    objective: float | None
+    x: dict[tuple[str, date, int], int] = field(default_factory=dict)
+    y: dict[tuple[str, date], int] = field(default_factory=dict)
+    U: dict[tuple[str, date], int] = field(default_factory=dict)
+    totalM: dict[str, int] = field(default_factory=dict)
+    zone_counts: dict[str, dict[str, int]] = field(default_factory=dict)
+    # grid[日の添字, (時刻 - grid_t0) // slot] = inst.teams の添字（UNASSIGNED: 未割当、CLOSED: 利用不可）
+    # CSV / HTML / 画像はすべてここからブロックを作る（day_timeline / day_blocks）
+    grid: np.ndarray | None = None
+    grid_t0: int = 0
+
+
+UNASSIGNED = -1
+CLOSED = -2
+
+
+def build_grid(inst: Instance, used) -> tuple[np.ndarray, int]:
+    """x=1 の (team, day, time) の並びから、日 × 時刻 → 団体番号 の配列を作る"""
+    starts = [inst.slots_by_day[d][0] for d in inst.days if inst.slots_by_day[d]]
+    ends = [inst.slots_by_day[d][-1] + inst.slot for d in inst.days if inst.slots_by_day[d]]
+    t0 = min(starts, default=0)
+    width = (max(ends, default=t0) - t0) // inst.slot
+    grid = np.full((len(inst.days), width), CLOSED, dtype=np.int16)
+
+    day_index = {d: i for i, d in enumerate(inst.days)}
+    team_index = {team: i for i, team in enumerate(inst.teams)}
+    for i, d in enumerate(inst.days):
+        cols = (np.asarray(inst.slots_by_day[d], dtype=np.int64) - t0) // inst.slot
+        grid[i, cols] = UNASSIGNED
+    for team, d, t in used:
+        grid[day_index[d], (t - t0) // inst.slot] = team_index[team]
+    return grid, t0
+
+
+def day_timeline(inst: Instance, sol: Solution, d: date) -> list[tuple[str | None, int, int]]:
+    """
+    その日の利用可能時間を (team, start, end) の連続区間に分ける。
+    未割当の区間は team=None。利用禁止時間帯をはさむ区間は分ける。
+    """
+    row = sol.grid[inst.days.index(d)]
+    cuts = np.flatnonzero(np.diff(row)) + 1
+    out = []
+    for a, b in zip(np.r_[0, cuts], np.r_[cuts, len(row)]):
+        v = int(row[a])
+        if v == CLOSED:
+            continue
+        team = None if v == UNASSIGNED else inst.teams[v]
+        out.append((team, sol.grid_t0 + int(a) * inst.slot, sol.grid_t0 + int(b) * inst.slot))
+    return out
+
+
+def assignment_values(inst: Instance, am: AllocModel, solver: cp_model.CpSolver) -> dict[tuple[str, date, int], int]:
+    """
+    変数のある (団体, 日) の全スロットについて x の値を読む。
+    interval 版（x 変数なし）は start_time と U からブロックを復元する。
+    """
+    if am.options.block == "slots":
+        return {k: solver.Value(v) for k, v in am.x.items()}
+
+    out = {}
+    for (team, d), yv in am.y.items():
+        if (team, d) not in am.start_time:  # スロットのない日
+            continue
+        s = solver.Value(am.start_time[(team, d)])
+        e = s + inst.slot * solver.Value(am.U[(team, d)]) if solver.Value(yv) else s
+        for t in inst.slots_by_day[d]:
+            out[(team, d, t)] = 1 if s <= t < e else 0
+    return out
+
+
+def extract_solution(inst: Instance, am: AllocModel, result: SolveResult) -> Solution:
+    if not result.has_solution:
+        raise RuntimeError("解が見つかりませんでした（制約が厳しすぎる可能性）")
+
+    solver = result.solver
+    # 変数を作らなかった (団体, 日) は 0 で埋めて、全団体×全日×全スロットの dict にする
+    x = {(team, d, t): 0 for d in inst.days for t in inst.slots_by_day[d] for team in inst.teams}
+    x.update(assignment_values(inst, am, solver))
+    U = {(team, d): 0 for d in inst.days for team in inst.teams}
+    U.update({k: solver.Value(v) for k, v in am.U.items()})
+    y = {(team, d): 0 for d in inst.days for team in inst.teams}
+    y.update({k: solver.Value(v) for k, v in am.y.items()})
+    grid, t0 = build_grid(inst, [k for k, v in x.items() if v])
+    return Solution(
+        status_name=result.status_name,
+        objective=result.objective,
+        grid=grid,
+        grid_t0=t0,
+        x=x,
+        y=y,
+        U=U,
+        totalM={t: solver.Value(v) for t, v in am.totalM.items()},
+        zone_counts={
+            z: {t: solver.Value(v) for t, v in per_team.items()}
+            for z, per_team in am.zone_counts.items()
+        },
+    )
+
+
+def solution_from_assignment(
+    inst: Instance,
+    assigned: dict[tuple[str, date, int], int],
+    status_name: str,
+    objective: float | None = None,
+) -> Solution:
+    """
+    x の値（割当）だけから Solution を組み立てる。
+    U / y / totalM / zone_counts は x から決まるので再計算する。
+    """
+    x = {}
+    U, y = {}, {}
+    totalM = {team: 0 for team in inst.teams}
+    zone_counts = {z: {team: 0 for team in inst.teams} for z in ZONES}
+    for d in inst.days:
+        for team in inst.teams:
+            u = 0
+            for t in inst.slots_by_day[d]:
+                v = int(assigned.get((team, d, t), 0))
+                x[(team, d, t)] = v
+                if v:
+                    u += 1
+                    for z, pred in ZONES.items():
+                        if pred(t):
+                            zone_counts[z][team] += 1
+            U[(team, d)] = u
+            y[(team, d)] = 1 if u > 0 else 0
+            totalM[team] += u
+
+    grid, t0 = build_grid(inst, [k for k, v in x.items() if v])
+    return Solution(
+        status_name=status_name,
+        objective=objective,
+        grid=grid,
+        grid_t0=t0,
+        x=x,
+        y=y,
+        U=U,
+        totalM=totalM,
+        zone_counts=zone_counts,
+    )
+
+
+def day_blocks(inst: Instance, sol: Solution, d: date) -> list[tuple[str, int, int]]:
+    """その日の割当を (team, start, end) の連続ブロックにまとめる（未割当は含めない）"""
+    return [(team, s, e) for team, s, e in day_timeline(inst, sol, d) if team is not None]
+
+
+def save_solution_json(
+    inst: Instance,
+    sol: Solution,
+    path: Path,
+    weights: Weights | None = None,
+    options: ModelOptions | None = None,
+    breakdown: dict | None = None,
+) -> None:
+    """
+    解を連続ブロックの形で保存する（次回のヒントと、出力の作り直し allocator.rerender に使う）。
+    weights / options / breakdown: 解いたときの重み・定式化・モデルから読んだ内訳（作り直しても同じ内訳を出すため）。
+    """
+    blocks = []
+    for d in inst.days:
+        for team, s, e in day_blocks(inst, sol, d):
+            blocks.append({"team": team, "date": d.isoformat(), "start": tstr(s), "end": tstr(e)})
+
+    data = {
+        "run_tag": inst.run_tag,
+        "slot": inst.slot,
+        "status": sol.status_name,
+        "objective": sol.objective,
+        "weights": asdict(weights) if weights is not None else None,
+        "options": asdict(options) if options is not None else None,
+        "breakdown": breakdown,
+        "blocks": blocks,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_solution_json(inst: Instance, path: Path) -> tuple[Solution, dict[str, Any]]:
+    """
+    save_solution_json で保存した解を読み、x から U / y / 合計を作り直した Solution と、読んだ JSON をそのまま返す。
+    inst は解いたときと同じ入力（output/YYYY-MM/ のスナップショット）から作ったもの。
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("run_tag") != inst.run_tag:
+        raise ValueError(f"{path.name} は {data.get('run_tag')} の解です（入力は {inst.run_tag}）")
+    if int(data.get("slot", inst.slot)) != inst.slot:
+        raise ValueError(f"{path.name} のスロットは {data['slot']} 分です（入力は {inst.slot} 分）")
+
+    assigned = {}
+    for b in data.get("blocks", []):
+        d = date.fromisoformat(b["date"])
+        for t in range(tm(b["start"]), tm(b["end"]), inst.slot):
+            if t not in inst.slots_by_day.get(d, ()) or b["team"] not in inst.teams:
+                raise ValueError(f"{path.name} の {b['team']} {b['date']} {b['start']}-{b['end']} が入力の利用可能時間と合いません")
+            assigned[(b["team"], d, t)] = 1
+    sol = solution_from_assignment(inst, assigned, data.get("status", "UNKNOWN"), data.get("objective"))
+    return sol, data
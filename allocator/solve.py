@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+# ============================================================
+# Solve
+# ============================================================
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from ortools.sat.python import cp_model
+
+from allocator.model import OBJECTIVE_LEVELS, AllocModel
+from allocator.progress import SearchLog
+
+logger = logging.getLogger("kasuga_gym")
+
+
+@dataclass
+class SolveResult:
+    status: int
+    status_name: str
+    objective: float | None
+    best_bound: float | None
+    wall_time: float
+    solver: cp_model.CpSolver
+    stages: list[dict] = field(default_factory=list)  # 辞書式に解いたときの段ごとの結果
+    stop_reason: str | None = None  # optimal / infeasible / rel_gap / abs_gap / no_improve / target / time_limit
+
+    @property
+    def has_solution(self) -> bool:
+        return self.status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+
+@dataclass(frozen=True)
+class StopRules:
+    """
+    max_solve_seconds より前に打ち切る条件（config.yaml の stop: で指定、どれも省略可）。
+      rel_gap:            (上界 - 目的値) / |上界| がこれ以下で終了（CP-SAT の relative_gap_limit）
+      abs_gap:            上界 - 目的値 がこれ以下で終了（absolute_gap_limit）
+      no_improve_seconds: 最後に改善解が見つかってからこの秒数たっても改善しなければ終了
+      target_objective:   目的値がこれ以上の解が見つかったら終了（重み付き和のときだけ）
+    """
+    rel_gap: float | None = None
+    abs_gap: float | None = None
+    no_improve_seconds: float | None = None
+    target_objective: float | None = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> StopRules:
+        given = config.get("stop") or {}
+        unknown = set(given) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"unknown stop rules: {sorted(unknown)}")
+        return cls(**{k: float(v) for k, v in given.items() if v is not None})
+
+    @property
+    def needs_monitor(self) -> bool:
+        """解が見つかるたびの確認（コールバック）が要るか（ギャップは CP-SAT 側で判定する）"""
+        return self.no_improve_seconds is not None or self.target_objective is not None
+
+    def apply(self, params) -> None:
+        if self.rel_gap is not None:
+            params.relative_gap_limit = self.rel_gap
+        if self.abs_gap is not None:
+            params.absolute_gap_limit = self.abs_gap
+
+
+class SearchMonitor(cp_model.CpSolverSolutionCallback):
+    """
+    改善解ごとに呼ばれるコールバックの共通部分。StopRules のうち
+    「改善なし N 秒」と「目標値到達」をここで判定して StopSearch する。
+    途中の解を使いたいとき（incumbents.IncumbentWriter など）は on_incumbent を上書きする。
+    """
+
+    def __init__(self, rules: StopRules | None = None):
+        super().__init__()
+        self.rules = rules or StopRules()
+        self.stop_reason: str | None = None
+        self.use_target = True  # 辞書式の段では目的関数が違うので使わない
+        self.count = 0            # 見つかった解の数（全段の合計）
+        self._found = False       # 今の Solve で解が見つかったか
+        self._last_improve = time.monotonic()
+        self._done = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    def on_incumbent(self) -> None:
+        pass
+
+    def on_solution_callback(self) -> None:
+        self.count += 1
+        self._found = True
+        self._last_improve = time.monotonic()
+        self.on_incumbent()
+        target = self.rules.target_objective
+        if self.use_target and target is not None and self.ObjectiveValue() >= target:
+            self._stop("target")
+
+    def begin(self) -> None:
+        """Solve の直前に呼ぶ（改善なしの時計を始める）"""
+        self.stop_reason = None
+        self._found = False
+        self._last_improve = time.monotonic()
+        self._done.clear()
+        if self.rules.no_improve_seconds is not None:
+            self._watchdog = threading.Thread(target=self._watch, daemon=True)
+            self._watchdog.start()
+
+    def end(self) -> None:
+        self._done.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def _watch(self) -> None:
+        # 解が見つからない間は待ち続ける（改善なしで止めるのは解が1つでもあるときだけ）
+        limit = self.rules.no_improve_seconds
+        while not self._done.wait(min(0.2, limit)):
+            if self._found and time.monotonic() - self._last_improve >= limit:
+                self._stop("no_improve")
+                return
+
+    def _stop(self, reason: str) -> None:
+        if self.stop_reason is None:
+            self.stop_reason = reason
+            self.StopSearch()
+
+
+def _run(
+    solver: cp_model.CpSolver, model: cp_model.CpModel, monitor: SearchMonitor | None, progress: SearchLog | None = None,
+) -> int:
+    if progress is not None:
+        progress.attach(solver)
+    try:
+        if monitor is None:
+            return solver.Solve(model)
+        monitor.begin()
+        try:
+            return solver.Solve(model, monitor)
+        finally:
+            monitor.end()
+    finally:
+        if progress is not None:
+            progress.finish(solver)
+
+
+def _stop_reason(status: int, solver: cp_model.CpSolver, monitor: SearchMonitor | None, rules: StopRules) -> str:
+    """なぜ Solve が終わったか（ギャップで止めたときも CP-SAT の status は OPTIMAL になる）"""
+    if monitor is not None and monitor.stop_reason:
+        return monitor.stop_reason
+    if status == cp_model.INFEASIBLE:
+        return "infeasible"
+    if status == cp_model.OPTIMAL:
+        gap = abs(solver.BestObjectiveBound() - solver.ObjectiveValue())
+        if gap < 1e-9:
+            return "optimal"
+        if rules.abs_gap is not None and gap <= rules.abs_gap:
+            return "abs_gap"
+        return "rel_gap"
+    return "time_limit"
+
+
+def solve(
+    am: AllocModel,
+    max_solve_seconds: float,
+    repair_hint: bool = False,
+    callback: SearchMonitor | None = None,
+    stop: StopRules | None = None,
+    seed: int = 0,
+    num_workers: int = 0,
+    progress: SearchLog | None = None,
+) -> SolveResult:
+    """
+    構築済みモデルを CP-SAT で解く（解なしでも例外は出さない）。
+    repair_hint=True: ヒント（前回の解）が新しい制約と矛盾しても、近い解を探して直す。
+    callback: 改善解が見つかるたびに呼ばれる（例: incumbents.IncumbentWriter）。
+    stop: 時間切れより前に打ち切る条件。callback があればその rules も上書きする。
+    seed: CP-SAT の random_seed（キャッシュした解を同じ設定で再現しやすくするため固定する）。
+    num_workers: CP-SAT の探索スレッド数（0 なら OR-Tools の既定。複数の月を同時に解くときに絞る）。
+    progress: 渡されたら探索ログを有効にして run.log に書き、改善の時系列をためる。
+    """
+    stop = stop or StopRules()
+    monitor = callback if callback is not None or not stop.needs_monitor else SearchMonitor()
+    if monitor is not None:
+        monitor.rules = stop
+
+    solver = cp_model.CpSolver() #CP-SAT起動
+    solver.parameters.max_time_in_seconds = max_solve_seconds #計算に使う時間の指定（60秒）
+    if repair_hint:
+        solver.parameters.repair_hint = True
+    solver.parameters.random_seed = seed
+    if num_workers:
+        solver.parameters.num_workers = num_workers
+    stop.apply(solver.parameters)
+    status = _run(solver, am.model, monitor, progress) #問題を解く（実行）
+    status_name = solver.StatusName(status)
+    stop_reason = _stop_reason(status, solver, monitor, stop)
+    logger.info("status=%s stop=%s time=%.2fs", status_name, stop_reason, solver.WallTime())
+    print("status:", status_name) #解の表示（OPTIMAL:最適解発見,FEASIBLE:最適とは限らないが解あり,INFEASIBLE:制約が厳しくて解なし,UNKNOWN:時間切れ等で不明）
+
+    has_solution = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return SolveResult(
+        status=status,
+        status_name=status_name,
+        objective=solver.ObjectiveValue() if has_solution else None,
+        best_bound=solver.BestObjectiveBound() if has_solution else None,
+        wall_time=solver.WallTime(),
+        solver=solver,
+        stop_reason=stop_reason,
+    )
+
+
+def stage_seconds_from_config(config: dict, total_seconds: float) -> dict[str, float]:
+    """
+    段ごとの求解時間。config.yaml の lex_seconds（例: {idle: 10, team: 10, fairness: 40}）で指定し、
+    無い段は total_seconds を段数で割った値にする。
+    """
+    given = config.get("lex_seconds") or {}
+    default = float(total_seconds) / len(OBJECTIVE_LEVELS)
+    return {level: float(given.get(level, default)) for level in OBJECTIVE_LEVELS}
+
+
+def _hint_current_solution(am: AllocModel, solver: cp_model.CpSolver) -> None:
+    """直前の段の解を、次の段のヒントとして全変数に入れる"""
+    model = am.model
+    model.ClearHints()
+    for i in range(len(model.Proto().variables)):
+        var = model.GetIntVarFromProtoIndex(i)
+        model.AddHint(var, solver.Value(var))
+
+
+def solve_lexicographic(
+    am: AllocModel,
+    stage_seconds: dict[str, float],
+    repair_hint: bool = False,
+    callback: SearchMonitor | None = None,
+    stop: StopRules | None = None,
+    seed: int = 0,
+    num_workers: int = 0,
+    progress: SearchLog | None = None,
+) -> SolveResult:
+    """
+    OBJECTIVE_LEVELS の順に1段ずつ最大化し、得た値を制約で固定してから次の段へ進む。
+    重みの桁が大きく違う項を1つの目的関数に混ぜないので、段ごとに最適性を証明しやすい。
+    objective は最後に解けた段の解を重み付きの合計で評価した値。
+    途中の段で解が見つからなければ、そこまでで見つかった解を返す（status は FEASIBLE）。
+    callback は全段で共有し、stage 属性があれば今の段の名前を入れる。
+    stop の条件は段ごとに判定する（target_objective は段ごとに目的関数が違うので使わない）。
+    progress は全段で共有し、stage に今の段の名前を入れる（時刻は段をまたいだ通算）。
+    """
+    stop = stop or StopRules()
+    monitor = callback if callback is not None or stop.no_improve_seconds is None else SearchMonitor()
+    if monitor is not None:
+        monitor.rules = stop
+        monitor.use_target = False
+    model = am.model
+    stages = []
+    solver = found = None  # found: 最後に解が見つかった段の solver
+
+    for level in OBJECTIVE_LEVELS:
+        terms = am.obj_levels.get(level, [])
+        if not terms:
+            continue
+
+        model.Maximize(cp_model.LinearExpr.Sum(terms))
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = stage_seconds[level]
+        if repair_hint and found is None:
+            solver.parameters.repair_hint = True
+        solver.parameters.random_seed = seed
+        if num_workers:
+            solver.parameters.num_workers = num_workers
+        stop.apply(solver.parameters)
+        if hasattr(monitor, "stage"):
+            monitor.stage = level
+        if progress is not None:
+            progress.stage = level
+        status = _run(solver, model, monitor, progress)
+        has_solution = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+        stage = {
+            "level": level,
+            "status": solver.StatusName(status),
+            "value": int(solver.Value(cp_model.LinearExpr.Sum(terms))) if has_solution else None,
+            "bound": int(solver.BestObjectiveBound()) if has_solution else None,
+            "wall_time": round(solver.WallTime(), 3),
+            "stop_reason": _stop_reason(status, solver, monitor, stop),
+        }
+        stages.append(stage)
+        logger.info(
+            "lex stage=%s status=%s value=%s bound=%s time=%.2fs stop=%s",
+            level, stage["status"], stage["value"], stage["bound"], solver.WallTime(), stage["stop_reason"],
+        )
+        if not has_solution:
+            break
+
+        found = solver
+        model.Add(cp_model.LinearExpr.Sum(terms) >= stage["value"])  # この段の値を固定
+        _hint_current_solution(am, solver)
+
+    if found is None:
+        status, status_name = (status, stages[-1]["status"]) if stages else (cp_model.UNKNOWN, "UNKNOWN")
+    elif all(st["status"] == "OPTIMAL" for st in stages):
+        status, status_name = cp_model.OPTIMAL, "OPTIMAL"
+    else:
+        status, status_name = cp_model.FEASIBLE, "FEASIBLE"
+    stop_reason = stages[-1]["stop_reason"] if stages else None
+    logger.info("status=%s stop=%s", status_name, stop_reason)
+    print("status:", status_name)
+
+    return SolveResult(
+        status=status,
+        status_name=status_name,
+        objective=float(found.Value(cp_model.LinearExpr.Sum(am.obj))) if found else None,
+        best_bound=None,
+        wall_time=sum(st["wall_time"] for st in stages),
+        solver=found or solver,
+        stages=stages,
+        stop_reason=stop_reason,
+    )
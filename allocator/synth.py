@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+# ============================================================
+# 合成インスタンスの生成（ベンチマーク用）
+#   団体数・開館日数・利用可能時間の型・希望の密度・イベント数を指定して、
+#   data/YYYY-MM/ と同じ形の config.yaml / preferences.json / events.json を作る。
+#   seed が同じなら同じファイルになる。
+# ============================================================
+import calendar
+import json
+import random
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from allocator.instance import tm, tstr
+
+# 利用可能時間の型: 曜日（0=月 … 6=日）ごとの候補 (開始, 終了, 利用禁止開始, 利用禁止終了)
+AVAILABILITY_PATTERNS: dict[str, dict[str, list[tuple]]] = {
+    "evening": {  # 毎日夕方だけ
+        "weekday": [("17:00", "21:00", None, None)],
+        "weekend": [("17:00", "21:00", None, None)],
+    },
+    "full": {  # 毎日朝から夜まで
+        "weekday": [("08:30", "21:00", None, None)],
+        "weekend": [("08:30", "21:00", None, None)],
+    },
+    "mixed": {  # 実データに近い形（平日は短め、週末は長く昼に利用禁止が入ることがある）
+        "weekday": [("16:30", "18:00", None, None), ("13:30", "18:00", None, None),
+                    ("16:30", "19:00", None, None), ("17:00", "21:00", None, None)],
+        "weekend": [("11:00", "21:00", None, None), ("08:30", "21:00", "12:00", "13:00"),
+                    ("13:00", "21:00", None, None)],
+    },
+}
+
+
+@dataclass(frozen=True)
+class SynthSpec:
+    year: int = 2030
+    month: int = 4
+    teams: int = 8
+    open_days: int = 20        # 開館日数（残りの日は利用不可）
+    pattern: str = "mixed"     # AVAILABILITY_PATTERNS のキー
+    density: float = 0.4       # 各団体が各開館日を希望する確率（どの開館日も1団体以上が希望する）
+    events: int = 2            # イベント数（1日1件まで）
+    event_hours: int = 2
+    min_slots: int = 3
+    max_solve_seconds: int = 30
+    seed: int = 0
+
+    @property
+    def run_tag(self) -> str:
+        return f"{self.year:04d}-{self.month:02d}"
+
+
+def generate(spec: SynthSpec) -> tuple[dict[str, Any], dict[str, list[str]], list[dict[str, Any]]]:
+    """(config, preferences, events) を返す"""
+    if spec.pattern not in AVAILABILITY_PATTERNS:
+        raise ValueError(f"pattern は {sorted(AVAILABILITY_PATTERNS)} のいずれか: {spec.pattern}")
+    rng = random.Random(spec.seed)
+    pattern = AVAILABILITY_PATTERNS[spec.pattern]
+    _, last_day = calendar.monthrange(spec.year, spec.month)
+    days = [date(spec.year, spec.month, d) for d in range(1, last_day + 1)]
+    open_days = sorted(rng.sample(days, min(spec.open_days, last_day)))
+
+    availability: dict[str, list] = {}
+    for d in days:
+        if d in open_days:
+            kind = "weekend" if d.weekday() >= 5 else "weekday"
+            availability[str(d.day)] = list(rng.choice(pattern[kind]))
+        else:
+            availability[str(d.day)] = [None, None, None, None]
+
+    config = {
+        "year": spec.year,
+        "month": spec.month,
+        "min_slots": spec.min_slots,
+        "max_solve_seconds": spec.max_solve_seconds,
+        "availability": availability,
+    }
+
+    # 希望団体が0の開館日はカバーの制約を満たせないので、そういう日は1団体に希望させる
+    names = [f"team{i + 1:02d}" for i in range(spec.teams)]
+    wanted = {team: {d for d in open_days if rng.random() < spec.density} for team in names}
+    for d in open_days:
+        if not any(d in ds for ds in wanted.values()):
+            wanted[rng.choice(names)].add(d)
+    prefs = {team: [d.isoformat() for d in sorted(ds)] for team, ds in wanted.items() if ds}
+
+    # イベントは利用禁止の無い日の最初か最後に入れ、残りは最低利用時間以上にする
+    # （残りが短い・2つに分かれると、カバーと日内公平性を同時に満たせない INFEASIBLE になりやすい）
+    events = []
+    min_block, dur = 30 * spec.min_slots, 60 * spec.event_hours
+    candidates = [d for d in open_days if availability[str(d.day)][2] is None]
+    for d in rng.sample(candidates, len(candidates)):
+        if len(events) >= spec.events:
+            break
+        st, en, _, _ = availability[str(d.day)]
+        starts = [s for s in (tm(st), tm(en) - dur) if tm(en) - tm(st) - dur >= min_block]
+        if not starts:
+            continue
+        s = rng.choice(starts)
+        events.append({
+            "team": rng.choice(names),
+            "date": d.isoformat(),
+            "start": tstr(s),
+            "duration_hours": spec.event_hours,
+            "note": "synthetic",
+        })
+    return config, prefs, events
+
+
+def write_instance(spec: SynthSpec, out_dir: Path) -> Path:
+    """out_dir に config.yaml / preferences.json / events.json（と生成条件 synth.json）を書いて out_dir を返す"""
+    config, prefs, events = generate(spec)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+    for name, data in [("preferences.json", prefs), ("events.json", events), ("synth.json", asdict(spec))]:
+        with open(out_dir / name, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    return out_dir
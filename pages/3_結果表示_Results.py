@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+import json
 import os
 import re
 import pandas as pd
@@ -30,6 +31,23 @@ file_calendar = out_dir / f"calendar_{ym}.png"
 file_gantt = out_dir / f"gantt_{ym}.png"
 file_monthly_summary = out_dir / f"monthly_summary_{ym}.png"
 file_group_schedule = out_dir / f"group_schedule_{ym}.png"
+file_incumbent = out_dir / f"incumbent_{ym}.json"
+
+# --- 計算中の暫定結果（管理者ページで「暫定結果を書き出す」を選んだとき）---
+if file_incumbent.exists():
+    try:
+        inc = json.loads(file_incumbent.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        inc = None
+    if inc and not inc.get("final"):
+        st.info(
+            f"計算中です。暫定結果（{inc.get('solutions', 0)} 個目の解、{inc.get('wall_time', 0):.1f} 秒時点）を表示しています。"
+            f" / Solving in progress: showing incumbent #{inc.get('solutions', 0)} at {inc.get('wall_time', 0):.1f}s."
+        )
+        with st.expander("暫定結果 / Incumbent", expanded=True):
+            st.dataframe(pd.DataFrame(inc.get("blocks", [])), use_container_width=True, hide_index=True)
+            if st.button("🔄 更新 / Refresh"):
+                st.rerun()
 
 tab1, tab2, tab3, tab4 = st.tabs([
     "🔍 予約を検索・確認 / Search & View",
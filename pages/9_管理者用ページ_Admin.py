@@ -3,7 +3,9 @@ from __future__ import annotations
 
 from pathlib import Path
 import calendar
+import json
 from datetime import date as Date
+import pandas as pd
 import streamlit as st
 
 from ui_utils.month import resolve_ym, ym_selector
@@ -55,6 +57,35 @@ with col2:
         value=int(cfg.get("max_solve_seconds", 60))
     )
 
+ENGINES = ["monolithic", "decomposed"]
+cfg["engine"] = st.selectbox(
+    "engine（解き方 / solver engine）: monolithic=月全体を1モデル / decomposed=日ごとに分割（この画面から実行するときは日ごとに順に解く）",
+    ENGINES,
+    index=ENGINES.index(cfg.get("engine", "monolithic")) if cfg.get("engine", "monolithic") in ENGINES else 0,
+)
+
+with st.expander("早期終了の条件（任意）/ Early stop (optional)", expanded=bool(cfg.get("stop"))):
+    st.write("0 は「使わない」。どれかを満たした時点で max_solve_seconds より前に計算を終えます。/ 0 = off. The solve stops as soon as any rule holds.")
+    stop_cfg = dict(cfg.get("stop") or {})
+    s1, s2, s3 = st.columns(3)
+    stop_cfg["rel_gap"] = s1.number_input(
+        "rel_gap（相対ギャップ / relative gap）", min_value=0.0, max_value=1.0, step=0.01,
+        value=float(stop_cfg.get("rel_gap") or 0.0),
+    )
+    stop_cfg["abs_gap"] = s2.number_input(
+        "abs_gap（絶対ギャップ / absolute gap）", min_value=0.0, step=100.0,
+        value=float(stop_cfg.get("abs_gap") or 0.0),
+    )
+    stop_cfg["no_improve_seconds"] = s3.number_input(
+        "no_improve_seconds（改善なし秒 / seconds without improvement）", min_value=0.0, max_value=600.0, step=1.0,
+        value=float(stop_cfg.get("no_improve_seconds") or 0.0),
+    )
+    stop_cfg = {k: v for k, v in stop_cfg.items() if v}
+    if stop_cfg:
+        cfg["stop"] = stop_cfg
+    else:
+        cfg.pop("stop", None)
+
 st.subheader("利用可能時間（選択式）/ Availability (select)")
 st.write("各日ごとに「開始・終了」を選ぶだけです。/ Just select start/end for each day.")
 st.write("※ 2枠（開始2/終了2）は **ほとんど使わない想定** なので、必要なときだけ表示して設定できます。/ Slot2 is optional and hidden by default.")
@@ -177,7 +208,17 @@ for day in range(1, last_day + 1):
 st.markdown("---")
 st.subheader("割り当て実行 / Run allocation")
 
-st.write("このボタンは **sourcecode/main.py を変更せず** そのまま実行します。/ This runs sourcecode/main.py as-is.")
+st.write("このボタンは割り当てエンジン（allocator）をこのプロセス内で実行します（2回目以降は起動が速い）。/ This runs the allocator in-process (warm interpreter).")
+
+use_hint = st.checkbox(
+    "前回の結果を初期解に使う（ウォームスタート）/ Warm start from previous result",
+    value=(out_dir / f"solution_{ym}.json").exists() or (out_dir / f"schedule_by_team_{ym}.csv").exists(),
+)
+
+cfg["stream_incumbents"] = st.checkbox(
+    "計算中の暫定結果を書き出す（結果ページで確認できます）/ Stream intermediate solutions to the Results page",
+    value=bool(cfg.get("stream_incumbents", False)),
+)
 
 if st.button("▶ 実行 / Run", type="primary"):
     cfg["year"] = year_i
@@ -185,9 +226,37 @@ if st.button("▶ 実行 / Run", type="primary"):
     cfg["availability"] = avail
     write_yaml(config_path, cfg)
 
-    result = run_allocator(BASE_DIR, config_path, ym)
+    result = run_allocator(BASE_DIR, config_path, ym, hint="auto" if use_hint else None)
     if getattr(result, "ok", False):
         st.success("完了 / Done")
     else:
         st.error("失敗 / Failed")
     st.code(getattr(result, "log", str(result)), language="text")
+
+# --- 探索の推移（CP-SAT の探索ログから作った時系列。monolithic エンジンのとき）---
+file_progress = out_dir / f"progress_{ym}.json"
+if file_progress.exists():
+    try:
+        progress = json.loads(file_progress.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        progress = None
+    if progress and progress.get("points"):
+        summary = progress.get("summary", {})
+        with st.expander("探索の推移 / Search progress", expanded=False):
+            gap = summary.get("gap")
+            c1, c2, c3 = st.columns(3)
+            c1.metric("解の数 / Solutions", summary.get("solutions", 0))
+            c2.metric("最後の改善 / Last improvement", f"{summary.get('last_improvement_time') or 0:.1f}s")
+            c3.metric("ギャップ / Gap", "-" if gap is None else f"{100 * gap:.2f}%")
+            st.caption(
+                "最後の改善が時間切れの直前なら時間を延ばす、ずっと前ならギャップが縮まらないので定式化を見直す目安になります。"
+                " / Late improvements suggest more time; an early plateau with a large gap suggests a better formulation."
+            )
+            df_progress = pd.DataFrame(progress["points"])
+            st.line_chart(df_progress, x="time", y=["objective", "bound"])
+            st.write("改善解を見つけたワーカー / Improvements by worker")
+            st.dataframe(
+                pd.DataFrame(list(summary.get("improvements_by_worker", {}).items()), columns=["worker", "solutions"]),
+                hide_index=True,
+            )
+            st.dataframe(df_progress, use_container_width=True, hide_index=True)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+# ============================================================
+# テスト共通: allocator.synth の小さな合成インスタンスを作って解く
+#   python -m pytest -q（repo直下で実行）
+# ============================================================
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from allocator.instance import Instance, load_instance
+from allocator.model import ModelOptions, Weights, build_model
+from allocator.solve import SolveResult, solve
+from allocator.synth import SynthSpec, write_instance
+
+# 数秒で最適性まで証明できる大きさ（夕方だけ・3日）
+TINY = SynthSpec(teams=3, open_days=3, pattern="evening", density=0.6, events=1, max_solve_seconds=20, seed=1)
+# 希望日が全員同じ（入れ替え可能な団体が4つ）
+TWINS = SynthSpec(teams=4, open_days=3, pattern="evening", density=1.0, events=0, max_solve_seconds=30, seed=1)
+
+
+def quiet_load(data_dir: Path, **kwargs) -> Instance:
+    """load_instance の画面表示を抑えて読む"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return load_instance(data_dir / "config.yaml", data_dir, **kwargs)
+
+
+def solve_optimal(inst: Instance, options: ModelOptions | None = None, weights: Weights | None = None):
+    """最適性まで解き、(AllocModel, SolveResult) を返す"""
+    am = build_model(inst, weights or Weights(), options or ModelOptions())
+    with contextlib.redirect_stdout(io.StringIO()):
+        result: SolveResult = solve(am, inst.max_solve_seconds)
+    assert result.status_name == "OPTIMAL", f"{options}: {result.status_name}"
+    return am, result
+
+
+@pytest.fixture(scope="session")
+def tiny_dir(tmp_path_factory) -> Path:
+    return write_instance(TINY, tmp_path_factory.mktemp("tiny"))
+
+
+@pytest.fixture(scope="session")
+def tiny(tiny_dir) -> Instance:
+    return quiet_load(tiny_dir)
+
+
+@pytest.fixture(scope="session")
+def twins(tmp_path_factory) -> Instance:
+    return quiet_load(write_instance(TWINS, tmp_path_factory.mktemp("twins")))
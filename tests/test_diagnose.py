@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+# ============================================================
+# 解が無かったときの診断（_explain_no_solution）のメッセージ
+#   制約だけのモデルが時間内に判定できなかったら「満たせる」とも「矛盾あり」とも言わない
+# ============================================================
+import json
+import logging
+from dataclasses import replace
+
+import pytest
+
+from allocator.pipeline import _explain_no_solution
+
+
+def _explain(inst, tmp_path, diagnose_seconds):
+    inst = replace(inst, config={**inst.config, "diagnose_seconds": diagnose_seconds})
+    with pytest.raises(RuntimeError) as e:
+        _explain_no_solution(inst, None, "UNKNOWN", tmp_path)
+    report = json.loads((tmp_path / f"infeasibility_{inst.run_tag}.json").read_text(encoding="utf-8"))
+    return str(e.value), report
+
+
+def test_undecided_diagnosis_is_not_reported_as_satisfiable(tiny, tmp_path, caplog):
+    with caplog.at_level(logging.INFO, logger="kasuga_gym"):
+        message, report = _explain(tiny, tmp_path, 0)
+    assert "判定できませんでした（diagnose_seconds を延ばしてください）" in message
+    assert "制約は満たせる" not in message
+    assert (report["status"], report["outcome"]) == ("UNKNOWN", "unknown")
+    assert "判定できませんでした" in caplog.text
+    assert "矛盾はありません" not in caplog.text
+
+
+def test_satisfiable_diagnosis(tiny, tmp_path):
+    message, report = _explain(tiny, tmp_path, 10)
+    assert "制約は満たせる" in message
+    assert report["outcome"] == "feasible"
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+# ============================================================
+# 定式化の切り替えで最適値が変わらないこと
+#   day_fairness（ordered / pairwise）・block（slots / interval）・symmetry（totals / none）は
+#   同じ問題の別の書き方なので、最適値は同じになるはず。
+#   fairness（pairwise / target / maxmin）は目的関数そのものが違うので比べない。
+# ============================================================
+import pytest
+
+from allocator.breakdown import breakdown_from_model, compute_objective_breakdown_used_only
+from allocator.instance import ZONES
+from allocator.model import FAIRNESS_MODES, ModelOptions, Weights
+from allocator.solution import extract_solution
+from conftest import solve_optimal
+
+
+@pytest.mark.parametrize("fairness", FAIRNESS_MODES)
+def test_day_fairness_ordered_matches_pairwise(tiny, fairness):
+    _, ordered = solve_optimal(tiny, ModelOptions(fairness=fairness, day_fairness="ordered"))
+    _, pairwise = solve_optimal(tiny, ModelOptions(fairness=fairness, day_fairness="pairwise"))
+    assert ordered.objective == pairwise.objective
+
+
+def test_interval_blocks_match_slots(tiny):
+    # 利用禁止時間帯の無い日だけなので、slots と interval で使えるブロックは同じ
+    # （利用禁止をまたぐブロックは slots だけが作れる）
+    assert not any(tiny.config["availability"][str(d.day)][2] for d in tiny.days)
+    _, slots = solve_optimal(tiny, ModelOptions(block="slots"))
+    _, interval = solve_optimal(tiny, ModelOptions(block="interval"))
+    assert slots.objective == interval.objective
+
+
+@pytest.mark.parametrize("block", ["slots", "interval"])
+def test_symmetry_breaking_keeps_the_optimum(twins, block):
+    assert twins.interchangeable_teams(), "入れ替え可能な団体が無いと確かめられない"
+    _, totals = solve_optimal(twins, ModelOptions(block=block, symmetry="totals"))
+    _, none = solve_optimal(twins, ModelOptions(block=block, symmetry="none"))
+    assert totals.objective == none.objective
+
+
+def test_breakdown_from_model_matches_solution(tiny):
+    options = ModelOptions()
+    am, result = solve_optimal(tiny, options)
+    sol = extract_solution(tiny, am, result)
+    assert breakdown_from_model(tiny, am, result.solver, sol)["total"] == result.objective
+    assert compute_objective_breakdown_used_only(tiny, sol, Weights(), options)["total"] == result.objective
+
+
+def test_breakdowns_share_the_zone_definition(tiny, monkeypatch):
+    # 時間帯の区切りを変えたら、モデルと解からの再計算の両方に効く（別々の定義を持たない）
+    monkeypatch.setitem(ZONES, "evening", lambda t: 900 <= t < 1140)
+    monkeypatch.setitem(ZONES, "night", lambda t: 1140 <= t < 1260)
+    options = ModelOptions()
+    am, result = solve_optimal(tiny, options)
+    sol = extract_solution(tiny, am, result)
+    from_model = breakdown_from_model(tiny, am, result.solver, sol)
+    recomputed = compute_objective_breakdown_used_only(tiny, sol, Weights(), options)
+    assert recomputed["zone_diff_sum"] == from_model["zone_diff_sum"]
+    assert recomputed["total"] == result.objective
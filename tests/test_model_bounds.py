@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+# ============================================================
+# 変数の上界がスロット幅に合っていること
+#   朝負担の上界は 30 分スロット（1日に朝5スロット）を前提にしていたので、
+#   15 分スロットで朝を全部使う日があると実行不能になっていた。
+# ============================================================
+from pathlib import Path
+
+import pytest
+
+from allocator.instance import morning_penalty
+from allocator.model import ModelOptions
+from allocator.synth import SynthSpec, write_instance
+from conftest import quiet_load, solve_optimal
+
+# 1団体・1日だけ・朝から夜まで使える（朝を全部使うのが最適）
+LONE = SynthSpec(teams=1, open_days=1, pattern="full", density=1.0, events=0, max_solve_seconds=20, seed=1)
+
+
+@pytest.mark.parametrize("block", ["slots", "interval"])
+def test_morning_burden_bound_follows_the_slot_width(tmp_path: Path, block):
+    inst = quiet_load(write_instance(LONE, tmp_path), slot=15)
+    # 開館日だけに絞る（last_day=1 になる。分割して解くときと同じ）
+    inst = inst.restricted_to([d for d in inst.days if inst.slots_by_day[d]])
+    (d,) = inst.days
+    (team,) = inst.teams
+    whole_morning = sum(morning_penalty(t) for t in inst.slots_by_day[d])
+    assert whole_morning > 7 * 5  # 30 分スロットなら 1日の最大は 7+7+4+2+2=22
+
+    am, result = solve_optimal(inst, ModelOptions(block=block))
+    assert result.solver.Value(am.morning_burden[team]) == whole_morning
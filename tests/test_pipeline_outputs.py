@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+# ============================================================
+# run_month が output/YYYY-MM/ に前の実行のファイルを持ち越さないこと
+#   キャッシュ: この実行で書いたファイルだけを入れる（--no-gantt なら前の画像は入れない）
+#   途中の解: 前の実行の incumbent は消し、途中で失敗したときも final: false のまま残さない
+# ============================================================
+import contextlib
+import io
+import json
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+import allocator.pipeline
+from allocator.cache import cache_dir
+from allocator.incumbents import default_incumbent_path
+from allocator.pipeline import run_month
+
+
+def _run(tiny_dir: Path, out: Path, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_month(config_path=tiny_dir / "config.yaml", data_dir=str(tiny_dir), out=out, **kwargs)
+
+
+def test_cache_stores_only_this_runs_files(tiny, tiny_dir, tmp_path):
+    run_dir = tmp_path / tiny.run_tag
+    run_dir.mkdir()
+    stale = [run_dir / f"gantt_{tiny.run_tag}.png", run_dir / f"calendar_{tiny.run_tag}.pdf"]
+    for p in stale:
+        p.write_bytes(b"old")
+
+    res = _run(tiny_dir, tmp_path, no_gantt=True, cache=True)
+    cached = {p.name for p in (cache_dir(tmp_path, res.cache_key) / "files").iterdir()}
+    assert f"solution_{tiny.run_tag}.json" in cached
+    assert f"schedule_{tiny.run_tag}.csv" in cached
+    assert not cached & {p.name for p in stale}
+    assert not any(name.endswith((".png", ".pdf")) for name in cached)
+
+    # ヒットしても前の画像は戻ってこない
+    for p in stale:
+        p.unlink()
+    hit = _run(tiny_dir, tmp_path, no_gantt=True, cache=True)
+    assert hit.cache_hit
+    assert not any(p.exists() for p in stale)
+
+
+def test_cache_hit_reports_a_time_limited_result(tiny, tiny_dir, tmp_path, monkeypatch):
+    real_solve = allocator.pipeline.solve
+    monkeypatch.setattr(
+        allocator.pipeline, "solve", lambda *args, **kwargs: replace(real_solve(*args, **kwargs), stop_reason="time_limit"),
+    )
+    res = _run(tiny_dir, tmp_path, no_gantt=True, cache=True)
+    meta = json.loads((cache_dir(tmp_path, res.cache_key) / "meta.json").read_text(encoding="utf-8"))
+    assert (meta["status"], meta["stop_reason"]) == ("OPTIMAL", "time_limit")
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        hit = run_month(config_path=tiny_dir / "config.yaml", data_dir=str(tiny_dir), out=tmp_path, no_gantt=True, cache=True)
+    assert hit.cache_hit
+    assert "(cached, stop=time_limit)" in out.getvalue()
+    log = (hit.out_run_dir / "run.log").read_text(encoding="utf-8")
+    assert "status=OPTIMAL stop=time_limit" in log
+    assert "time_limit で打ち切ったもの" in log
+
+
+def test_stale_incumbent_is_removed(tiny, tiny_dir, tmp_path):
+    path = default_incumbent_path(tmp_path / tiny.run_tag, tiny.run_tag)
+    path.parent.mkdir()
+    path.write_text(json.dumps({"final": False, "solutions": 3, "blocks": []}), encoding="utf-8")
+
+    _run(tiny_dir, tmp_path, no_gantt=True, cache=False, stream=False)
+    assert not path.exists()
+
+
+def test_incumbent_is_removed_when_the_run_fails(tiny, tiny_dir, tmp_path, monkeypatch):
+    path = default_incumbent_path(tmp_path / tiny.run_tag, tiny.run_tag)
+    real_solve = allocator.pipeline.solve
+
+    def solve_then_fail(am, seconds, **kwargs):
+        real_solve(am, seconds, **kwargs)  # 途中の解（final: false）を書いてから止まる
+        assert json.loads(path.read_text(encoding="utf-8"))["final"] is False
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(allocator.pipeline, "solve", solve_then_fail)
+    with pytest.raises(KeyboardInterrupt):
+        _run(tiny_dir, tmp_path, no_gantt=True, cache=False, stream=True)
+    assert not path.exists()
+
+
+def test_finished_incumbent_is_kept(tiny, tiny_dir, tmp_path):
+    _run(tiny_dir, tmp_path, no_gantt=True, cache=False, stream=True)
+    path = default_incumbent_path(tmp_path / tiny.run_tag, tiny.run_tag)
+    assert json.loads(path.read_text(encoding="utf-8"))["final"] is True
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+# ============================================================
+# 探索の推移のまとめ（SearchLog.log_summary）の表示
+# ============================================================
+import contextlib
+import io
+import logging
+
+from allocator.model import build_model
+from allocator.progress import SearchLog
+from allocator.solve import solve
+
+
+def _summary_line(log: SearchLog, caplog) -> str:
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="kasuga_gym"):
+        log.log_summary()
+    return caplog.records[-1].getMessage()
+
+
+def test_summary_without_solutions(caplog):
+    # 解が1つも無いときこそ出すまとめなので、時刻が無ければ "-" にする
+    line = _summary_line(SearchLog(), caplog)
+    assert "solutions=0 first=- last=- gap=-" in line
+    assert "None" not in line
+
+
+def test_summary_with_solutions(tiny, caplog):
+    log = SearchLog()
+    with contextlib.redirect_stdout(io.StringIO()):
+        solve(build_model(tiny), tiny.max_solve_seconds, progress=log)
+    line = _summary_line(log, caplog)
+    first = log.summary()["first_solution_time"]
+    assert f"first={first:.2f}s" in line
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+# ============================================================
+# 粗いスロットの解（coarse-to-fine）を作ってよいかの判定
+#   イベント・最低利用時間が coarse_slot の区切りに乗らないと粗いスロットでは別の問題になる
+# ============================================================
+import contextlib
+import io
+import json
+import logging
+from pathlib import Path
+
+import yaml
+
+from allocator.pipeline import run_month
+from allocator.refine import coarse_instance, coarse_mismatches
+from allocator.synth import write_instance
+from conftest import TINY, quiet_load
+
+
+def _instance_dir(tmp_path: Path, event_start: str, hours: float) -> Path:
+    """TINY の最低利用時間を 60分にし、イベントを event_start から hours 時間にしたもの"""
+    data_dir = write_instance(TINY, tmp_path / "data")
+    config = yaml.safe_load((data_dir / "config.yaml").read_text(encoding="utf-8"))
+    config.update(min_minutes=60, cache=False)
+    (data_dir / "config.yaml").write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+    events = json.loads((data_dir / "events.json").read_text(encoding="utf-8"))
+    events[0].update(start=event_start, duration_hours=hours)
+    (data_dir / "events.json").write_text(json.dumps(events, ensure_ascii=False), encoding="utf-8")
+    return data_dir
+
+
+def _coarse_log(data_dir: Path, out: Path) -> str:
+    with contextlib.redirect_stdout(io.StringIO()):
+        res = run_month(config_path=data_dir / "config.yaml", data_dir=str(data_dir), out=out, no_gantt=True, coarse_slot=60)
+    return (res.out_run_dir / "run.log").read_text(encoding="utf-8")
+
+
+def test_min_minutes_off_the_coarse_grid(tiny):
+    # min_slots: 3 = 90分は 60分スロットでは 120分に切り上がる
+    assert coarse_mismatches(tiny, 60) == ["最低利用時間 90分"]
+    assert coarse_mismatches(tiny, 30) == []
+
+
+def test_event_off_the_coarse_grid_skips_the_coarse_pass(tmp_path, caplog):
+    data_dir = _instance_dir(tmp_path, "18:30", 2.5)  # 残りの 17:00-18:30 は他の団体が使える
+    inst = quiet_load(data_dir)
+    (reason,) = coarse_mismatches(inst, 60)
+    assert reason.startswith("イベント team03") and reason.endswith("18:30-21:00")
+
+    # 読み直しで消えるイベントは run.log に出す（表示を捨てない）
+    with caplog.at_level(logging.INFO, logger="kasuga_gym"):
+        cinst = coarse_instance(inst, 60)
+    assert not cinst.event_slots
+    assert "ではイベントを表せないので除外しました: team03" in caplog.text
+
+    log = _coarse_log(data_dir, tmp_path / "out")
+    assert "粗い解は作りません" in log
+    assert "coarse: slot=60 status=" not in log
+
+
+def test_aligned_inputs_use_the_coarse_pass(tmp_path):
+    data_dir = _instance_dir(tmp_path, "17:00", 2)
+    assert coarse_mismatches(quiet_load(data_dir), 60) == []
+    log = _coarse_log(data_dir, tmp_path / "out")
+    assert "coarse: slot=60 status=" in log
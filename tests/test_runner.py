@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+# ============================================================
+# 管理者ページの実行（ui_utils.runner.run_allocator_in_process）が Streamlit のプロセスから fork しないこと
+# ============================================================
+import yaml
+
+import allocator.decompose
+import allocator.render
+from allocator.synth import write_instance
+from conftest import TINY
+from ui_utils.runner import run_allocator_in_process
+
+
+def _no_pool(*args, **kwargs):
+    raise AssertionError("プロセスプールを作った")
+
+
+def test_in_process_run_does_not_fork_for_decomposed(tmp_path, monkeypatch):
+    ym = f"{TINY.year:04d}-{TINY.month:02d}"
+    data_dir = write_instance(TINY, tmp_path / "data" / ym)
+    config_path = data_dir / "config.yaml"
+    config = yaml.safe_load(config_path.read_text(encoding="utf-8"))
+    config.update(engine="decomposed", decomp_rounds=1, max_solve_seconds=4, cache=False)
+    config_path.write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+
+    monkeypatch.setattr(allocator.decompose.os, "cpu_count", lambda: 4)  # 1CPU の環境でも並列にしようとする
+    monkeypatch.setattr(allocator.decompose, "ProcessPoolExecutor", _no_pool)
+    monkeypatch.setattr(allocator.render, "ProcessPoolExecutor", _no_pool)
+
+    res = run_allocator_in_process(tmp_path, config_path, ym)
+    assert res.ok, res.log
+    assert (tmp_path / "output" / ym / f"solution_{ym}.json").exists()
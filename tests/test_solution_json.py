@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+# ============================================================
+# solution_YYYY-MM.json の保存 → 読み込み と、保存した解からの出力の作り直し
+# ============================================================
+import subprocess
+import sys
+from dataclasses import asdict
+
+import pytest
+
+import allocator
+from allocator.breakdown import breakdown_from_model
+from allocator.instance import save_run_snapshot
+from allocator.model import ModelOptions, Weights
+from allocator.rerender import rerender
+from allocator.solution import extract_solution, load_solution_json, save_solution_json
+from conftest import BASE_DIR, quiet_load, solve_optimal
+
+
+@pytest.fixture(scope="module")
+def solved(tiny):
+    options = ModelOptions()
+    am, result = solve_optimal(tiny, options)
+    return am, result, extract_solution(tiny, am, result)
+
+
+def test_solution_json_round_trip(tiny, solved, tmp_path):
+    am, result, sol = solved
+    bd = breakdown_from_model(tiny, am, result.solver, sol)
+    path = tmp_path / f"solution_{tiny.run_tag}.json"
+    save_solution_json(tiny, sol, path, weights=Weights(), options=am.options, breakdown=bd)
+
+    loaded, saved = load_solution_json(tiny, path)
+    assert loaded.x == sol.x
+    assert loaded.U == sol.U
+    assert loaded.y == sol.y
+    assert loaded.totalM == sol.totalM
+    assert loaded.zone_counts == sol.zone_counts
+    assert (loaded.grid == sol.grid).all()
+    assert loaded.objective == sol.objective
+    assert saved["weights"] == asdict(Weights())
+    assert saved["options"] == asdict(am.options)
+    assert saved["breakdown"]["total"] == bd["total"]
+
+
+def test_load_solution_json_rejects_other_slot(tiny, tiny_dir, solved, tmp_path):
+    _, _, sol = solved
+    path = tmp_path / "solution.json"
+    save_solution_json(tiny, sol, path)
+    with pytest.raises(ValueError):
+        load_solution_json(quiet_load(tiny_dir, slot=60), path)
+
+
+def test_rerender_rebuilds_csv_and_html(tiny, tiny_dir, solved, tmp_path):
+    _, _, sol = solved
+    run_dir = tmp_path / tiny.run_tag
+    save_run_snapshot(run_dir, tiny_dir / "config.yaml", tiny_dir / "preferences.json", tiny_dir / "events.json")
+    save_solution_json(tiny, sol, run_dir / f"solution_{tiny.run_tag}.json")
+    allocator.render_outputs(tiny, sol, tmp_path / "first", formats=["csv", "html"])
+
+    rerender(run_dir, formats=["csv", "html"])
+    first = sorted(p.name for p in (tmp_path / "first").iterdir())
+    assert first
+    for name in first:
+        assert (run_dir / name).read_bytes() == (tmp_path / "first" / name).read_bytes()
+
+
+def test_package_exports_are_functions():
+    # サブモジュール allocator.solve / allocator.render を先に import しても関数が返る
+    import allocator.render
+    import allocator.solve
+    from allocator import render_outputs, solve_model
+
+    assert callable(solve_model) and callable(render_outputs)
+    assert solve_model is allocator.solve.solve
+    assert render_outputs is allocator.render.render
+
+
+def test_package_exports_in_a_fresh_interpreter():
+    code = (
+        "import allocator.render, allocator.solve\n"
+        "from allocator import render_outputs, solve_model, run_month\n"
+        "assert all(callable(f) for f in (render_outputs, solve_model, run_month))\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, check=True)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+# ============================================================
+# tools/sweep_weights.py: 解が1つも見つからなくても表を出して終わる
+# ============================================================
+import importlib.util
+import sys
+
+from conftest import BASE_DIR
+
+_spec = importlib.util.spec_from_file_location("sweep_weights", BASE_DIR / "tools" / "sweep_weights.py")
+sweep_weights = importlib.util.module_from_spec(_spec)
+sys.modules["sweep_weights"] = sweep_weights  # ワーカーが solve_variant を pickle で受け取れるように
+_spec.loader.exec_module(sweep_weights)
+
+
+def test_format_table_without_rows():
+    lines = sweep_weights.format_table([], ["prop_month"])
+    assert len(lines) == 1 and lines[0].startswith("id")
+
+
+def test_sweep_with_no_solution_prints_all_rows(tiny_dir, capsys):
+    code = sweep_weights.main([
+        "--config", str(tiny_dir / "config.yaml"), "--grid", "prop_month=5,13", "--seconds", "0", "--workers", "1",
+    ])
+    out = capsys.readouterr().out
+    assert code == 0
+    assert "no variant found a solution" in out
+    assert out.count("UNKNOWN") == 2
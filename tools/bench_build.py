@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+# ============================================================
+# モデル構築時間のベンチマーク
+#   同じ月のデータで団体を k 倍に複製した（希望日はそのまま）インスタンスを作り、
+#   build_model の時間（中央値）と変数・制約の数を表示する。Solve はしない。
+#
+#   例) python tools/bench_build.py --config data/2026-02/config.yaml --scale 1,2,4 --block slots,interval
+# ============================================================
+import argparse
+import contextlib
+import io
+import statistics
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from allocator.instance import Instance, load_instance
+from allocator.model import ModelOptions, build_model
+
+
+def scale_teams(inst: Instance, k: int) -> Instance:
+    """各団体を k 団体に複製する（2つ目以降は「名前#2」…。イベントは元の団体だけが持つ）"""
+    if k <= 1:
+        return inst
+    teams, pref_days, pref_count = list(inst.teams), dict(inst.pref_days), dict(inst.pref_count)
+    for i in range(2, k + 1):
+        for team in inst.teams:
+            copy = f"{team}#{i}"
+            teams.append(copy)
+            pref_days[copy] = set(inst.pref_days.get(team, set()))
+            pref_count[copy] = inst.pref_count.get(team, 0)
+    return replace(inst, teams=teams, pref_days=pref_days, pref_count=pref_count)
+
+
+def time_build(inst: Instance, options: ModelOptions, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        am = build_model(inst, options=options)
+        times.append(time.perf_counter() - t0)
+    proto = am.model.Proto()
+    return {
+        "teams": len(inst.teams),
+        "block": options.block,
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "build_ms": round(1000 * statistics.median(times), 1),
+    }
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="build_model の構築時間（団体数を増やしたとき）")
+    p.add_argument("--config", type=str, required=True, help="config.yaml のパス")
+    p.add_argument("--data-dir", type=str, default=None, help="preferences.json / events.json のフォルダ（未指定なら config と同じフォルダ）")
+    p.add_argument("--scale", type=str, default="1,2,4", help="団体数の倍率（カンマ区切り）")
+    p.add_argument("--block", type=str, default="slots", help="ModelOptions.block（カンマ区切りで複数可）")
+    p.add_argument("--repeat", type=int, default=5, help="1条件あたりの構築回数（中央値を表示）")
+    args = p.parse_args(argv)
+
+    config_path = Path(args.config).resolve()
+    data_dir = Path(args.data_dir).resolve() if args.data_dir else config_path.parent
+    with contextlib.redirect_stdout(io.StringIO()):
+        inst = load_instance(config_path, data_dir)
+    base = ModelOptions.from_config(inst.config)
+
+    print(f"{inst.run_tag}  days={len(inst.days)}  repeat={args.repeat}")
+    print(f"{'teams':>6} {'block':>9} {'variables':>10} {'constraints':>12} {'build_ms':>9}")
+    for k in [int(v) for v in args.scale.split(",")]:
+        scaled = scale_teams(inst, k)
+        for block in args.block.split(","):
+            row = time_build(scaled, replace(base, block=block.strip()), args.repeat)
+            print(f"{row['teams']:>6} {row['block']:>9} {row['variables']:>10} {row['constraints']:>12} {row['build_ms']:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
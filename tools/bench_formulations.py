@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+# ============================================================
+# 定式化の比較ベンチマーク
+#   同じ月のデータで ModelOptions だけを変えてモデルを作り、
+#   モデルの大きさ（変数・制約の数）と構築時間・求解時間・解の質を並べて表示する。
+#
+#   例) python tools/bench_formulations.py --config data/2026-02/config.yaml \
+#         --vary fairness=pairwise,target,maxmin --seconds 20
+#       python tools/bench_formulations.py --config data/*/config.yaml \
+#         --vary day_fairness=pairwise,ordered
+#
+#   解の質は「どの定式化で解いたか」に関係なく pairwise の内訳で評価し直すので、
+#   そのまま横に比べられる。
+# ============================================================
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from allocator.breakdown import compute_objective_breakdown_used_only
+from allocator.instance import load_instance
+from allocator.model import ModelOptions, Weights, build_model
+from allocator.solution import extract_solution
+from allocator.solve import solve
+
+
+def parse_vary(spec: str) -> tuple[str, list[str]]:
+    """'fairness=pairwise,target' -> ('fairness', ['pairwise', 'target'])"""
+    key, _, values = spec.partition("=")
+    if not key or not values:
+        raise ValueError(f"--vary は key=v1,v2 の形で指定してください: {spec}")
+    return key.strip(), [v.strip() for v in values.split(",") if v.strip()]
+
+
+def bench_variant(inst, options: ModelOptions, seconds: float, weights: Weights) -> dict:
+    t0 = time.perf_counter()
+    am = build_model(inst, weights, options)
+    build_s = time.perf_counter() - t0
+
+    proto = am.model.Proto()
+    row = {
+        "options": options.__dict__.copy(),
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+        "build_s": round(build_s, 3),
+    }
+    if seconds <= 0:
+        return row
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = solve(am, seconds)
+    row.update(status=result.status_name, solve_s=round(result.wall_time, 3), objective=result.objective)
+    if result.has_solution:
+        sol = extract_solution(inst, am, result)
+        bd = compute_objective_breakdown_used_only(inst, sol, weights)  # pairwise で評価し直す
+        row.update(
+            pairwise_total=bd["total"],
+            month_diff_sum=bd["month_diff_sum"],
+            zone_diff_sum=sum(bd["zone_diff_sum"].values()),
+            idle_slots=bd["idle_slots"],
+        )
+    return row
+
+
+def format_table(rows: list[dict]) -> list[str]:
+    cols = ["variant", "variables", "constraints", "build_s", "status", "solve_s",
+            "objective", "pairwise_total", "month_diff_sum", "zone_diff_sum", "idle_slots"]
+    table = [[str(r.get(c, "")) for c in cols] for r in rows]
+    widths = [max(len(c), *(len(t[i]) for t in table)) for i, c in enumerate(cols)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(cols, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(t, widths)) for t in table]
+    return lines
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="ModelOptions ごとのモデルサイズ・求解時間の比較")
+    p.add_argument("--config", type=str, nargs="+", required=True, help="config.yaml のパス（複数指定すると月ごとに比較）")
+    p.add_argument("--data-dir", type=str, default=None, help="preferences.json / events.json のフォルダ（未指定なら各 config と同じフォルダ）")
+    p.add_argument("--vary", type=str, default="fairness=pairwise,target,maxmin", help="比較する ModelOptions の項目と値（key=v1,v2,...）")
+    p.add_argument("--seconds", type=float, default=None, help="1モデルあたりの求解時間（0 ならモデル構築だけ。未指定なら config の max_solve_seconds）")
+    p.add_argument("--json", type=str, default=None, help="結果を JSON で保存するパス")
+    args = p.parse_args(argv)
+
+    key, values = parse_vary(args.vary)
+    weights = Weights()
+
+    rows = []
+    for config in args.config:
+        config_path = Path(config).resolve()
+        data_dir = Path(args.data_dir).resolve() if args.data_dir else config_path.parent
+        with contextlib.redirect_stdout(io.StringIO()):
+            inst = load_instance(config_path, data_dir)
+
+        base = ModelOptions.from_config(inst.config)
+        seconds = inst.max_solve_seconds if args.seconds is None else args.seconds
+
+        month_rows = []
+        for v in values:
+            row = bench_variant(inst, replace(base, **{key: v}), seconds, weights)
+            row["month"] = inst.run_tag
+            row["variant"] = f"{key}={v}"
+            month_rows.append(row)
+            print(f"[done] {inst.run_tag} {row['variant']}", file=sys.stderr)
+
+        print(f"{inst.run_tag}  teams={len(inst.teams)}  days={len(inst.days)}  seconds={seconds}")
+        print("\n".join(format_table(month_rows)))
+        print()
+        rows += month_rows
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+# ============================================================
+# パイプライン全体のベンチマーク（合成インスタンス）
+#   allocator.synth で団体数 × 開館日数 × 希望の密度 の組み合わせごとに入力を作り、
+#   入力ファイルの解析（parse）・読み込みと検証（load = load_instance 全体）・モデル構築・求解・
+#   解の取り出し・出力の各段の時間とモデルの大きさを測って JSON に保存する。
+#
+#   例) python tools/bench_pipeline.py --teams 5,10,20 --days 10,20 --density 0.3,0.6 \
+#         --seconds 10 --json output/bench/pipeline.json
+#       python tools/bench_pipeline.py --teams 5,10,20 --seconds 0 --vary block=slots,interval \
+#         --compare output/bench/pipeline.json
+#
+#   --compare で前回の JSON と比べ、構築時間・変数・制約の数が --tolerance 倍を超えて
+#   増えた条件があれば表示して終了コード 1 を返す（定式化を変えたときの確認用）。
+# ============================================================
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import asdict, replace
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import ortools
+
+from allocator.breakdown import breakdown_from_model
+from allocator.cache import code_version
+from allocator.instance import load_config, load_instance
+from allocator.model import ModelOptions, Weights, build_model
+from allocator.render import render
+from allocator.solution import extract_solution
+from allocator.solve import solve
+from allocator.synth import AVAILABILITY_PATTERNS, SynthSpec, write_instance
+
+# --compare で増えていないか確かめる項目（時間は揺れるので倍率で見る）
+REGRESSION_KEYS = ("variables", "constraints", "build_ms")
+
+
+def _ints(s: str) -> list[int]:
+    return [int(v) for v in s.split(",") if v.strip()]
+
+
+def _floats(s: str) -> list[float]:
+    return [float(v) for v in s.split(",") if v.strip()]
+
+
+def bench_instance(data_dir: Path, options: ModelOptions, seconds: float, no_gantt: bool) -> dict:
+    """1つの入力で各段の時間（ミリ秒）とモデルの大きさを測る"""
+    ms = {}
+    config_path = data_dir / "config.yaml"
+
+    t0 = time.perf_counter()
+    load_config(config_path)
+    for name in ("preferences.json", "events.json"):
+        with open(data_dir / name, encoding="utf-8") as f:
+            json.load(f)
+    ms["parse_ms"] = 1000 * (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        inst = load_instance(config_path, data_dir)
+    ms["load_ms"] = 1000 * (time.perf_counter() - t0)  # 解析 + 検証 + スロット化（load_instance 全体）
+
+    t0 = time.perf_counter()
+    am = build_model(inst, Weights(), options)
+    ms["build_ms"] = 1000 * (time.perf_counter() - t0)
+    proto = am.model.Proto()
+    row = {
+        "teams": len(inst.teams),
+        "open_days": sum(1 for d in inst.days if inst.slots_by_day[d]),
+        "slots": sum(len(ts) for ts in inst.slots_by_day.values()),
+        "variables": len(proto.variables),
+        "constraints": len(proto.constraints),
+    }
+    if seconds > 0:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = solve(am, seconds)
+        ms["solve_ms"] = 1000 * (time.perf_counter() - t0)
+        row.update(status=result.status_name, objective=result.objective)
+        if result.has_solution:
+            t0 = time.perf_counter()
+            sol = extract_solution(inst, am, result)
+            ms["extract_ms"] = 1000 * (time.perf_counter() - t0)
+
+            with tempfile.TemporaryDirectory() as out, contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                bd = breakdown_from_model(inst, am, result.solver, sol)
+                render(inst, sol, Path(out), weights=am.weights, options=options, no_gantt=no_gantt, breakdown=bd)
+                ms["render_ms"] = 1000 * (time.perf_counter() - t0)
+    row.update({k: round(v, 1) for k, v in ms.items()})
+    return row
+
+
+def _key(row: dict) -> tuple:
+    """--compare で同じ条件の行を突き合わせるキー"""
+    return (row["teams_spec"], row["days_spec"], row["density"], row["pattern"], row["variant"])
+
+
+def compare(rows: list[dict], baseline_path: Path, tolerance: float) -> list[str]:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {_key(r): r for r in json.load(f)["rows"]}
+    problems = []
+    for r in rows:
+        old = baseline.get(_key(r))
+        if old is None:
+            continue
+        for k in REGRESSION_KEYS:
+            if k in r and k in old and old[k] and r[k] > tolerance * old[k]:
+                problems.append(f"{_key(r)} {k}: {old[k]} -> {r[k]} (x{r[k] / old[k]:.2f})")
+    return problems
+
+
+def format_table(rows: list[dict]) -> list[str]:
+    cols = ["teams", "open_days", "density", "variant", "variables", "constraints", "parse_ms", "load_ms",
+            "build_ms", "status", "solve_ms", "extract_ms", "render_ms"]
+    table = [[str(r.get(c, "")) for c in cols] for r in rows]
+    widths = [max(len(c), *(len(t[i]) for t in table)) for i, c in enumerate(cols)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(cols, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(t, widths)) for t in table]
+    return lines
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="合成インスタンスで各段の時間とモデルの大きさを測る")
+    p.add_argument("--teams", type=str, default="5,10,20", help="団体数（カンマ区切り）")
+    p.add_argument("--days", type=str, default="20", help="開館日数（カンマ区切り）")
+    p.add_argument("--density", type=str, default="0.4", help="希望の密度（カンマ区切り）")
+    p.add_argument("--pattern", type=str, default="mixed", help=f"利用可能時間の型（カンマ区切り: {', '.join(AVAILABILITY_PATTERNS)}）")
+    p.add_argument("--events", type=int, default=2, help="イベント数")
+    p.add_argument("--vary", type=str, default=None, help="比べる ModelOptions の項目と値（key=v1,v2,...）")
+    p.add_argument("--seconds", type=float, default=10, help="1条件あたりの求解時間（0 なら構築まで）")
+    p.add_argument("--gantt", action="store_true", help="出力の時間に画像（PNG/PDF）も含める")
+    p.add_argument("--seed", type=int, default=0, help="生成の乱数の種")
+    p.add_argument("--keep", type=str, default=None, help="生成した入力をこのフォルダに残す（未指定なら一時フォルダ）")
+    p.add_argument("--json", type=str, default=None, help="結果を JSON で保存するパス")
+    p.add_argument("--compare", type=str, default=None, help="前回の JSON と比べて増えた条件を表示する")
+    p.add_argument("--tolerance", type=float, default=1.5, help="--compare で増えたとみなす倍率")
+    args = p.parse_args(argv)
+
+    if args.vary:
+        key, _, values = args.vary.partition("=")
+        variants = [(f"{key}={v}", {key: v}) for v in values.split(",") if v.strip()]
+    else:
+        variants = [("default", {})]
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(args.keep).resolve() if args.keep else Path(tmp)
+        grid = itertools.product(_ints(args.teams), _ints(args.days), _floats(args.density), args.pattern.split(","))
+        for teams, days, density, pattern in grid:
+            spec = SynthSpec(teams=teams, open_days=days, density=density, pattern=pattern.strip(), events=args.events, seed=args.seed)
+            data_dir = write_instance(spec, root / f"t{teams}_d{days}_p{density}_{spec.pattern}")
+            base = ModelOptions.from_config(load_config(data_dir / "config.yaml"))
+            for name, override in variants:
+                row = bench_instance(data_dir, replace(base, **override), args.seconds, not args.gantt)
+                row.update(teams_spec=teams, days_spec=days, density=density, pattern=spec.pattern, variant=name)
+                rows.append(row)
+                print(f"[done] teams={teams} days={days} density={density} {spec.pattern} {name}", file=sys.stderr)
+
+    print(f"seconds={args.seconds}  seed={args.seed}  code={code_version()}")
+    print("\n".join(format_table(rows)))
+
+    if args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "code": code_version(),
+            "ortools": ortools.__version__,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+            "spec_defaults": asdict(SynthSpec()),
+        }
+        out.write_text(json.dumps({"meta": meta, "rows": rows}, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if args.compare:
+        problems = compare(rows, Path(args.compare), args.tolerance)
+        if problems:
+            print(f"\n[REGRESSION] {args.compare} より {args.tolerance} 倍を超えて増えた項目:")
+            print("\n".join("  " + s for s in problems))
+            return 1
+        print(f"\n[OK] {args.compare} と比べて {args.tolerance} 倍を超えて増えた項目はありません")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
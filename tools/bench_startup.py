@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+# ============================================================
+# 起動時間と1回の実行時間のベンチマーク（画像あり / なし）
+#   毎回新しい Python プロセスで測る（import のキャッシュが効かないように）。
+#     import : allocator.pipeline の import 時間と、読み込まれた重いモジュール（matplotlib など）
+#     run    : sourcecode/main.py を合成インスタンスで最後まで実行した時間（--no-gantt あり / なし）
+#
+#   例) python tools/bench_startup.py --repeat 5 --seconds 2
+#       python tools/bench_startup.py --repeat 3 --teams 10 --json output/bench/startup.json
+# ============================================================
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from allocator.cache import code_version
+from allocator.synth import SynthSpec, write_instance
+
+# import したあと sys.modules にあるか調べるモジュール
+HEAVY_MODULES = ("matplotlib", "matplotlib.pyplot", "pandas", "numpy", "ortools")
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+t0 = time.perf_counter()
+import allocator.pipeline
+t = time.perf_counter() - t0
+print(json.dumps({{"import_s": t, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import() -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_run(data_dir: Path, out_dir: Path, gantt: bool) -> float:
+    cmd = [
+        sys.executable, str(BASE_DIR / "sourcecode" / "main.py"),
+        "--config", str(data_dir / "config.yaml"), "--data-dir", str(data_dir),
+        "--out", str(out_dir), "--no-cache",
+    ]
+    if not gantt:
+        cmd.append("--no-gantt")
+    t0 = time.perf_counter()
+    subprocess.run(cmd, cwd=BASE_DIR, capture_output=True, check=True)
+    return time.perf_counter() - t0
+
+
+def format_table(rows: list[dict]) -> list[str]:
+    cols = ["case", "median_s", "min_s", "max_s", "loaded"]
+    table = [[str(r.get(c, "")) for c in cols] for r in rows]
+    widths = [max(len(c), *(len(t[i]) for t in table)) for i, c in enumerate(cols)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(cols, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(t, widths)) for t in table]
+    return lines
+
+
+def _row(case: str, times: list[float], **extra) -> dict:
+    return {
+        "case": case,
+        "median_s": round(statistics.median(times), 3),
+        "min_s": round(min(times), 3),
+        "max_s": round(max(times), 3),
+        "times": [round(t, 3) for t in times],
+        **extra,
+    }
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="import 時間と実行時間を画像あり / なしで測る")
+    p.add_argument("--repeat", type=int, default=3, help="各条件の回数（中央値を表示）")
+    p.add_argument("--teams", type=int, default=8, help="合成インスタンスの団体数")
+    p.add_argument("--days", type=int, default=20, help="合成インスタンスの開館日数")
+    p.add_argument("--seconds", type=int, default=2, help="求解時間（max_solve_seconds）")
+    p.add_argument("--no-run", action="store_true", help="import だけ測る")
+    p.add_argument("--json", type=str, default=None, help="結果を JSON で保存するパス")
+    args = p.parse_args(argv)
+
+    rows = []
+    imports = [measure_import() for _ in range(args.repeat)]
+    rows.append(_row("import allocator.pipeline", [r["import_s"] for r in imports], loaded=",".join(imports[-1]["loaded"])))
+    print(f"[done] import x{args.repeat}", file=sys.stderr)
+
+    if not args.no_run:
+        with tempfile.TemporaryDirectory() as tmp:
+            spec = replace(SynthSpec(), teams=args.teams, open_days=args.days, max_solve_seconds=args.seconds)
+            data_dir = write_instance(spec, Path(tmp) / "data")
+            for case, gantt in [("run --no-gantt", False), ("run (images)", True)]:
+                times = [measure_run(data_dir, Path(tmp) / "out", gantt) for _ in range(args.repeat)]
+                rows.append(_row(case, times))
+                print(f"[done] {case} x{args.repeat}", file=sys.stderr)
+
+    print(f"repeat={args.repeat}  teams={args.teams}  days={args.days}  seconds={args.seconds}  code={code_version()}")
+    print("\n".join(format_table(rows)))
+
+    if args.json:
+        out = Path(args.json)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "code": code_version(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        }
+        out.write_text(json.dumps({"meta": meta, "rows": rows}, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
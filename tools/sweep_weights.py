@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+# ============================================================
+# 目的関数の重みのスイープ（パレート解の一覧）
+#   1か月分のデータで Weights だけを変えたモデルをプロセスプールで並列に解き、
+#   目的項の内訳（breakdown_from_model。重みを掛ける前の値）を並べて、
+#   どの項でも他に負けている重み（支配される解）を除いたパレート解を表示する。
+#
+#   例) python tools/sweep_weights.py --config data/2026-02/config.yaml \
+#         --grid prop_month=5,13,30 --grid morn_spread=5,10,20 --seconds 20
+#       python tools/sweep_weights.py --config data/2026-02/config.yaml \
+#         --random 16 --scale 0.25,4 --seconds 20 --csv output/sweep_2026-02.csv
+#
+#   基準の重みは config.yaml の weights:（無ければ Weights の既定値）。
+#   気に入った重みは config.yaml の weights: に書けば通常の実行で使われる。
+# ============================================================
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields, replace
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from allocator.breakdown import breakdown_from_model
+from allocator.instance import load_instance
+from allocator.model import ModelOptions, Weights, build_model
+from allocator.solution import extract_solution
+from allocator.solve import solve
+
+# パレート比較に使う内訳の項目と向き（+1: 大きいほど良い / -1: 小さいほど良い）
+METRICS = {
+    "used_team_count": +1,
+    "idle_slots": -1,
+    "daily_spread_sum": -1,
+    "event_spread_sum": -1,
+    "month_diff_sum": -1,
+    "morning_range": -1,
+    "zone_diff_sum": -1,
+}
+
+# --random で既定で動かす重み（team / idle は桁で優先順位を決めているので動かさない）
+FAIRNESS_KEYS = ("daily_spread", "daily_spread_ev", "prop_month", "morn_spread", "prop_zone")
+
+
+def parse_grid(specs: list[str]) -> dict[str, list[int]]:
+    """['prop_month=5,13', 'idle=100000'] -> {'prop_month': [5, 13], 'idle': [100000]}"""
+    names = {f.name for f in fields(Weights)}
+    grid = {}
+    for spec in specs:
+        key, _, values = spec.partition("=")
+        key = key.strip()
+        if key not in names or not values:
+            raise ValueError(f"--grid は Weights の項目を key=v1,v2 の形で指定してください: {spec}")
+        grid[key] = [int(v) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def grid_weights(base: Weights, grid: dict[str, list[int]]) -> list[Weights]:
+    keys = list(grid)
+    return [replace(base, **dict(zip(keys, combo))) for combo in itertools.product(*(grid[k] for k in keys))]
+
+
+def random_weights(base: Weights, n: int, keys: list[str], scale: tuple[float, float], seed: int) -> list[Weights]:
+    """keys の重みに [lo, hi] の対数一様な倍率を掛ける（1つ目は基準の重みのまま）"""
+    rng = random.Random(seed)
+    lo, hi = scale
+    out = [base]
+    while len(out) < n:
+        out.append(replace(base, **{
+            k: max(0, round(getattr(base, k) * lo * (hi / lo) ** rng.random())) for k in keys
+        }))
+    return out
+
+
+def solve_variant(args) -> dict:
+    """ワーカープロセスで1つの重みを解き、内訳を1行にする"""
+    i, inst, weights, options, seconds, num_workers = args
+    t0 = time.perf_counter()
+    am = build_model(inst, weights, options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = solve(am, seconds, num_workers=num_workers)
+    row = {"id": i, **asdict(weights), "status": result.status_name, "solve_s": round(result.wall_time, 3)}
+    if result.has_solution:
+        sol = extract_solution(inst, am, result)
+        bd = breakdown_from_model(inst, am, result.solver, sol)
+        row.update(
+            objective=result.objective,
+            used_team_count=bd["used_team_count"],
+            idle_slots=bd["idle_slots"],
+            daily_spread_sum=bd["daily_spread_sum"],
+            event_spread_sum=bd["event_spread_sum"],
+            month_diff_sum=bd["month_diff_sum"],
+            morning_range=bd["maxB"] - bd["minB"],
+            zone_diff_sum=sum(bd["zone_diff_sum"].values()),
+        )
+    row["wall_s"] = round(time.perf_counter() - t0, 3)
+    return row
+
+
+def dominates(a: dict, b: dict) -> bool:
+    """a がどの項でも b 以上に良く、少なくとも1項で真に良い"""
+    better = False
+    for m, sign in METRICS.items():
+        if sign * a[m] < sign * b[m]:
+            return False
+        if sign * a[m] > sign * b[m]:
+            better = True
+    return better
+
+
+def mark_pareto(rows: list[dict]) -> None:
+    """解のある行に pareto=True/False を付ける（同じ内訳の行はどちらも残す）"""
+    solved = [r for r in rows if "used_team_count" in r]
+    for r in solved:
+        r["pareto"] = not any(dominates(o, r) for o in solved if o is not r)
+
+
+def format_table(rows: list[dict], weight_keys: list[str]) -> list[str]:
+    cols = ["id", *weight_keys, "status", "solve_s", *METRICS, "pareto"]
+    table = [[str(r.get(c, "")) for c in cols] for r in rows]
+    widths = [max([len(c), *(len(t[i]) for t in table)]) for i, c in enumerate(cols)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(cols, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(t, widths)) for t in table]
+    return lines
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Weights を変えて並列に解き、内訳のパレート解を表示する")
+    p.add_argument("--config", type=str, required=True, help="config.yaml のパス")
+    p.add_argument("--data-dir", type=str, default=None, help="preferences.json / events.json のフォルダ（未指定なら config と同じフォルダ）")
+    p.add_argument("--grid", type=str, action="append", default=[], help="格子で試す重み（key=v1,v2,...。複数指定すると全組み合わせ）")
+    p.add_argument("--random", type=int, default=0, help="基準の重みに乱数の倍率を掛けた重みをこの数だけ試す")
+    p.add_argument("--keys", type=str, default=",".join(FAIRNESS_KEYS), help="--random で動かす重み（カンマ区切り）")
+    p.add_argument("--scale", type=str, default="0.25,4", help="--random の倍率の範囲 lo,hi（対数一様）")
+    p.add_argument("--seed", type=int, default=0, help="--random の乱数の種")
+    p.add_argument("--seconds", type=float, default=None, help="1つの重みあたりの求解時間（未指定なら config の max_solve_seconds）")
+    p.add_argument("--workers", type=int, default=None, help="同時に解く数（未指定なら CPU 数）")
+    p.add_argument("--all", action="store_true", help="パレート解だけでなく全部の行を表示する")
+    p.add_argument("--csv", type=str, default=None, help="全部の行を CSV で保存するパス")
+    args = p.parse_args(argv)
+
+    config_path = Path(args.config).resolve()
+    data_dir = Path(args.data_dir).resolve() if args.data_dir else config_path.parent
+    with contextlib.redirect_stdout(io.StringIO()):
+        inst = load_instance(config_path, data_dir)
+    base = Weights.from_config(inst.config)
+    options = ModelOptions.from_config(inst.config)
+    seconds = inst.max_solve_seconds if args.seconds is None else args.seconds
+
+    if args.grid and args.random:
+        raise SystemExit("--grid と --random はどちらか一方にしてください")
+    if args.grid:
+        grid = parse_grid(args.grid)
+        variants, weight_keys = grid_weights(base, grid), list(grid)
+    elif args.random:
+        keys = [k.strip() for k in args.keys.split(",") if k.strip()]
+        lo, hi = (float(v) for v in args.scale.split(","))
+        variants, weight_keys = random_weights(base, args.random, keys, (lo, hi), args.seed), keys
+    else:
+        raise SystemExit("--grid か --random を指定してください")
+
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(args.workers or cpus, len(variants)))
+    num_workers = max(1, cpus // workers) if workers > 1 else 0  # CP-SAT のスレッドでコアを取り合わないようにする
+    tasks = [(i, inst, w, options, seconds, num_workers) for i, w in enumerate(variants)]
+
+    t0 = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for row in executor.map(solve_variant, tasks):
+            rows.append(row)
+            print(f"[done] {row['id']} {row['status']} ({len(rows)}/{len(tasks)}, elapsed {time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+    mark_pareto(rows)
+
+    pareto = [r for r in rows if r.get("pareto")]
+    print(f"{inst.run_tag}  variants={len(rows)}  pareto={len(pareto)}  seconds={seconds}  workers={workers}")
+    if not pareto:
+        print("[INFO] どの重みでも時間内に解が見つかりませんでした（no variant found a solution）。全部の行を表示します")
+    print("\n".join(format_table(rows if args.all or not pareto else pareto, weight_keys)))
+
+    if args.csv:
+        cols = ["id", *(f.name for f in fields(Weights)), "status", "solve_s", "wall_s", "objective", *METRICS, "pareto"]
+        with open(args.csv, "w", encoding="utf-8-sig", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=cols, extrasaction="ignore")
+            w.writeheader()
+            w.writerows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+import io
 import os
 import sys
 import shutil
 import subprocess
+import threading
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
 from pathlib import Path
 from typing import List
 from types import SimpleNamespace
 
 IMAGE_NAME = "kasuga-gym:latest"
 
+# stdout / ロガーはプロセス共通なので、同一プロセス内の実行は1本ずつにする
+_IN_PROCESS_LOCK = threading.Lock()
+
 
 def _run_and_capture(cmd: list[str], cwd: Path) -> SimpleNamespace:
     """Run a command and capture stdout/stderr merged."""
@@ -34,12 +41,59 @@ def _run_and_capture(cmd: list[str], cwd: Path) -> SimpleNamespace:
     return SimpleNamespace(ok=(proc.returncode == 0), returncode=proc.returncode, lines=lines, log=log)
 
 
-def run_allocator(base_dir: Path, config_path: Path, ym: str, use_docker: bool = True) -> SimpleNamespace:
+def run_allocator_in_process(base_dir: Path, config_path: Path, ym: str, hint: str | None = None) -> SimpleNamespace:
+    """
+    Run allocator inside this interpreter (no subprocess).
+
+    OR-Tools / pandas / matplotlib は一度読み込めば使い回されるので、
+    2回目以降の実行は起動・import 時間がかからない。
+    戻り値は _run_and_capture と同じ形。
+    """
+    buf = io.StringIO()
+    returncode = 0
+    with _IN_PROCESS_LOCK, redirect_stdout(buf), redirect_stderr(buf):
+        try:
+            from allocator.instance import load_config
+            from allocator.pipeline import run_month
+
+            # Streamlit のスレッドからプロセスを fork しない:
+            #   画像は1プロセスで描き、decomposed エンジンは日ごとの部分問題を同じプロセスで順に解く
+            #   （solver_workers が部分問題のプロセス数になる。monolithic では CP-SAT のスレッド数なので変えない）
+            engine = (load_config(config_path) or {}).get("engine", "monolithic")
+            run_month(
+                config_path=config_path,
+                out="output",
+                data_tag=ym,
+                hint=hint,
+                solver_workers=1 if engine == "decomposed" else None,
+                render_workers=1,
+                base_dir=base_dir,
+            )
+        except Exception:
+            traceback.print_exc()
+            returncode = 1
+
+    lines: List[str] = buf.getvalue().splitlines()
+    lines.append(f"\n[exit code] {returncode}")
+    log = "\n".join(lines)
+    return SimpleNamespace(ok=(returncode == 0), returncode=returncode, lines=lines, log=log)
+
+
+def run_allocator(
+    base_dir: Path,
+    config_path: Path,
+    ym: str,
+    use_docker: bool = True,
+    in_process: bool = True,
+    hint: str | None = None,
+) -> SimpleNamespace:
     """
     Run allocator.
 
     - ローカルPC(Windows等): use_docker=True なら Docker で環境固定して実行
     - Hugging Face Spaces: dockerコマンドが無い/動かないので自動的に local 実行にフォールバック
+    - local 実行は in_process=True なら subprocess を使わずこのプロセス内で実行
+    - hint="auto" なら前回の解をヒントにして解く（local 実行のみ）
 
     Returns an object with:
       - ok: bool (return code == 0)
@@ -106,6 +160,9 @@ def run_allocator(base_dir: Path, config_path: Path, ym: str, use_docker: bool =
     # ----------------------------
     # 2) Local実行（Spaces含む）
     # ----------------------------
+    if in_process:
+        return run_allocator_in_process(base_dir, config_path, ym, hint=hint)
+
     main_py = base_dir / "sourcecode" / "main.py"
 
     # python は "python" 固定だと環境差が出るので、同一環境の python を使う
@@ -119,4 +176,6 @@ def run_allocator(base_dir: Path, config_path: Path, ym: str, use_docker: bool =
         "--out",
         "output",
     ]
+    if hint:
+        cmd += ["--hint", hint]
     return _run_and_capture(cmd, cwd=base_dir)